@@ -22,6 +22,11 @@ def start_env_node(
     tick_interval: float = typer.Option(),
     max_tick_cnt: int = typer.Option(),
     result_dir: str = typer.Option(),
+    event_log_flush_interval: float = typer.Option(1.0),
+    event_log_fsync_policy: str = typer.Option("never"),
+    observation_codec: str = typer.Option("pydantic_json"),
+    compression_threshold: int = typer.Option(64 * 1024),
+    partial_obs_interval: float = typer.Option(0.2),
     redis_url: str = typer.Option(),
 ) -> None:
     env_config = toml.load(env_config_toml)
@@ -40,6 +45,11 @@ def start_env_node(
                 tick_interval=tick_interval,
                 max_tick_cnt=max_tick_cnt,
                 result_dir=result_dir,
+                event_log_flush_interval=event_log_flush_interval,
+                event_log_fsync_policy=event_log_fsync_policy,
+                observation_codec=observation_codec,
+                compression_threshold=compression_threshold,
+                partial_obs_interval=partial_obs_interval,
             ),
         ),
         redis_url,
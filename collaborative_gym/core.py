@@ -3,7 +3,7 @@
 import re
 import logging
 from enum import Enum
-from typing import Dict, SupportsFloat, Any, Tuple, Optional
+from typing import Callable, Dict, SupportsFloat, Any, Tuple, Optional
 
 from pydantic import BaseModel
 
@@ -57,6 +57,16 @@ class CoEnv:
         example_question: Example task scenario for team members
         example_trajectory: Example sequence of actions and observations
         env_id: Unique identifier for this environment instance
+        obs_version: Version of the observation, incremented whenever the environment invalidates it
+        streams_partial_obs: Whether `step` reports partial observations with `emit_partial_obs`
+
+    Subclasses implement `compute_obs` and call `invalidate_obs` whenever their state may change
+    (typically at the start of `reset` and of `step`). `get_obs` then returns the cached
+    observation until the next invalidation.
+
+    Subclasses whose actions can run for long (e.g. executing code) set `streams_partial_obs`
+    and call `emit_partial_obs` while an action runs to show its progress to GUI users. Their
+    `step` is then run in a worker thread.
     """
 
     task_description: str  # Description of the task
@@ -71,6 +81,11 @@ class CoEnv:
         []
     )  # A sequence of Thought/Action/Observation tuples
     env_id: str  # Unique identifier for this environment instance
+    obs_version: int = 0
+    _obs_cache: Optional[ObsType] = None
+    _obs_cache_version: int = -1
+    streams_partial_obs: bool = False
+    _partial_obs_listener: Optional[Callable[[str, dict[str, Any]], None]] = None
 
     def __init__(self, team_members: list[str], env_id: str):
         self.team_members = team_members
@@ -166,11 +181,50 @@ class CoEnv:
     def get_obs(self) -> ObsType:
         """Get the current observation of the environment.
 
+        The observation is computed at most once per `obs_version` and shared between callers,
+        so it must not be mutated.
+
+        Returns:
+            ObsType: Current observation dictionary containing the environment state.
+        """
+        if self._obs_cache_version != self.obs_version:
+            self._obs_cache = self.compute_obs()
+            self._obs_cache_version = self.obs_version
+        return self._obs_cache
+
+    def compute_obs(self) -> ObsType:
+        """Compute the current observation from the environment state.
+
         Returns:
             ObsType: Current observation dictionary containing the environment state.
         """
         raise NotImplementedError
 
+    def invalidate_obs(self):
+        """Mark the cached observation as stale after (or before) a state change."""
+        self.obs_version += 1
+        self._obs_cache = None
+
+    def set_partial_obs_listener(
+        self, listener: Optional[Callable[[str, dict[str, Any]], None]]
+    ):
+        """Set the function receiving the partial observations emitted during `step`, or unset it with None."""
+        self._partial_obs_listener = listener
+
+    def emit_partial_obs(self, key: str, update: dict[str, Any]):
+        """Report the progress of the running action on the public observation field `key`.
+
+        Partial observations are not recorded; the observation returned by `step` replaces
+        them. This may be called from the worker thread running `step`.
+
+        Args:
+            key (str): Name of the public observation field the update belongs to.
+            update (dict): JSON-serializable update; its format depends on the field.
+        """
+        listener = self._partial_obs_listener
+        if listener is not None:
+            listener(key, update)
+
     def obs_type(self) -> Dict[str, ObservationTypes]:
         """Return the type of each observation field for GUI rendering.
 
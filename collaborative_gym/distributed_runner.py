@@ -0,0 +1,684 @@
+"""
+Sessions spread over worker daemons on several hosts.
+
+`Runner` starts the processes of a session on the machine it runs on, so one server can
+only use one machine. Here, a `RunnerWorker` daemon runs on every host and starts the
+sessions it is given with a local `Runner` (optionally with a node pool and env hosts).
+The server uses a `DistributedRunner` instead of a `Runner`: it has the same session API,
+but keeps the session records in Redis and queues each session launch for a worker.
+
+Workers publish their capacity, running sessions and load average every few seconds. The
+coordinator routes a session to the healthy worker with the lowest load (running plus
+queued sessions over capacity); when every worker is full, the session goes to a shared
+queue taken by the first worker with a free slot. Sessions queued for a worker that
+stopped sending heartbeats are moved back to the shared queue.
+
+All nodes talk through the same Redis server, so the GUI nodes created by the server
+reach nodes started on any worker. Session results are written to the result_dir given by
+the coordinator, which must be on storage shared by all hosts (the server reads event
+logs and uploaded tables from it).
+
+To try it locally, start a few workers next to the server:
+    python -m collaborative_gym.distributed_runner worker --worker-id worker-0 --capacity 2
+    python -m collaborative_gym.distributed_runner worker --worker-id worker-1 --capacity 2
+    python -m collaborative_gym.distributed_runner status
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+import toml
+from pydantic import BaseModel
+
+from collaborative_gym.core import TeamMemberConfig
+from collaborative_gym.env_host import EnvHostPool
+from collaborative_gym.node_pool import DEFAULT_PRELOAD_MODULES, NodeWorkerPool
+from collaborative_gym.nodes.heartbeat import (
+    delete_session_records,
+    read_heartbeat_records,
+)
+from collaborative_gym.runner import Runner
+from collaborative_gym.utils.utils import load_api_key
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTED_KEY_PREFIX = "distributed_runner:"
+WORKERS_KEY = f"{DISTRIBUTED_KEY_PREFIX}workers"
+SHARED_LAUNCH_QUEUE_KEY = f"{DISTRIBUTED_KEY_PREFIX}sessions"
+SESSION_RECORD_TTL = 7 * 24 * 3600
+HEARTBEAT_INTERVAL = 2
+WORKER_TIMEOUT = 10
+REAP_INTERVAL = 60
+
+
+def launch_queue_key(worker_id: str) -> str:
+    """Redis list of the session launch requests routed to a worker."""
+    return f"{DISTRIBUTED_KEY_PREFIX}worker:{worker_id}:sessions"
+
+
+def admitting_queue_key(worker_id: str) -> str:
+    """Redis list holding the request a worker is admitting until it reports the session."""
+    return f"{DISTRIBUTED_KEY_PREFIX}worker:{worker_id}:admitting"
+
+
+def stop_queue_key(worker_id: str) -> str:
+    """Redis list of the sessions a worker should stop."""
+    return f"{DISTRIBUTED_KEY_PREFIX}worker:{worker_id}:stop"
+
+
+def session_record_key(session_uuid: str) -> str:
+    """Redis hash recording the worker and status of a session."""
+    return f"{DISTRIBUTED_KEY_PREFIX}session:{session_uuid}"
+
+
+class SessionLaunchRequest(BaseModel):
+    """Arguments of `Runner.start_session`, with the environment config inlined."""
+
+    session_uuid: str
+    env_config: Dict[str, Any]
+    members: List[TeamMemberConfig]
+    max_steps: int
+    disable_collaboration: bool = False
+    add_tick: bool = False
+    tick_interval: float = 60
+    max_tick_cnt: int = 5
+    result_dir: str
+
+
+class WorkerStatus(BaseModel):
+    """
+    Capacity and health reported by a worker.
+
+    Attributes:
+        worker_id: Identifier of the worker
+        hostname: Host the worker runs on
+        pid: Process ID of the worker daemon
+        capacity: Maximum number of sessions the worker runs at the same time
+        sessions: Sessions the worker is running
+        load_average: One-minute load average of the host
+        heartbeat_at: Time of the report
+    """
+
+    worker_id: str
+    hostname: str
+    pid: int
+    capacity: int
+    sessions: List[str] = []
+    load_average: float = 0
+    heartbeat_at: float
+
+    def is_healthy(self, worker_timeout: float = WORKER_TIMEOUT) -> bool:
+        return time.time() - self.heartbeat_at <= worker_timeout
+
+
+def get_worker_statuses(r: redis.Redis) -> List[WorkerStatus]:
+    return [WorkerStatus.model_validate_json(status) for status in r.hvals(WORKERS_KEY)]
+
+
+class DistributedRunner:
+    """
+    Starts sessions on `RunnerWorker` daemons, with the session API of `Runner`.
+
+    Attributes:
+        result_dir: Directory for storing session results, shared by all hosts
+        redis_url: URL of the Redis server holding the queues and session records
+        worker_timeout: Seconds without heartbeat after which a worker is unhealthy
+        r: Redis client
+        sessions: Sessions started by this coordinator
+    """
+
+    def __init__(
+        self,
+        result_dir: str = "./workdir/results",
+        redis_url: str = "redis://localhost:6379/0",
+        worker_timeout: float = WORKER_TIMEOUT,
+    ):
+        if not os.path.exists(result_dir):
+            os.makedirs(result_dir)
+        self.result_dir = os.path.abspath(result_dir)
+        self.redis_url = redis_url
+        self.worker_timeout = worker_timeout
+        self.r = redis.Redis.from_url(redis_url)
+        self.sessions: List[str] = []
+        self._routing_lock = threading.Lock()
+
+    def get_workers(self) -> List[WorkerStatus]:
+        """Last status of every worker, healthy or not."""
+        return get_worker_statuses(self.r)
+
+    def requeue_from_unhealthy_workers(self, workers: List[WorkerStatus]):
+        """Move the sessions queued for unhealthy workers to the shared queue."""
+        for worker in workers:
+            if worker.is_healthy(self.worker_timeout):
+                continue
+            for key in (
+                admitting_queue_key(worker.worker_id),
+                launch_queue_key(worker.worker_id),
+            ):
+                while self.r.lmove(key, SHARED_LAUNCH_QUEUE_KEY, "LEFT", "RIGHT"):
+                    logger.warning(
+                        f"Moved a session queued for unhealthy worker {worker.worker_id} "
+                        f"to the shared queue."
+                    )
+
+    def get_pending_sessions(self, worker_id: str) -> Optional[int]:
+        """
+        Number of sessions a worker runs or has yet to start, or None if it is gone.
+
+        A request moves from the launch queue to the admitting queue in one step, and
+        leaves the admitting queue after the worker reported the session in its status,
+        so reading the queues before the status never misses a session.
+        """
+        with self.r.pipeline(transaction=True) as pipe:
+            pipe.llen(launch_queue_key(worker_id))
+            pipe.llen(admitting_queue_key(worker_id))
+            queued, admitting = pipe.execute()
+        status = self.r.hget(WORKERS_KEY, worker_id)
+        if status is None:
+            return None
+        return queued + admitting + len(WorkerStatus.model_validate_json(status).sessions)
+
+    def select_worker(self, workers: List[WorkerStatus]) -> Optional[WorkerStatus]:
+        """
+        Pick the healthy worker with the lowest load.
+
+        Returns:
+            The worker, or None if no healthy worker has a free slot
+        """
+        best_worker, best_load = None, None
+        for worker in workers:
+            if not worker.is_healthy(self.worker_timeout) or worker.capacity < 1:
+                continue
+            pending = self.get_pending_sessions(worker.worker_id)
+            if pending is None or pending >= worker.capacity:
+                continue
+            load = (pending / worker.capacity, worker.load_average)
+            if best_load is None or load < best_load:
+                best_worker, best_load = worker, load
+        return best_worker
+
+    def check_session_exists(self, session_uuid: str) -> bool:
+        """
+        Check if a session with the given UUID exists.
+
+        Args:
+            session_uuid: Unique identifier for the session to check
+
+        Returns:
+            bool: True if the session exists, False otherwise
+        """
+        return bool(self.r.exists(session_record_key(session_uuid)))
+
+    def get_session_status(self, session_uuid: str) -> Optional[str]:
+        """
+        Status of a session: "queued", "running", "ended", "failed", "stopping",
+        "stopped", or "lost" if its worker stopped sending heartbeats; None if unknown.
+        """
+        record = {
+            k.decode("utf-8"): v.decode("utf-8")
+            for k, v in self.r.hgetall(session_record_key(session_uuid)).items()
+        }
+        if not record:
+            return None
+        if record["status"] == "running":
+            status = self.r.hget(WORKERS_KEY, record["worker"])
+            if status is None or not WorkerStatus.model_validate_json(status).is_healthy(
+                self.worker_timeout
+            ):
+                return "lost"
+        return record["status"]
+
+    def start_session(
+        self,
+        session_uuid: str,
+        env_config_path: str,
+        members: List[TeamMemberConfig],
+        max_steps: int,
+        disable_collaboration: bool = False,
+        add_tick: bool = False,
+        tick_interval: float = 60,
+        max_tick_cnt: int = 5,
+    ):
+        """
+        Queue a new session for the least loaded worker.
+
+        Returns once the session is queued; the worker launches the team members and the
+        environment as `Runner.start_session` does.
+
+        Args:
+            session_uuid: Unique identifier for the new session
+            env_config_path: Path to the environment configuration file, read here so that
+                workers do not need access to it
+            members: List of team member configurations
+            max_steps: Maximum number of steps allowed in the session
+            disable_collaboration: If True, only task actions are allowed
+            add_tick: If True, adds a process to handle timeouts
+            tick_interval: Time in seconds between tick checks
+            max_tick_cnt: Maximum number of ticks before timeout
+        """
+        if session_uuid in self.sessions or self.check_session_exists(session_uuid):
+            print(f"Session {session_uuid} already started")
+            return
+        self.sessions.append(session_uuid)
+        request = SessionLaunchRequest(
+            session_uuid=session_uuid,
+            env_config=toml.load(env_config_path),
+            members=members,
+            max_steps=max_steps,
+            disable_collaboration=disable_collaboration,
+            add_tick=add_tick,
+            tick_interval=tick_interval,
+            max_tick_cnt=max_tick_cnt,
+            result_dir=self.result_dir,
+        )
+        # Sessions are started from several threads of the server; without the lock, they
+        # would all see the same free slot.
+        with self._routing_lock:
+            workers = self.get_workers()
+            self.requeue_from_unhealthy_workers(workers)
+            worker = self.select_worker(workers)
+            record_key = session_record_key(session_uuid)
+            self.r.hset(
+                record_key,
+                mapping={
+                    "status": "queued",
+                    "worker": "" if worker is None else worker.worker_id,
+                    "updated_at": time.time(),
+                },
+            )
+            self.r.expire(record_key, SESSION_RECORD_TTL)
+            if worker is None:
+                logger.warning(
+                    f"No worker has a free slot; session {session_uuid} waits in the "
+                    f"shared queue."
+                )
+                self.r.rpush(SHARED_LAUNCH_QUEUE_KEY, request.model_dump_json())
+            else:
+                logger.info(f"Routing session {session_uuid} to worker {worker.worker_id}.")
+                self.r.rpush(launch_queue_key(worker.worker_id), request.model_dump_json())
+
+    def stop_session(self, session_uuid: str):
+        """Stop a session, or drop it if it is still queued."""
+        record_key = session_record_key(session_uuid)
+        status = self.r.hget(record_key, "status")
+        if status is None or status.decode("utf-8") in ("ended", "failed", "stopped"):
+            return
+        self.r.hset(record_key, mapping={"status": "stopping", "updated_at": time.time()})
+        worker_id = self.r.hget(record_key, "worker").decode("utf-8")
+        if worker_id:
+            self.r.rpush(stop_queue_key(worker_id), session_uuid)
+
+    def cleanup_subprocesses(self):
+        """Stop the sessions started by this coordinator on their workers."""
+        for session_uuid in self.sessions:
+            try:
+                self.stop_session(session_uuid)
+            except Exception as e:
+                print(f"Failed to stop session {session_uuid}: {e}")
+
+    def reset(self):
+        """
+        Reset the runner to its initial state.
+
+        Stops all sessions started by this coordinator and forgets them.
+        """
+        self.cleanup_subprocesses()
+        self.sessions = []
+
+
+class RunnerWorker:
+    """
+    Daemon starting the sessions queued for it (or in the shared queue) on its host.
+
+    Every session gets its own `Runner`, so stopping one session does not touch the
+    processes of the others.
+
+    Attributes:
+        worker_id: Identifier of the worker, used in its Redis keys
+        redis_url: URL of the Redis server used by the queues and the nodes
+        capacity: Maximum number of sessions run at the same time
+        heartbeat_interval: Seconds between two status reports
+        node_pool: Pool of pre-warmed workers starting the nodes of the sessions, if any
+        env_host_pool: Hosts running the environment nodes of the sessions, if any
+        idle_timeout: Seconds without activity of any node of a session after which the
+            worker stops it (None to keep idle sessions); this replaces the server's stale
+            process reaper, which cannot signal processes on other hosts
+        sessions: Runner of every session being run
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        redis_url: str = "redis://localhost:6379/0",
+        capacity: int = 4,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+        node_pool: Optional[NodeWorkerPool] = None,
+        env_host_pool: Optional[EnvHostPool] = None,
+        idle_timeout: Optional[float] = 3600,
+    ):
+        self.worker_id = worker_id
+        self.redis_url = redis_url
+        self.capacity = capacity
+        self.heartbeat_interval = heartbeat_interval
+        self.node_pool = node_pool
+        self.env_host_pool = env_host_pool
+        self.idle_timeout = idle_timeout
+        self.r = redis.Redis.from_url(redis_url)
+        self.hostname = socket.gethostname()
+        self.sessions: Dict[str, Runner] = {}
+        self._started_at: Dict[str, float] = {}
+        self._stop_requested: set[str] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def get_status(self) -> WorkerStatus:
+        with self._lock:
+            sessions = sorted(self.sessions)
+        return WorkerStatus(
+            worker_id=self.worker_id,
+            hostname=self.hostname,
+            pid=os.getpid(),
+            capacity=self.capacity,
+            sessions=sessions,
+            load_average=os.getloadavg()[0],
+            heartbeat_at=time.time(),
+        )
+
+    def report_status(self):
+        self.r.hset(WORKERS_KEY, self.worker_id, self.get_status().model_dump_json())
+
+    def _report_periodically(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                self.report_status()
+            except redis.RedisError as e:
+                logger.error(f"Worker {self.worker_id} failed to report its status: {e!r}")
+
+    def update_session_record(self, session_uuid: str, status: str):
+        record_key = session_record_key(session_uuid)
+        self.r.hset(
+            record_key,
+            mapping={"status": status, "worker": self.worker_id, "updated_at": time.time()},
+        )
+        self.r.expire(record_key, SESSION_RECORD_TTL)
+
+    def run_session(self, request: SessionLaunchRequest, runner: Runner):
+        session_uuid = request.session_uuid
+        status = "ended"
+        with tempfile.NamedTemporaryFile(
+            "w", prefix=f"env_{session_uuid}_", suffix=".toml", delete=False
+        ) as f:
+            toml.dump(request.env_config, f)
+            env_config_path = f.name
+        try:
+            runner.start_session(
+                session_uuid=session_uuid,
+                env_config_path=env_config_path,
+                members=request.members,
+                max_steps=request.max_steps,
+                disable_collaboration=request.disable_collaboration,
+                add_tick=request.add_tick,
+                tick_interval=request.tick_interval,
+                max_tick_cnt=request.max_tick_cnt,
+            )
+            # A stop request received while the session was starting missed the
+            # processes launched afterwards.
+            if session_uuid in self._stop_requested:
+                runner.cleanup_subprocesses()
+            for process in runner.subprocesses:
+                process.wait()
+            if session_uuid in self._stop_requested:
+                status = "stopped"
+        except Exception as e:
+            logger.error(f"Session {session_uuid} failed: {e!r}")
+            status = "failed"
+        finally:
+            runner.reset()
+            os.remove(env_config_path)
+            delete_session_records(self.r, f"env_{session_uuid}")
+            with self._lock:
+                self.sessions.pop(session_uuid, None)
+                self._started_at.pop(session_uuid, None)
+                self._stop_requested.discard(session_uuid)
+            self.update_session_record(session_uuid, status)
+            self.report_status()
+            logger.info(f"Session {session_uuid} {status} on worker {self.worker_id}.")
+
+    def admit(self, request: SessionLaunchRequest):
+        session_uuid = request.session_uuid
+        status = self.r.hget(session_record_key(session_uuid), "status")
+        if status is not None and status.decode("utf-8") == "stopping":
+            self.update_session_record(session_uuid, "stopped")  # Stopped while queued
+            return
+        runner = Runner(
+            result_dir=request.result_dir,
+            redis_url=self.redis_url,
+            node_pool=self.node_pool,
+            env_host_pool=self.env_host_pool,
+        )
+        with self._lock:
+            self.sessions[session_uuid] = runner
+            self._started_at[session_uuid] = time.time()
+        self.update_session_record(session_uuid, "running")
+        self.report_status()
+        logger.info(
+            f"Worker {self.worker_id} starting session {session_uuid} "
+            f"({len(self.sessions)}/{self.capacity})."
+        )
+        threading.Thread(
+            target=self.run_session, args=(request, runner), daemon=True
+        ).start()
+
+    def handle_stop_requests(self):
+        while True:
+            item = self.r.lpop(stop_queue_key(self.worker_id))
+            if item is None:
+                return
+            session_uuid = item.decode("utf-8")
+            with self._lock:
+                runner = self.sessions.get(session_uuid)
+                if runner is not None:
+                    self._stop_requested.add(session_uuid)
+            if runner is not None:
+                logger.info(f"Stopping session {session_uuid}.")
+                runner.cleanup_subprocesses()
+
+    def reap_idle_sessions(self):
+        """
+        Stop the sessions none of whose nodes was active for idle_timeout seconds.
+
+        Activity is read from the heartbeat records of the session's nodes (see
+        `collaborative_gym.nodes.heartbeat`). The records are keyed by session rather than by pid,
+        so processes with the same pid on other hosts do not affect each other.
+        """
+        with self._lock:
+            started_at = {
+                session_uuid: self._started_at[session_uuid]
+                for session_uuid in self.sessions
+                if session_uuid not in self._stop_requested
+            }
+        if not started_at:
+            return
+        last_active_time = dict(started_at)
+        for record in read_heartbeat_records(self.r):
+            session_uuid = (record.session or "").removeprefix("env_")
+            if session_uuid in last_active_time:
+                last_active_time[session_uuid] = max(
+                    last_active_time[session_uuid], record.last_active_time
+                )
+        for session_uuid, active_time in last_active_time.items():
+            if time.time() - active_time > self.idle_timeout:
+                logger.warning(
+                    f"Session {session_uuid} has been idle for {self.idle_timeout:g} seconds."
+                )
+                self.r.rpush(stop_queue_key(self.worker_id), session_uuid)
+
+    def run(self):
+        """Take and run sessions until `stop` is called."""
+        self.report_status()
+        heartbeat = threading.Thread(target=self._report_periodically, daemon=True)
+        heartbeat.start()
+        logger.info(f"Worker {self.worker_id} on {self.hostname} ready.")
+        next_reap_time = time.time() + REAP_INTERVAL
+        while not self._stopped.is_set():
+            if self.idle_timeout is not None and time.time() > next_reap_time:
+                self.reap_idle_sessions()
+                next_reap_time = time.time() + REAP_INTERVAL
+            self.handle_stop_requests()
+            if len(self.sessions) >= self.capacity:
+                self._stopped.wait(0.5)
+                continue
+            # Sessions routed to this worker come before those of the shared queue.
+            admitting_key = admitting_queue_key(self.worker_id)
+            item = self.r.blmove(
+                launch_queue_key(self.worker_id), admitting_key, 1, "LEFT", "RIGHT"
+            ) or self.r.lmove(SHARED_LAUNCH_QUEUE_KEY, admitting_key, "LEFT", "RIGHT")
+            if item is not None:
+                self.admit(SessionLaunchRequest.model_validate_json(item))
+                self.r.lrem(admitting_key, 1, item)
+        heartbeat.join()
+
+        with self._lock:
+            runners = list(self.sessions.items())
+            self._stop_requested.update(self.sessions)
+        for session_uuid, runner in runners:
+            logger.info(f"Stopping session {session_uuid}.")
+            runner.cleanup_subprocesses()
+        while self.sessions:
+            time.sleep(0.2)
+        self.r.hdel(WORKERS_KEY, self.worker_id)
+        # Sessions still routed to this worker are taken by the others.
+        while self.r.lmove(
+            launch_queue_key(self.worker_id), SHARED_LAUNCH_QUEUE_KEY, "LEFT", "RIGHT"
+        ):
+            pass
+        self.r.delete(stop_queue_key(self.worker_id), admitting_queue_key(self.worker_id))
+
+    def stop(self):
+        self._stopped.set()
+
+
+def print_worker_status(redis_url: str, worker_timeout: float = WORKER_TIMEOUT):
+    r = redis.Redis.from_url(redis_url)
+    workers = sorted(get_worker_statuses(r), key=lambda w: w.worker_id)
+    print(f"{'worker':<20} {'host':<20} {'sessions':>8} {'load':>6}  health")
+    for worker in workers:
+        health = (
+            "healthy"
+            if worker.is_healthy(worker_timeout)
+            else f"no heartbeat for {time.time() - worker.heartbeat_at:.0f}s"
+        )
+        print(
+            f"{worker.worker_id:<20} {worker.hostname:<20} "
+            f"{len(worker.sessions):>3}/{worker.capacity:<4} {worker.load_average:>6.2f}  {health}"
+        )
+    print(f"{r.llen(SHARED_LAUNCH_QUEUE_KEY)} session(s) in the shared queue")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = subparsers.add_parser("worker", help="Run a worker daemon.")
+    worker_parser.add_argument(
+        "--worker-id",
+        type=str,
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Identifier of the worker, unique among the workers sharing the Redis server.",
+    )
+    worker_parser.add_argument(
+        "--capacity",
+        type=int,
+        default=4,
+        help="Maximum number of sessions the worker runs at the same time.",
+    )
+    worker_parser.add_argument(
+        "--node-pool-size",
+        type=int,
+        default=0,
+        help="Number of pre-warmed worker processes starting the nodes (0 to start every "
+        "node as a new process).",
+    )
+    worker_parser.add_argument(
+        "--preload-modules",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Modules imported by the node pool in addition to the default ones "
+        "(e.g., the agent module).",
+    )
+    worker_parser.add_argument(
+        "--env-host-count",
+        type=int,
+        default=0,
+        help="Number of host processes running the environment nodes of the sessions "
+        "(0 to start an environment process per session).",
+    )
+    worker_parser.add_argument(
+        "--idle-timeout-minutes",
+        type=float,
+        default=60,
+        help="Stop sessions whose nodes were all inactive for this many minutes (0 to keep "
+        "idle sessions).",
+    )
+    worker_parser.add_argument("--secret-path", type=str, default="secrets.toml")
+    worker_parser.add_argument(
+        "--redis-url", type=str, default="redis://localhost:6379/0"
+    )
+
+    status_parser = subparsers.add_parser("status", help="Print the status of the workers.")
+    status_parser.add_argument(
+        "--redis-url", type=str, default="redis://localhost:6379/0"
+    )
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_worker_status(args.redis_url)
+        sys.exit(0)
+
+    if os.path.exists(args.secret_path):
+        load_api_key(args.secret_path)
+
+    node_pool = None
+    if args.node_pool_size > 0:
+        node_pool = NodeWorkerPool(
+            size=args.node_pool_size,
+            redis_url=args.redis_url,
+            preload_modules=[*DEFAULT_PRELOAD_MODULES, *args.preload_modules],
+        )
+        node_pool.start()
+    env_host_pool = None
+    if args.env_host_count > 0:
+        env_host_pool = EnvHostPool(
+            size=args.env_host_count,
+            redis_url=args.redis_url,
+            max_sessions_per_host=-(-args.capacity // args.env_host_count),
+        )
+        env_host_pool.start()
+
+    worker = RunnerWorker(
+        worker_id=args.worker_id,
+        redis_url=args.redis_url,
+        capacity=args.capacity,
+        node_pool=node_pool,
+        env_host_pool=env_host_pool,
+        idle_timeout=args.idle_timeout_minutes * 60 or None,
+    )
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    try:
+        worker.run()
+    finally:
+        if node_pool is not None:
+            node_pool.shutdown()
+        if env_host_pool is not None:
+            env_host_pool.shutdown()
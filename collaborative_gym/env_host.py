@@ -0,0 +1,420 @@
+"""
+Host processes running the task environment nodes of many sessions.
+
+Without hosts, every session starts its own `start-env-node` process, which holds its own
+copy of pandas, the environment code, the TravelPlanner databases and its Redis
+connections. An env host runs the `TaskEnvNode` (and `TaskEnvTickNode`) of many sessions
+as coroutines of a single process: modules and read-only tables are loaded once (see
+`load_database_table`), and the nodes share one Redis client and, with the pub/sub
+transport, one pub/sub connection. Blocking calls to the environments (building, stepping,
+evaluating and closing them) run in worker threads, so that a slow session does not stall
+the others (see `TaskEnvNode.run_env`).
+
+`EnvHostPool` supervises a fixed number of hosts. Sessions are sharded over the hosts by
+their env_uuid; each host has a Redis list of session requests and only takes the next
+request when it runs fewer than `max_sessions` sessions, so extra sessions wait in the
+queue instead of overloading the host. Hosts can also keep Jupyter containers ready for the
+CoAnalysisEnv sessions they run (see `collaborative_gym.utils.jupyter_pool`).
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+import redis
+import redis.asyncio
+from aact import NodeFactory
+
+import collaborative_gym.nodes.task_env  # noqa: F401 (registers the task_env and env_tick nodes)
+from collaborative_gym.nodes.heartbeat import mark_process_shared
+from collaborative_gym.nodes.transports import (
+    PubSubTransport,
+    SharedPubSub,
+    get_transport_name,
+)
+from collaborative_gym.utils.jupyter_pool import start_jupyter_pool
+
+logger = logging.getLogger(__name__)
+
+ENV_HOST_KEY_PREFIX = "env_host:"
+SESSION_RECORD_TTL = 24 * 3600
+
+
+def session_queue_key(host_id: str) -> str:
+    """Redis list of the session requests waiting for a host."""
+    return f"{ENV_HOST_KEY_PREFIX}{host_id}:sessions"
+
+
+def stop_queue_key(host_id: str) -> str:
+    """Redis list of the env_uuids of the sessions a host should stop."""
+    return f"{ENV_HOST_KEY_PREFIX}{host_id}:stop"
+
+
+def session_record_key(env_uuid: str) -> str:
+    """Redis hash recording the host and return code of a hosted session."""
+    return f"{ENV_HOST_KEY_PREFIX}session:{env_uuid}"
+
+
+def shard_for_session(env_uuid: str, num_shards: int) -> int:
+    return zlib.crc32(env_uuid.encode("utf-8")) % num_shards
+
+
+class HostedEnvSession:
+    """
+    Handle of a session run by an env host, mimicking the parts of `Popen` the Runner uses.
+
+    Unlike a node process, the host is shared by other sessions, so the session is stopped
+    with `terminate` instead of by killing a process group.
+    """
+
+    def __init__(self, r: redis.Redis, host_id: str, env_uuid: str, host: subprocess.Popen):
+        self.r = r
+        self.host_id = host_id
+        self.env_uuid = env_uuid
+        self.host = host
+        self.returncode: Optional[int] = None
+
+    @property
+    def pid(self) -> int:
+        """Pid of the host process."""
+        return self.host.pid
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is not None:
+            return self.returncode
+        returncode = self.r.hget(session_record_key(self.env_uuid), "returncode")
+        if returncode is not None:
+            self.returncode = int(returncode)
+        elif self.host.poll() is not None:
+            # The host died with the session; a replacement host does not resume it.
+            self.returncode = -1
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.time() > deadline:
+                raise subprocess.TimeoutExpired(self.env_uuid, timeout)
+            time.sleep(0.2)
+        return self.returncode
+
+    def terminate(self):
+        """Ask the host to stop the session (or to drop it if it is still queued)."""
+        if self.poll() is None:
+            self.r.rpush(stop_queue_key(self.host_id), self.env_uuid)
+
+
+class EnvHostPool:
+    """
+    Supervises the env host processes and shards sessions over them.
+
+    Attributes:
+        size: Number of host processes
+        redis_url: URL of the Redis server holding the session queues
+        max_sessions_per_host: Number of sessions a host runs at the same time
+        jupyter_pool_size: Number of idle Jupyter containers each host keeps ready for
+            CoAnalysisEnv sessions (0 to start a container per session)
+        jupyter_pool_dir: Directory of the volumes of the pooled containers, on the
+            filesystem of the session volumes (see `JupyterContainerPool`)
+        jupyter_dataset_dir: Directory of datasets mounted read-only in the pooled
+            containers, so that sessions read the datasets under it in place
+        host_ids: Identifier of each host, used in its Redis keys
+        hosts: Host processes
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        redis_url: str = "redis://localhost:6379/0",
+        max_sessions_per_host: int = 16,
+        jupyter_pool_size: int = 0,
+        jupyter_pool_dir: Optional[str] = None,
+        jupyter_dataset_dir: Optional[str] = None,
+    ):
+        self.size = size
+        self.redis_url = redis_url
+        self.max_sessions_per_host = max_sessions_per_host
+        self.jupyter_pool_size = jupyter_pool_size
+        self.jupyter_pool_dir = jupyter_pool_dir
+        self.jupyter_dataset_dir = jupyter_dataset_dir
+        pool_id = uuid.uuid4().hex[:8]
+        self.host_ids = [f"{pool_id}-{i}" for i in range(size)]
+        self.r = redis.Redis.from_url(redis_url)
+        self.hosts: List[subprocess.Popen] = []
+        self._stopped = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+    def spawn_host(self, host_id: str) -> subprocess.Popen:
+        command = [
+            sys.executable,
+            "-m",
+            "collaborative_gym.env_host",
+            "--redis-url",
+            self.redis_url,
+            "--host-id",
+            host_id,
+            "--max-sessions",
+            str(self.max_sessions_per_host),
+            "--jupyter-pool-size",
+            str(self.jupyter_pool_size),
+        ]
+        if self.jupyter_pool_dir is not None:
+            command += ["--jupyter-pool-dir", self.jupyter_pool_dir]
+        if self.jupyter_dataset_dir is not None:
+            command += ["--jupyter-dataset-dir", self.jupyter_dataset_dir]
+        return subprocess.Popen(command)
+
+    def start(self):
+        self.hosts = [self.spawn_host(host_id) for host_id in self.host_ids]
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def _supervise(self):
+        while not self._stopped.wait(1):
+            for i, host in enumerate(self.hosts):
+                if host.poll() is not None:
+                    logger.error(f"Env host {self.host_ids[i]} exited; replacing it.")
+                    self.hosts[i] = self.spawn_host(self.host_ids[i])
+
+    def submit(
+        self,
+        env_uuid: str,
+        env_node_args: Dict[str, Any],
+        add_tick: bool = False,
+    ) -> HostedEnvSession:
+        """
+        Queue a session on the host of its shard.
+
+        Args:
+            env_uuid: Unique identifier for the environment
+            env_node_args: JSON-serializable keyword arguments of `TaskEnvNode`
+            add_tick: If True, the host also runs the tick node of the session
+
+        Returns:
+            Handle of the hosted session
+        """
+        shard = shard_for_session(env_uuid, self.size)
+        host_id = self.host_ids[shard]
+        self.r.delete(session_record_key(env_uuid))  # Record of a previous run
+        self.r.rpush(
+            session_queue_key(host_id),
+            json.dumps(
+                {"env_uuid": env_uuid, "env_node_args": env_node_args, "add_tick": add_tick}
+            ),
+        )
+        return HostedEnvSession(self.r, host_id, env_uuid, self.hosts[shard])
+
+    def shutdown(self):
+        """Stop the hosts; the sessions they still run are ended."""
+        self._stopped.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+        for host in self.hosts:
+            host.terminate()
+        for host in self.hosts:
+            host.wait()
+        for host_id in self.host_ids:
+            self.r.delete(session_queue_key(host_id), stop_queue_key(host_id))
+
+
+class EnvHost:
+    """
+    Runs the environment nodes of the sessions queued for one host.
+
+    Attributes:
+        host_id: Identifier of the host
+        redis_url: URL of the Redis server used by the nodes and the session queue
+        max_sessions: Number of sessions run at the same time
+        jupyter_pool_size: Number of idle Jupyter containers kept ready
+        jupyter_pool_dir: Directory of the volumes of the pooled containers
+        jupyter_dataset_dir: Directory of datasets mounted read-only in the pooled containers
+    """
+
+    def __init__(
+        self,
+        host_id: str,
+        redis_url: str,
+        max_sessions: int = 16,
+        jupyter_pool_size: int = 0,
+        jupyter_pool_dir: Optional[str] = None,
+        jupyter_dataset_dir: Optional[str] = None,
+    ):
+        self.host_id = host_id
+        self.redis_url = redis_url
+        self.max_sessions = max_sessions
+        self.jupyter_pool_size = jupyter_pool_size
+        self.jupyter_pool_dir = jupyter_pool_dir
+        self.jupyter_dataset_dir = jupyter_dataset_dir
+        self.sessions: Dict[str, asyncio.Task] = {}
+        self._stop_requested: set[str] = set()
+        self._slot_freed = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    async def run_session(self, request: Dict[str, Any]):
+        env_uuid = request["env_uuid"]
+        record_key = session_record_key(env_uuid)
+        returncode = 0
+        try:
+            # Building the environment node builds the environment, which may block (e.g.
+            # starting a Jupyter container), so the nodes are made in a worker thread.
+            loop = asyncio.get_running_loop()
+            make_env_node = loop.run_in_executor(
+                None,
+                functools.partial(
+                    NodeFactory.make,
+                    "task_env",
+                    **request["env_node_args"],
+                    env_uuid=env_uuid,
+                    redis_url=self.redis_url,
+                    shared_pubsub=self.shared_pubsub,
+                ),
+            )
+            try:
+                nodes = [await asyncio.shield(make_env_node)]
+            except asyncio.CancelledError:
+                # Stopped while the environment is built; close it once it is.
+                make_env_node.add_done_callback(
+                    lambda future: not future.cancelled()
+                    and future.exception() is None
+                    and loop.run_in_executor(None, future.result().env.close)
+                )
+                raise
+            if request["add_tick"]:
+                nodes.append(
+                    NodeFactory.make(
+                        "env_tick",
+                        env_uuid=env_uuid,
+                        redis_url=self.redis_url,
+                        shared_pubsub=self.shared_pubsub,
+                    )
+                )
+            await self.r.hset(record_key, mapping={"host": self.host_id, "pid": os.getpid()})
+            await self.r.expire(record_key, SESSION_RECORD_TTL)
+            for node in nodes:
+                await node.__aenter__()
+            try:
+                results = await asyncio.gather(
+                    *[node.event_loop() for node in nodes], return_exceptions=True
+                )
+            finally:
+                for node in reversed(nodes):
+                    await node.__aexit__(None, None, None)
+            # The nodes end their event loop by raising CancelledError once the task is over.
+            errors = [
+                result
+                for result in results
+                if isinstance(result, Exception)
+                and not isinstance(result, asyncio.CancelledError)
+            ]
+            for error in errors:
+                logger.error(f"Error in session {env_uuid}: {error!r}")
+            returncode = 1 if errors else 0
+        except asyncio.CancelledError:
+            returncode = -signal.SIGTERM
+        except Exception as e:
+            logger.error(f"Session {env_uuid} failed to start: {e!r}")
+            returncode = 1
+        finally:
+            await self.r.hset(record_key, "returncode", returncode)
+            await self.r.expire(record_key, SESSION_RECORD_TTL)
+            self.sessions.pop(env_uuid, None)
+            self._slot_freed.set()
+
+    async def listen_for_stop_requests(self):
+        while not self._stopping.is_set():
+            item = await self.r.blpop([stop_queue_key(self.host_id)], timeout=1)
+            if item is None:
+                continue
+            env_uuid = item[1].decode("utf-8")
+            if env_uuid in self.sessions:
+                self.sessions[env_uuid].cancel()
+            else:
+                self._stop_requested.add(env_uuid)  # Still queued
+
+    async def admit_sessions(self):
+        while not self._stopping.is_set():
+            if len(self.sessions) >= self.max_sessions:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+                continue
+            item = await self.r.blpop([session_queue_key(self.host_id)], timeout=1)
+            if item is None:
+                continue
+            request = json.loads(item[1])
+            env_uuid = request["env_uuid"]
+            if env_uuid in self._stop_requested:
+                self._stop_requested.discard(env_uuid)
+                await self.r.hset(
+                    session_record_key(env_uuid), "returncode", -signal.SIGTERM
+                )
+                continue
+            logger.info(
+                f"Env host {self.host_id} starting session {env_uuid} "
+                f"({len(self.sessions) + 1}/{self.max_sessions})."
+            )
+            self.sessions[env_uuid] = asyncio.create_task(self.run_session(request))
+
+    async def run(self):
+        mark_process_shared()
+        if self.jupyter_pool_size > 0:
+            start_jupyter_pool(
+                self.jupyter_pool_size,
+                pool_dir=self.jupyter_pool_dir,
+                dataset_dir=self.jupyter_dataset_dir,
+            )
+        self.r = redis.asyncio.Redis.from_url(self.redis_url)
+        self.shared_pubsub = (
+            SharedPubSub(self.r)
+            if get_transport_name() == PubSubTransport.name
+            else None
+        )
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self._stopping.set)
+        loop.add_signal_handler(signal.SIGINT, self._stopping.set)
+        workers = [
+            asyncio.create_task(self.admit_sessions()),
+            asyncio.create_task(self.listen_for_stop_requests()),
+        ]
+        await self._stopping.wait()
+        self._slot_freed.set()
+        await asyncio.gather(*workers)
+        sessions = list(self.sessions.values())
+        for session in sessions:
+            session.cancel()
+        await asyncio.gather(*sessions, return_exceptions=True)
+        if self.shared_pubsub is not None:
+            await self.shared_pubsub.close()
+        await self.r.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", type=str, default="redis://localhost:6379/0")
+    parser.add_argument("--host-id", type=str, required=True)
+    parser.add_argument("--max-sessions", type=int, default=16)
+    parser.add_argument("--jupyter-pool-size", type=int, default=0)
+    parser.add_argument("--jupyter-pool-dir", type=str, default=None)
+    parser.add_argument("--jupyter-dataset-dir", type=str, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(
+        EnvHost(
+            args.host_id,
+            args.redis_url,
+            args.max_sessions,
+            args.jupyter_pool_size,
+            args.jupyter_pool_dir,
+            args.jupyter_dataset_dir,
+        ).run()
+    )
@@ -1,8 +1,30 @@
 from .config import EnvConfig, EnvArgs
-from .literature_survey import CoLitSurveyEnv
 from .registry import EnvFactory
-from .tabular_analysis import CoAnalysisEnv
-from .travel_planning import CoTravelPlanningEnv
+
+# Environment modules pull in heavy dependencies (docker, dspy, knowledge_storm, pandas,
+# ...), so they are only imported when an environment of their kind is made.
+EnvFactory.register_lazy(
+    "tabular_analysis", "collaborative_gym.envs.tabular_analysis.CoAnalysisEnv"
+)
+EnvFactory.register_lazy(
+    "lit_survey", "collaborative_gym.envs.literature_survey.CoLitSurveyEnv"
+)
+EnvFactory.register_lazy(
+    "travel_planning", "collaborative_gym.envs.travel_planning.CoTravelPlanningEnv"
+)
+
+_ENV_CLASS_NAMES = {
+    "CoAnalysisEnv": "tabular_analysis",
+    "CoLitSurveyEnv": "lit_survey",
+    "CoTravelPlanningEnv": "travel_planning",
+}
+
+
+def __getattr__(name):
+    if name in _ENV_CLASS_NAMES:
+        return EnvFactory.get(_ENV_CLASS_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "CoAnalysisEnv",
@@ -683,7 +683,7 @@ class CoLitSurveyEnv(CoEnv):
     def close(self):
         pass
 
-    def get_obs(self):
+    def compute_obs(self):
         return {
             "public": {
                 "library": self.paper_library,
@@ -708,6 +708,7 @@ class CoLitSurveyEnv(CoEnv):
         self,
         options: dict[str, Any] | None = None,
     ):
+        self.invalidate_obs()
         self.paper_library = []
         self.paper_library_titles = set()
         self.search_window = {
@@ -748,6 +749,7 @@ class CoLitSurveyEnv(CoEnv):
         info["action"] = action_id
 
         # Execute the action
+        self.invalidate_obs()
         terminated = False
         reward = 0  # Set intermediate reward to 0 if the action is successful; otherwise, -1.
         info["action_error"] = None
@@ -1,3 +1,4 @@
+import importlib
 import logging
 from typing import Callable, List
 
@@ -11,12 +12,17 @@ class EnvFactory:
     Factory class for registering and creating CoEnv.
 
     It maintains a mapping between environment names and their corresponding classes.
+    Environments can also be registered by the dotted path of their class, in which case
+    their module (and its dependencies) is only imported when the environment is made.
 
     Attributes:
         registry: Dictionary mapping environment names to their CoEnv subclasses
+        lazy_registry: Dictionary mapping environment names to the dotted path of their
+            class, for environments whose module has not been imported yet
     """
 
     registry: dict[str, type[CoEnv]] = {}
+    lazy_registry: dict[str, str] = {}
 
     @classmethod
     def register(cls, name: str) -> Callable[[type[CoEnv]], type[CoEnv]]:
@@ -40,11 +46,43 @@ class EnvFactory:
         ) -> type[CoEnv]:
             if name in cls.registry:
                 logger.warning("Environment %s already exists. Will replace it", name)
+            cls.lazy_registry.pop(name, None)
             cls.registry[name] = wrapped_class
             return wrapped_class
 
         return inner_wrapper
 
+    @classmethod
+    def register_lazy(cls, name: str, class_path: str) -> None:
+        """
+        Register an environment by the dotted path of its class without importing it.
+
+        Args:
+            name: Unique identifier for the environment class
+            class_path: Dotted path of the class, e.g. "my_package.my_env.MyEnv"
+        """
+        if name in cls.registry or name in cls.lazy_registry:
+            logger.warning("Environment %s already exists. Will replace it", name)
+            cls.registry.pop(name, None)
+        cls.lazy_registry[name] = class_path
+
+    @classmethod
+    def get(cls, name: str) -> type[CoEnv]:
+        """
+        Get the class of a registered environment, importing its module if needed.
+
+        Raises:
+            ValueError: If the environment name is not found in the registry
+        """
+        if name not in cls.registry:
+            if name not in cls.lazy_registry:
+                raise ValueError(f"Environment {name} not found in registry")
+            module_name, _, class_name = cls.lazy_registry[name].rpartition(".")
+            module = importlib.import_module(module_name)
+            cls.lazy_registry.pop(name, None)
+            cls.registry[name] = getattr(module, class_name)
+        return cls.registry[name]
+
     @classmethod
     def make(cls, name: str, team_members: List[str], env_id: str, **kwargs) -> CoEnv:
         """
@@ -62,6 +100,4 @@ class EnvFactory:
         Raises:
             ValueError: If the environment name is not found in the registry
         """
-        if name not in cls.registry:
-            raise ValueError(f"Environment {name} not found in registry")
-        return cls.registry[name](team_members=team_members, env_id=env_id, **kwargs)
+        return cls.get(name)(team_members=team_members, env_id=env_id, **kwargs)
@@ -2,7 +2,6 @@ import json
 import os
 import random
 import re
-import shutil
 import time
 from enum import Enum
 from typing import Any, Dict, List, Optional
@@ -18,7 +17,8 @@ from collaborative_gym.spaces import (
     UnicodeWithRegexPattern,
 )
 from collaborative_gym.utils.code_executor import JupyterManager
-from collaborative_gym.utils.file_system import clear_directory
+from collaborative_gym.utils.file_system import clear_directory, stage_file
+from collaborative_gym.utils.jupyter_pool import get_jupyter_pool
 from collaborative_gym.utils.string import post_process_parsed_function_arg
 from collaborative_gym.utils.text_editor import TextEditor
 
@@ -134,10 +134,18 @@ class CoAnalysisEnv(CoEnv):
 
     ## Observation Space
     The observation is a dictionary containing:
-    - jupyter_history (non-private): History of executed code cells and their outputs
+    - jupyter_history (non-private): Executed code cells and their outputs, as a list of
+      cells ordered by id (see `collaborative_gym.utils.jupyter_history`)
     - result_editor (non-private): Current state of the analysis document
+
+    ## Partial Observations
+    While a cell runs, its output is emitted as partial observations of jupyter_history:
+    {"cell_id": ..., "code": ..., "output": ""} when it starts, then {"cell_id": ...,
+    "output": <chunk>} for each stdout/stderr or text output chunk.
     """
 
+    streams_partial_obs = True
+
     def __init__(
         self,
         team_members: List[str],
@@ -201,21 +209,8 @@ class CoAnalysisEnv(CoEnv):
         else:
             self.query = query
 
-        # Docker Jupyter sandbox for executing Python code
-        self.docker_volume_local_dir = os.path.join(docker_local_root_dir, self.env_id)
-        os.makedirs(self.docker_volume_local_dir, exist_ok=True)
-        self.jupyter_manager = JupyterManager(
-            custom_image_name=docker_image_name,
-            docker_volume_local_dir=self.docker_volume_local_dir,
-            timeout=60 * 30,  # set a long timeout
-        )
-        self.docker_volume_container_dir = self.jupyter_manager.docker_server.volumes[
-            self.docker_volume_local_dir
-        ]["bind"]
-
         # Task information
         self.dataset_local_paths = []
-        self.datasets = []
         if self.use_simulated_dataset:
             for d in self.discovery_bench_metadata["datasets"]:
                 self.dataset_local_paths.append(
@@ -225,9 +220,6 @@ class CoAnalysisEnv(CoEnv):
                         d["name"],
                     )
                 )
-                self.datasets.append(
-                    os.path.join(self.docker_volume_container_dir, d["name"])
-                )
 
             self.additional_task_info = {
                 "domain_knowledge": self.discovery_bench_metadata.get(
@@ -238,9 +230,36 @@ class CoAnalysisEnv(CoEnv):
         else:
             for f in csv_files:
                 self.dataset_local_paths.append(os.path.join(self.dataset_root_dir, f))
-                self.datasets.append(
-                    os.path.join(self.docker_volume_container_dir, f.split("/")[-1])
+
+        # Docker Jupyter sandbox for executing Python code
+        self.docker_volume_local_dir = os.path.join(docker_local_root_dir, self.env_id)
+        os.makedirs(self.docker_volume_local_dir, exist_ok=True)
+        dataset_dirs = {
+            os.path.abspath(os.path.dirname(p)) for p in self.dataset_local_paths
+        }
+        # Leased from the pool of pre-started containers of the process, if any, which
+        # mount the dataset directory of the pool; a container started for the session
+        # mounts the directory of its datasets.
+        self.jupyter_manager = JupyterManager(
+            custom_image_name=docker_image_name,
+            docker_volume_local_dir=self.docker_volume_local_dir,
+            dataset_local_dir=dataset_dirs.pop() if len(dataset_dirs) == 1 else None,
+            timeout=60 * 30,  # set a long timeout
+            jupyter_pool=get_jupyter_pool(docker_image_name),
+        )
+        self.docker_volume_container_dir = (
+            self.jupyter_manager.docker_volume_container_dir
+        )
+        # Datasets are read in place from the read-only dataset mount; those outside of it
+        # are staged in the volume on reset.
+        self.datasets = []
+        for local_path in self.dataset_local_paths:
+            self.datasets.append(
+                self.jupyter_manager.dataset_container_path(local_path)
+                or os.path.join(
+                    self.docker_volume_container_dir, os.path.basename(local_path)
                 )
+            )
 
         self.task_description = (
             "Your task is to analyze the provided tabular dataset(s):\n"
@@ -365,7 +384,16 @@ class CoAnalysisEnv(CoEnv):
 
     # Shared actions
     def _execute_jupyter_cell(self, code: str):
-        self.jupyter_manager.execute_python_code(code)
+        cell_id = self.jupyter_manager.next_cell_id
+        self.emit_partial_obs(
+            "jupyter_history", {"cell_id": cell_id, "code": code, "output": ""}
+        )
+        self.jupyter_manager.execute_python_code(
+            code,
+            on_output=lambda text: self.emit_partial_obs(
+                "jupyter_history", {"cell_id": cell_id, "output": text}
+            ),
+        )
 
     def _editor_update(self, text: str):
         self.result_editor.update_text(text)
@@ -373,10 +401,10 @@ class CoAnalysisEnv(CoEnv):
     def close(self):
         self.jupyter_manager.close()
 
-    def get_obs(self):
+    def compute_obs(self):
         obs = {
             "public": {
-                "jupyter_history": self.jupyter_manager.execution_history_to_str(),
+                "jupyter_history": self.jupyter_manager.get_cells(),
                 "result_editor": self.result_editor.get_text(),
             },
             "private": {team_member: {} for team_member in self.team_members},
@@ -395,16 +423,25 @@ class CoAnalysisEnv(CoEnv):
         self,
         options: dict[str, Any] | None = None,
     ):
+        self.invalidate_obs()
         clear_directory(self.docker_volume_local_dir)
-        # Mount the data
+        # Stage the datasets outside of the read-only dataset mount
+        staging_methods = []
         for local_path, container_path in zip(self.dataset_local_paths, self.datasets):
+            if not container_path.startswith(self.docker_volume_container_dir + "/"):
+                continue
             # Docker volume local dir will be mounted to the container dir.
-            shutil.copy(
-                local_path,
-                container_path.replace(
-                    self.docker_volume_container_dir, self.docker_volume_local_dir
-                ),
+            # Cloned rather than copied when possible (see `stage_file`).
+            staging_methods.append(
+                stage_file(
+                    local_path,
+                    container_path.replace(
+                        self.docker_volume_container_dir, self.docker_volume_local_dir
+                    ),
+                )
             )
+        if staging_methods:
+            logger.info(f"Staged datasets of {self.env_id}: {staging_methods}")
         # Initialize the Jupyter cells
         self.jupyter_manager.reset()
         obs = self.get_obs()
@@ -438,6 +475,7 @@ class CoAnalysisEnv(CoEnv):
         info["action"] = action_id
 
         # Execute the action
+        self.invalidate_obs()
         terminated = False
         reward = 0
         info["action_error"] = None
@@ -3,14 +3,18 @@
 import pandas as pd
 from pandas import DataFrame
 
-from collaborative_gym.envs.travel_planner.utils.func import extract_before_parenthesis
+from collaborative_gym.envs.travel_planner.utils.func import (
+    extract_before_parenthesis,
+    load_database_table,
+)
 
 
 class Accommodations:
     def __init__(self, path="../database/accommodations/clean_accommodations_2022.csv"):
         self.path = path
-        self.data = pd.read_csv(self.path).dropna()[
-            [
+        self.data = load_database_table(
+            self.path,
+            (
                 "NAME",
                 "price",
                 "room type",
@@ -19,8 +23,8 @@ class Accommodations:
                 "maximum occupancy",
                 "review rate number",
                 "city",
-            ]
-        ]
+            ),
+        )
 
     def load_db(self):
         self.data = pd.read_csv(self.path).dropna()
@@ -3,15 +3,19 @@
 import pandas as pd
 from pandas import DataFrame
 
-from collaborative_gym.envs.travel_planner.utils.func import extract_before_parenthesis
+from collaborative_gym.envs.travel_planner.utils.func import (
+    extract_before_parenthesis,
+    load_database_table,
+)
 
 
 class Attractions:
     def __init__(self, path="../database/attractions/attractions.csv"):
         self.path = path
-        self.data = pd.read_csv(self.path).dropna()[
-            ["Name", "Latitude", "Longitude", "Address", "Phone", "Website", "City"]
-        ]
+        self.data = load_database_table(
+            self.path,
+            ("Name", "Latitude", "Longitude", "Address", "Phone", "Website", "City"),
+        )
 
     def load_db(self):
         self.data = pd.read_csv(self.path)
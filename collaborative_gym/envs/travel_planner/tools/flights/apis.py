@@ -3,7 +3,10 @@
 import pandas as pd
 from pandas import DataFrame
 
-from collaborative_gym.envs.travel_planner.utils.func import extract_before_parenthesis
+from collaborative_gym.envs.travel_planner.utils.func import (
+    extract_before_parenthesis,
+    load_database_table,
+)
 
 
 class Flights:
@@ -12,8 +15,9 @@ class Flights:
         self.path = path
         self.data = None
 
-        self.data = pd.read_csv(self.path).dropna()[
-            [
+        self.data = load_database_table(
+            self.path,
+            (
                 "Flight Number",
                 "Price",
                 "DepTime",
@@ -23,8 +27,8 @@ class Flights:
                 "OriginCityName",
                 "DestCityName",
                 "Distance",
-            ]
-        ]
+            ),
+        )
 
     def load_db(self):
         self.data = (
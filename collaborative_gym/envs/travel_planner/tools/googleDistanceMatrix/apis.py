@@ -3,11 +3,13 @@
 import time
 
 import numpy as np
-import pandas as pd
 import requests
 from requests.exceptions import SSLError
 
-from collaborative_gym.envs.travel_planner.utils.func import extract_before_parenthesis
+from collaborative_gym.envs.travel_planner.utils.func import (
+    extract_before_parenthesis,
+    load_database_table,
+)
 
 
 # This tool refers to the "DistanceMatrix" in the paper. Considering this data obtained from Google API, we consistently use this name in the code.
@@ -21,7 +23,7 @@ class GoogleDistanceMatrix:
         subscription_key: str = "",
     ) -> None:
         self.gplaces_api_key: str = subscription_key
-        self.data = pd.read_csv(path)
+        self.data = load_database_table(path, dropna=False)
 
     def run(self, origin, destination, mode="driving"):
         origin = extract_before_parenthesis(origin)
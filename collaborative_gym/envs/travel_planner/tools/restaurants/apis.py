@@ -3,15 +3,18 @@
 import pandas as pd
 from pandas import DataFrame
 
-from collaborative_gym.envs.travel_planner.utils.func import extract_before_parenthesis
+from collaborative_gym.envs.travel_planner.utils.func import (
+    extract_before_parenthesis,
+    load_database_table,
+)
 
 
 class Restaurants:
     def __init__(self, path="../database/restaurants/clean_restaurant_2022.csv"):
         self.path = path
-        self.data = pd.read_csv(self.path).dropna()[
-            ["Name", "Average Cost", "Cuisines", "Aggregate Rating", "City"]
-        ]
+        self.data = load_database_table(
+            self.path, ("Name", "Average Cost", "Cuisines", "Aggregate Rating", "City")
+        )
 
     def load_db(self):
         self.data = pd.read_csv(self.path).dropna()
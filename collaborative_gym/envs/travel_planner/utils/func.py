@@ -2,6 +2,35 @@
 
 import os
 import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import pandas as pd
+
+
+def load_database_table(
+    path: str, columns: Optional[Tuple[str, ...]] = None, dropna: bool = True
+) -> pd.DataFrame:
+    """
+    Read a TravelPlanner CSV once per process.
+
+    The environment and both evaluators of every session query the same databases, so the
+    tables are shared instead of being read again for each of them. Callers must treat the
+    returned frame as read-only.
+    """
+    return _load_database_table(os.path.abspath(path), columns, dropna)
+
+
+@lru_cache(maxsize=None)
+def _load_database_table(
+    path: str, columns: Optional[Tuple[str, ...]], dropna: bool
+) -> pd.DataFrame:
+    data = pd.read_csv(path)
+    if dropna:
+        data = data.dropna()
+    if columns is not None:
+        data = data[list(columns)]
+    return data
 
 
 def get_valid_name_city(info):
@@ -21,6 +21,7 @@ from collaborative_gym.envs.travel_planner.tools import (
     Attractions,
     GoogleDistanceMatrix,
 )
+from collaborative_gym.envs.travel_planner.utils.func import load_database_table
 from collaborative_gym.spaces import (
     MultiSpace,
     MAX_UNICODE_LENGTH,
@@ -94,7 +95,9 @@ class CoTravelPlanningEnv(CoEnv):
 
         if self.use_simulated_dataset:
             self.travel_planner_data_point_idx = travel_planner_data_point_idx
-            travel_planner_validation_set = pd.read_csv(travel_planner_data_path)
+            travel_planner_validation_set = load_database_table(
+                travel_planner_data_path, dropna=False
+            )
             query_template = "Help me plan a {days}-day trip from {org} to {dest} starting on {start_date}."
             self.query = query_template.format(
                 days=travel_planner_validation_set.iloc[travel_planner_data_point_idx][
@@ -547,7 +550,7 @@ class CoTravelPlanningEnv(CoEnv):
     def close(self):
         pass
 
-    def get_obs(self):
+    def compute_obs(self):
         return {
             "public": {
                 "travel_plan_editor": self.travel_plan_editor.get_text(),
@@ -572,6 +575,7 @@ class CoTravelPlanningEnv(CoEnv):
         self,
         options: dict[str, Any] | None = None,
     ):
+        self.invalidate_obs()
         self.travel_plan_editor.update_text("")
         self.search_output = {team_member: {} for team_member in self.team_members}
         self.distance_matrix_output = {
@@ -611,6 +615,7 @@ class CoTravelPlanningEnv(CoEnv):
         info["action"] = action_id
 
         # Execute the action
+        self.invalidate_obs()
         terminated = False
         reward = 0  # Set intermediate reward to 0 if the action is successful; otherwise, -1.
         info["action_error"] = None
@@ -9,6 +9,7 @@ from knowledge_storm import TogetherClient
 from tqdm import tqdm
 
 from collaborative_gym.core import SendTeammateMessage
+from collaborative_gym.utils.event_log import load_event_log
 from collaborative_gym.utils.utils import load_api_key
 
 
@@ -199,10 +200,9 @@ if __name__ == "__main__":
     for d in tqdm(os.listdir(args.result_dir)):
         if os.path.isdir(os.path.join(args.result_dir, d)):
             if os.path.exists(os.path.join(args.result_dir, d, "event_log.jsonl")):
-                event_log = []
-                with open(os.path.join(args.result_dir, d, "event_log.jsonl")) as f:
-                    for line in f:
-                        event_log.append(json.loads(line))
+                event_log = load_event_log(
+                    os.path.join(args.result_dir, d, "event_log.jsonl")
+                )
             else:
                 print(f"Event log not found for {d}")
                 continue
@@ -0,0 +1,230 @@
+"""
+Run all nodes of a simulated session in a single process.
+
+Team members are described by the same `start_node_base_command` as for `Runner`. Instead
+of spawning the command, its module is executed in this process to collect the node
+configuration it would have launched with aact, and all nodes of the session then exchange
+messages through the in-memory transport. This removes process startup, Redis round trips
+and message encoding from the simulation loop, and does not need a Redis server.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import runpy
+import sys
+import threading
+import uuid
+from contextlib import AsyncExitStack, contextmanager
+from typing import Iterator, List
+
+import toml
+from aact import NodeFactory
+from aact.cli.launch import launch
+from aact.cli.reader import NodeConfig
+from aact.cli.reader.dataflow_reader import NodeArgs
+
+from collaborative_gym.core import TeamMemberConfig
+from collaborative_gym.envs import EnvConfig
+from collaborative_gym.nodes.transports import InMemoryTransport, TRANSPORT_ENV_VAR
+from collaborative_gym.runner import Runner, split_module_command
+
+logger = logging.getLogger(__name__)
+
+# Serializes the patching of process-wide state (sys.argv, aact's launcher, the transport
+# environment variable) when sessions are started from several threads.
+_global_state_lock = threading.Lock()
+
+
+@contextmanager
+def _capture_node_configs() -> Iterator[List[NodeConfig]]:
+    """Collect the node configurations passed to aact's `_sync_run_node` instead of running them."""
+    captured: List[NodeConfig] = []
+    original = launch._sync_run_node
+
+    def capture(node_config: NodeConfig, redis_url: str):
+        captured.append(node_config)
+
+    launch._sync_run_node = capture
+    try:
+        yield captured
+    finally:
+        launch._sync_run_node = original
+
+
+def node_config_from_command(command: str) -> NodeConfig:
+    """
+    Get the configuration of the node a `python -m <module> ...` command would launch.
+
+    Args:
+        command: Command starting a node through aact's `_sync_run_node`
+
+    Returns:
+        The node configuration
+    """
+    module_command = split_module_command(command)
+    if module_command is None:
+        raise ValueError(
+            f"Only `python -m <module> ...` commands can run in process: {command!r}"
+        )
+    module, args = module_command
+    with _global_state_lock:
+        saved_argv = sys.argv
+        sys.argv = [module, *args]
+        try:
+            with _capture_node_configs() as captured:
+                try:
+                    runpy.run_module(module, run_name="__main__", alter_sys=True)
+                except SystemExit as e:  # Typer apps exit once the command returns
+                    if e.code not in (0, None):
+                        raise
+        finally:
+            sys.argv = saved_argv
+    if len(captured) != 1:
+        raise ValueError(f"{command!r} did not launch exactly one node.")
+    return captured[0]
+
+
+class InProcessRunner(Runner):
+    """
+    Runner executing every node of a session as a coroutine of the current process.
+
+    `start_session` blocks until the session ends. GUI users are not supported since
+    their nodes live in the server process.
+    """
+
+    def make_session_node_configs(
+        self,
+        session_uuid: str,
+        env_config_path: str,
+        members: List[TeamMemberConfig],
+        max_steps: int,
+        disable_collaboration: bool = False,
+        add_tick: bool = False,
+        tick_interval: float = 60,
+        max_tick_cnt: int = 5,
+    ) -> List[NodeConfig]:
+        """Node configurations of a session: team members first, then the environment (and tick) node."""
+        env_uuid = f"env_{session_uuid}"
+        node_configs = []
+        for member in members:
+            if member.type == "gui_user":
+                raise ValueError("GUI users cannot take part in in-process sessions.")
+            node_configs.append(
+                node_config_from_command(self.get_team_member_command(env_uuid, member))
+            )
+        node_configs.append(
+            NodeConfig(
+                node_name="task_env",
+                node_class="task_env",
+                node_args=NodeArgs(
+                    env_config=EnvConfig(**toml.load(env_config_path)),
+                    env_uuid=env_uuid,
+                    team_members=[member.name for member in members],
+                    disable_collaboration=disable_collaboration,
+                    max_steps=max_steps,
+                    tick_interval=tick_interval,
+                    max_tick_cnt=max_tick_cnt,
+                    result_dir=self.result_dir,
+                ),
+            )
+        )
+        if add_tick:
+            node_configs.append(
+                NodeConfig(
+                    node_name="task_env_tick",
+                    node_class="env_tick",
+                    node_args=NodeArgs(env_uuid=env_uuid),
+                )
+            )
+        return node_configs
+
+    async def run_session(self, node_configs: List[NodeConfig]):
+        """Run the nodes of a session until all of them have exited."""
+        with _global_state_lock:
+            saved_transport = os.environ.get(TRANSPORT_ENV_VAR)
+            os.environ[TRANSPORT_ENV_VAR] = InMemoryTransport.name
+            try:
+                nodes = [
+                    NodeFactory.make(
+                        node_config.node_class,
+                        **node_config.node_args.model_dump(),
+                        redis_url=self.redis_url,
+                    )
+                    for node_config in node_configs
+                ]
+            finally:
+                if saved_transport is None:
+                    os.environ.pop(TRANSPORT_ENV_VAR)
+                else:
+                    os.environ[TRANSPORT_ENV_VAR] = saved_transport
+
+        async with AsyncExitStack() as stack:
+            # Every node subscribes before any event loop starts, so nothing is missed.
+            for node in nodes:
+                await stack.enter_async_context(node)
+            results = await asyncio.gather(
+                *[node.event_loop() for node in nodes], return_exceptions=True
+            )
+        for node_config, result in zip(node_configs, results):
+            if isinstance(result, Exception) and not isinstance(
+                result, asyncio.CancelledError
+            ):
+                logger.error(f"Error in node {node_config.node_name}: {result}")
+
+    def start_session(
+        self,
+        session_uuid: str,
+        env_config_path: str,
+        members: List[TeamMemberConfig],
+        max_steps: int,
+        disable_collaboration: bool = False,
+        add_tick: bool = False,
+        tick_interval: float = 60,
+        max_tick_cnt: int = 5,
+    ):
+        """Run a session to completion. See `Runner.start_session` for the arguments."""
+        if session_uuid in self.sessions:
+            print(f"Session {session_uuid} already started")
+            return
+        self.sessions.append(session_uuid)
+        node_configs = self.make_session_node_configs(
+            session_uuid=session_uuid,
+            env_config_path=env_config_path,
+            members=members,
+            max_steps=max_steps,
+            disable_collaboration=disable_collaboration,
+            add_tick=add_tick,
+            tick_interval=tick_interval,
+            max_tick_cnt=max_tick_cnt,
+        )
+        asyncio.run(self.run_session(node_configs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--env-config-path", type=str, required=True)
+    parser.add_argument("--team-member-config-path", type=str, required=True)
+    parser.add_argument("--disable-collaboration", action="store_true")
+    parser.add_argument("--add-tick", action="store_true")
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--result-dir", type=str, default="./workdir/results")
+    parser.add_argument("--secret-path", type=str, default="secrets.toml")
+    args = parser.parse_args()
+
+    secrets = toml.load(args.secret_path)
+    for k in secrets:
+        os.environ[k] = secrets[k]
+
+    team_member_config = toml.load(args.team_member_config_path)
+    InProcessRunner(result_dir=args.result_dir).start_session(
+        session_uuid=str(uuid.uuid4()),
+        env_config_path=args.env_config_path,
+        members=[
+            TeamMemberConfig(**member) for member in team_member_config["team_member"]
+        ],
+        max_steps=args.max_steps,
+        disable_collaboration=args.disable_collaboration,
+        add_tick=args.add_tick,
+    )
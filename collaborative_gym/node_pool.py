@@ -0,0 +1,333 @@
+"""
+Pool of pre-warmed worker processes starting nodes for the Runner.
+
+Starting a node with `python -m ...` re-imports dspy, litellm, pandas, docker, etc. for every
+session, which takes seconds of CPU. Workers of the pool import these modules once, then
+wait for node commands on a Redis list. For each command, a worker forks a child that runs
+the command's module as `__main__` with the command's arguments, so the node starts from
+the warm interpreter (copy-on-write) while staying isolated from other sessions. Commands
+that do not run a Python module are executed with the shell instead.
+
+Forking a process that runs other threads can deadlock the child on a lock held by one of
+them, so a worker only forks while it has no threads besides the main one (and allocator
+threads that handle fork, see `FORK_SAFE_THREAD_NAMES`). If a preloaded module started
+threads, the worker starts nodes as new processes instead, like the Runner without a pool.
+Only modules that do not start threads on import should be preloaded.
+
+After `max_jobs` commands, a worker stops taking jobs and is replaced by a fresh one; it
+keeps waiting for the nodes it started and records their return codes before exiting.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import runpy
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from typing import Dict, List, Optional
+
+import redis
+
+from collaborative_gym.runner import logger, split_module_command
+
+NODE_POOL_KEY_PREFIX = "node_pool:"
+JOB_KEY_TTL = 24 * 3600
+# Jobs not picked up within this time (e.g. submitted while no worker was alive) are dropped.
+JOB_MAX_QUEUE_TIME = 60
+# Environment modules are registered lazily in EnvFactory, so they are listed explicitly.
+DEFAULT_PRELOAD_MODULES = [
+    "collaborative_gym.command",
+    "collaborative_gym.envs.literature_survey",
+    "collaborative_gym.envs.tabular_analysis",
+    "collaborative_gym.envs.travel_planning",
+    "knowledge_storm",
+]
+# Background threads that register fork handlers, so forking while they run is safe.
+# jemalloc (used by pyarrow) starts one on import.
+FORK_SAFE_THREAD_NAMES = {"jemalloc_bg_thd"}
+
+
+def job_key(job_id: str) -> str:
+    """Redis hash recording the pid and return code of the node started for a job."""
+    return f"{NODE_POOL_KEY_PREFIX}job:{job_id}"
+
+
+def draining_key(queue_key: str) -> str:
+    """Redis set of the pids of workers that stopped taking jobs of a queue."""
+    return f"{queue_key}:draining"
+
+
+def fork_unsafe_threads() -> List[str]:
+    """Names of the threads of the process, other than the main one, that make forking unsafe."""
+    try:
+        # Also lists native threads (e.g. started by torch) that `threading` does not know.
+        names = []
+        for tid in os.listdir("/proc/self/task"):
+            if int(tid) != os.getpid():
+                with open(f"/proc/self/task/{tid}/comm") as f:
+                    names.append(f.read().strip())
+    except OSError:
+        names = [t.name for t in threading.enumerate() if t is not threading.main_thread()]
+    return [name for name in names if name not in FORK_SAFE_THREAD_NAMES]
+
+
+class PooledProcess:
+    """
+    Handle of a node started by a pool worker, mimicking the parts of `Popen` the Runner uses.
+
+    The node runs in its own session (process group), so `os.killpg(os.getpgid(pid), ...)`
+    terminates it like a node started with `Popen(..., preexec_fn=os.setsid)`.
+    """
+
+    def __init__(self, r: redis.Redis, job_id: str, start_timeout: float = 30):
+        self.r = r
+        self.job_id = job_id
+        self.start_timeout = start_timeout
+        self._pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+
+    @property
+    def pid(self) -> int:
+        """Pid of the node; waits for a worker to pick up the job."""
+        deadline = time.time() + self.start_timeout
+        while self._pid is None:
+            pid = self.r.hget(job_key(self.job_id), "pid")
+            if pid is not None:
+                self._pid = int(pid)
+            elif time.time() > deadline:
+                raise TimeoutError(f"No pool worker picked up job {self.job_id}.")
+            else:
+                time.sleep(0.05)
+        return self._pid
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is not None:
+            return self.returncode
+        record = self.r.hgetall(job_key(self.job_id))
+        if b"returncode" in record:
+            self.returncode = int(record[b"returncode"])
+        elif b"pid" in record:
+            try:
+                os.kill(int(record[b"pid"]), 0)
+            except ProcessLookupError:
+                # Its worker died before reaping it, so the status is unknown.
+                self.returncode = -1
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.time() > deadline:
+                raise subprocess.TimeoutExpired(self.job_id, timeout)
+            time.sleep(0.2)
+        return self.returncode
+
+
+class NodeWorkerPool:
+    """
+    Supervises a fixed number of worker processes and hands node commands to them.
+
+    Attributes:
+        size: Number of worker processes kept alive
+        redis_url: URL of the Redis server holding the job queue
+        preload_modules: Modules imported by workers before accepting jobs
+        max_jobs_per_worker: Number of jobs after which a worker is recycled
+        queue_key: Redis list the jobs of this pool are pushed to
+        workers: Worker processes
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        redis_url: str = "redis://localhost:6379/0",
+        preload_modules: Optional[List[str]] = None,
+        max_jobs_per_worker: int = 50,
+    ):
+        self.size = size
+        self.redis_url = redis_url
+        self.preload_modules = (
+            DEFAULT_PRELOAD_MODULES if preload_modules is None else preload_modules
+        )
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.queue_key = f"{NODE_POOL_KEY_PREFIX}{uuid.uuid4().hex}:jobs"
+        self.r = redis.Redis.from_url(redis_url)
+        self.workers: List[subprocess.Popen] = []
+        # Recycled workers waiting for the nodes they started
+        self.draining_workers: List[subprocess.Popen] = []
+        self._stopped = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+    def spawn_worker(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "collaborative_gym.node_pool",
+                "--redis-url",
+                self.redis_url,
+                "--queue-key",
+                self.queue_key,
+                "--max-jobs",
+                str(self.max_jobs_per_worker),
+                "--preload",
+                *self.preload_modules,
+            ]
+        )
+
+    def start(self):
+        self.workers = [self.spawn_worker() for _ in range(self.size)]
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def _supervise(self):
+        while not self._stopped.wait(1):
+            draining = {int(pid) for pid in self.r.smembers(draining_key(self.queue_key))}
+            for i, worker in enumerate(self.workers):
+                if worker.poll() is not None:
+                    logger.info(f"Node pool worker {worker.pid} exited; replacing it.")
+                    self.workers[i] = self.spawn_worker()
+                elif worker.pid in draining:
+                    logger.info(f"Node pool worker {worker.pid} was recycled; replacing it.")
+                    self.draining_workers.append(worker)
+                    self.workers[i] = self.spawn_worker()
+            self.draining_workers = [
+                worker for worker in self.draining_workers if worker.poll() is None
+            ]
+
+    def submit(self, command: str) -> PooledProcess:
+        """Queue a node command; returns a handle of the node a worker will start."""
+        job_id = uuid.uuid4().hex
+        self.r.rpush(
+            self.queue_key,
+            json.dumps(
+                {"job_id": job_id, "command": command, "submitted_at": time.time()}
+            ),
+        )
+        return PooledProcess(self.r, job_id)
+
+    def shutdown(self):
+        """Stop the workers. Nodes they started keep running until the Runner stops them."""
+        self._stopped.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+        for worker in self.workers + self.draining_workers:
+            worker.terminate()
+        for worker in self.workers + self.draining_workers:
+            worker.wait()
+        self.r.delete(self.queue_key, draining_key(self.queue_key))
+
+
+def start_job(command: str) -> int:
+    """Start a node command with the shell in a new session, without forking; returns its pid."""
+    # No Popen handle, so that only reap_children collects the exit status.
+    return os.posix_spawn(
+        "/bin/sh", ["/bin/sh", "-c", command], dict(os.environ), setsid=True
+    )
+
+
+def run_job(command: str):
+    """Body of the forked child: run the node command and exit."""
+    os.setsid()  # Own process group, like Popen(..., preexec_fn=os.setsid)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        module_command = split_module_command(command)
+        if module_command is None:
+            exit_code = subprocess.call(command, shell=True)
+        else:
+            module, args = module_command
+            sys.argv = [module, *args]
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+
+def reap_children(r: redis.Redis, children: Dict[int, str]):
+    """Record the return code of finished children."""
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            return
+        job_id = children.pop(pid, None)
+        if job_id is not None:
+            r.hset(job_key(job_id), "returncode", os.waitstatus_to_exitcode(status))
+
+
+def run_worker(redis_url: str, queue_key: str, preload_modules: List[str], max_jobs: int):
+    for module in preload_modules:
+        importlib.import_module(module)
+    r = redis.Redis.from_url(redis_url)
+    children: Dict[int, str] = {}
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    jobs = 0
+    warned_threads = False
+    while jobs < max_jobs and not stopping:
+        reap_children(r, children)
+        item = r.blpop([queue_key], timeout=1)
+        if item is None:
+            continue
+        job = json.loads(item[1])
+        if time.time() - job["submitted_at"] > JOB_MAX_QUEUE_TIME:
+            logger.warning(f"Dropping stale node pool job: {job['command']}")
+            continue
+        unsafe_threads = fork_unsafe_threads()
+        if unsafe_threads:
+            if not warned_threads:
+                logger.warning(
+                    f"Node pool worker {os.getpid()} runs threads {unsafe_threads}; starting "
+                    "nodes as new processes instead of forking. Preload fewer modules."
+                )
+                warned_threads = True
+            pid = start_job(job["command"])
+        else:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                run_job(job["command"])
+        children[pid] = job["job_id"]
+        r.hset(job_key(job["job_id"]), "pid", pid)
+        r.expire(job_key(job["job_id"]), JOB_KEY_TTL)
+        jobs += 1
+    if stopping:
+        # Nodes still running keep running; PooledProcess notices their exit from their pid.
+        reap_children(r, children)
+        return
+    # Recycled: the pool starts a replacement while this worker waits for its nodes.
+    r.sadd(draining_key(queue_key), os.getpid())
+    while children and not stopping:
+        reap_children(r, children)
+        time.sleep(1)
+    r.srem(draining_key(queue_key), os.getpid())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", type=str, default="redis://localhost:6379/0")
+    parser.add_argument("--queue-key", type=str, required=True)
+    parser.add_argument("--max-jobs", type=int, default=50)
+    parser.add_argument("--preload", type=str, nargs="*", default=DEFAULT_PRELOAD_MODULES)
+    args = parser.parse_args()
+
+    run_worker(args.redis_url, args.queue_key, args.preload, args.max_jobs)
@@ -6,6 +6,11 @@ from aact import NodeFactory, Message
 from collaborative_gym.core import logger
 from collaborative_gym.nodes.base_node import BaseNode
 from collaborative_gym.nodes.commons import JsonObj
+from collaborative_gym.nodes.observation_sync import (
+    ObservationReceiver,
+    expects_observation_reply,
+    receive_observation,
+)
 
 AGENT_TO_PID_KEY = "agent_to_pid"
 
@@ -36,9 +41,13 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
         node_name: Name of this agent node
         wait_time: Delay in seconds between receiving observation and sending action
         agent: The AI agent instance that generates actions
+        observation_receiver: Rebuilds full observations from versioned deltas
         tasks: List of concurrent observation processing tasks
         is_processing_observation: Flag to prevent concurrent observation processing
         is_processing_observation_lock: AsyncIO lock for observation processing
+        pending_observation: Latest observation received while processing another one, handled
+            once that one is done (older pending observations are superseded by it, and all of
+            them by the reply to an environment action published in the meantime)
     """
 
     def __init__(
@@ -55,7 +64,10 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
                 (f"{env_uuid}/start", JsonObj),
                 (f"{env_uuid}/end", JsonObj),
             ],
-            output_channel_types=[(f"{env_uuid}/step", JsonObj)],
+            output_channel_types=[
+                (f"{env_uuid}/step", JsonObj),
+                (f"{env_uuid}/{node_name}/observation_ack", JsonObj),
+            ],
             redis_url=redis_url,
         )
         self.env_uuid = env_uuid
@@ -63,20 +75,25 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
         self.wait_time = wait_time
         self.agent = agent
 
+        self.observation_receiver = ObservationReceiver()
+
         self.tasks = []
         self.is_processing_observation = False
         self.is_processing_observation_lock = asyncio.Lock()
+        self.pending_observation: Message[JsonObj] | None = None
 
     async def __aenter__(self) -> Self:
         await super().__aenter__()
-        await self.r.hset(
-            AGENT_TO_PID_KEY, f"{self.env_uuid}_{self.node_name}", self.pid
-        )
+        if self.uses_redis:
+            await self.r.hset(
+                AGENT_TO_PID_KEY, f"{self.env_uuid}_{self.node_name}", self.pid
+            )
         return self
 
     async def delete_process_record(self):
         await super().delete_process_record()
-        await self.r.hdel(AGENT_TO_PID_KEY, f"{self.env_uuid}_{self.node_name}")
+        if self.uses_redis:
+            await self.r.hdel(AGENT_TO_PID_KEY, f"{self.env_uuid}_{self.node_name}")
 
     async def event_loop(self) -> None:
         """
@@ -93,13 +110,23 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
         self.tasks = []
         async for input_channel, input_message in self._wait_for_input():
             if input_channel == f"{self.env_uuid}/{self.node_name}/observation":
+                # Apply every observation delta, even if the observation is superseded below
+                input_message = await receive_observation(
+                    publish=self.publish,
+                    receiver=self.observation_receiver,
+                    ack_channel=f"{self.env_uuid}/{self.node_name}/observation_ack",
+                    input_message=input_message,
+                )
+                if input_message is None:
+                    continue
                 async with self.is_processing_observation_lock:
                     if self.is_processing_observation:
+                        self.pending_observation = input_message
                         continue
                     self.is_processing_observation = True
                 # Run the event handler in a separate task
                 task = asyncio.create_task(
-                    self.handle_event(input_channel, input_message)
+                    self.process_observations(input_channel, input_message)
                 )
                 self.tasks.append(task)
             else:
@@ -107,6 +134,31 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
 
         await asyncio.gather(*self.tasks)
 
+    async def process_observations(
+        self, input_channel: str, input_message: Message[JsonObj]
+    ):
+        """
+        Handle an observation, then the latest one received in the meantime, until none is
+        pending.
+
+        Observations received before the node publishes an action the environment replies
+        to (see `expects_observation_reply`) are discarded: they lack the effect of that
+        action, and the reply replaces them.
+        """
+        while input_message is not None:
+            async for output_channel, output_message in self.event_handler(
+                input_channel, input_message
+            ):
+                if output_channel == f"{self.env_uuid}/step" and expects_observation_reply(
+                    output_message.data.object["action"]
+                ):
+                    async with self.is_processing_observation_lock:
+                        self.pending_observation = None
+                await self.publish(output_channel, output_message)
+            async with self.is_processing_observation_lock:
+                input_message, self.pending_observation = self.pending_observation, None
+                self.is_processing_observation = input_message is not None
+
     async def handle_event(self, input_channel: str, input_message: Message[JsonObj]):
         """
         Process a single event and publish any resulting messages.
@@ -121,7 +173,7 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
         async for output_channel, output_message in self.event_handler(
             input_channel, input_message
         ):
-            await self.r.publish(output_channel, output_message.model_dump_json())
+            await self.publish(output_channel, output_message)
 
     async def event_handler(
         self, input_channel: str, input_message: Message[JsonObj]
@@ -169,8 +221,6 @@ class AgentNode(BaseNode[JsonObj, JsonObj]):
             yield f"{self.env_uuid}/step", Message[JsonObj](
                 data=JsonObj(object=payload)
             )
-            async with self.is_processing_observation_lock:
-                self.is_processing_observation = False
         elif input_channel == f"{self.env_uuid}/end":
             logger.info(f"AgentNode ({self.node_name}): received end message")
             self.agent.end(result_dir=input_message.data.object["result_dir"])
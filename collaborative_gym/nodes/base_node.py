@@ -8,6 +8,7 @@ import os
 import sys
 import time
 from asyncio import CancelledError
+from fnmatch import fnmatchcase
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -22,10 +23,46 @@ from redis.asyncio import Redis
 
 from aact.messages.base import DataModel
 
+from collaborative_gym.core import logger
+from collaborative_gym.nodes.commons import JsonObj, PreEncodedMessage, content_hash
+from collaborative_gym.nodes.codecs import (
+    DEFAULT_CODEC,
+    MessageCodec,
+    detect_codec,
+    get_codec,
+)
+from collaborative_gym.nodes.compression import (
+    CompressionStats,
+    compress_frame,
+    decompress_frame,
+    get_compressor,
+)
+from collaborative_gym.nodes.heartbeat import Heartbeat, get_heartbeat
+from collaborative_gym.nodes.tracing import (
+    CURRENT_SPAN,
+    LatencyRecorder,
+    make_trace_context,
+    start_span,
+)
+from collaborative_gym.nodes.transports import (
+    SharedPubSub,
+    SharedPubSubTransport,
+    Transport,
+    get_transport_name,
+    make_transport,
+)
+
 InputType = TypeVar("InputType", covariant=True, bound=DataModel)
 OutputType = TypeVar("OutputType", covariant=True, bound=DataModel)
 
-LAST_ACTIVE_TIME_KEY = "pid_to_last_active_time"
+
+READY_KEY_PREFIX = "ready:"
+READY_KEY_TTL = 3600
+
+
+def readiness_key(session_id: str) -> str:
+    """Redis list on which the nodes of a session push their name once subscribed."""
+    return f"{READY_KEY_PREFIX}{session_id}"
 
 
 class NodeExitSignal(CancelledError):
@@ -42,7 +79,7 @@ class BaseNode(BaseModel, Generic[InputType, OutputType]):
     """
     Base class for asynchronous communication nodes in the collaborative environment.
 
-    This class implements Redis pub/sub based message handling, allowing nodes to
+    This class implements Redis based message handling (pub/sub or streams), allowing nodes to
     communicate asynchronously through typed channels. Each node can subscribe to
     multiple input channels and publish to multiple output channels.
 
@@ -54,15 +91,43 @@ class BaseNode(BaseModel, Generic[InputType, OutputType]):
         input_channel_types: Mapping of channel names to their input message types
         output_channel_types: Mapping of channel names to their output message types
         redis_url: URL for Redis connection (default: "redis://localhost:6379/0")
+        codec: Name of the wire codec used for channels without an entry in channel_codecs
+        channel_codecs: Mapping of channel names or fnmatch patterns to codec names
+        compression: Name of the compressor for large outgoing frames
+        compression_threshold: Minimum encoded size in bytes to compress a frame (None disables compression)
+        compression_stats: Counters of compressed frames and bytes saved, logged on exit
+        transport: Name of the channel transport (defaults to the deployment's, see
+            `collaborative_gym.nodes.transports`)
+        stream_maxlen: Approximate maximum length of each channel stream (streams transport only)
+        shared_pubsub: Process-wide pub/sub connection subscribed through instead of a connection
+            of the node's own; its Redis client (and connection pool) is used for everything else
+
+    Outgoing messages are encoded with the codec of their channel. Incoming frames are
+    self-describing and decoded with whichever codec produced them; JSON frames use the
+    channel's codec if it is a JSON codec so that a faster JSON backend is also used
+    for decoding. Compressed frames are recognized by their envelope flag and
+    decompressed first, so compression is transparent to event handlers.
+
+    Published `JsonObj` messages are stamped with a trace context, and received ones
+    become the current span of the handling task (see `collaborative_gym.nodes.tracing`).
+    Nodes with a `latency_recorder` aggregate the latency of each message they handle.
 
     The node maintains its active status through Redis, allowing central monitoring
-    and management of node processes. Subclasses must implement event_handler to
+    and management of node processes. Activity is recorded in memory and flushed
+    periodically by the heartbeat of the process (see
+    `collaborative_gym.nodes.heartbeat`). Subclasses must implement event_handler to
     define custom behavior for received messages.
     """
 
     input_channel_types: dict[str, Type[InputType]]
     output_channel_types: dict[str, Type[OutputType]]
     redis_url: str
+    codec: str = DEFAULT_CODEC
+    channel_codecs: dict[str, str] = {}
+    compression: str = "zlib"
+    compression_threshold: int | None = 64 * 1024
+    transport: str = "pubsub"
+    stream_maxlen: int = 1000
     model_config = ConfigDict(extra="allow")
 
     def __init__(
@@ -70,47 +135,208 @@ class BaseNode(BaseModel, Generic[InputType, OutputType]):
         input_channel_types: list[tuple[str, Type[InputType]]],
         output_channel_types: list[tuple[str, Type[OutputType]]],
         redis_url: str = "redis://localhost:6379/0",
+        codec: str = DEFAULT_CODEC,
+        channel_codecs: dict[str, str] | None = None,
+        compression: str = "zlib",
+        compression_threshold: int | None = 64 * 1024,
+        transport: str | None = None,
+        stream_maxlen: int = 1000,
+        shared_pubsub: SharedPubSub | None = None,
     ):
         super().__init__(
             input_channel_types=dict(input_channel_types),
             output_channel_types=dict(output_channel_types),
             redis_url=redis_url,
+            codec=codec,
+            channel_codecs=channel_codecs or {},
+            compression=compression,
+            compression_threshold=compression_threshold,
+            transport=(
+                SharedPubSubTransport.name
+                if shared_pubsub is not None
+                else get_transport_name(transport)
+            ),
+            stream_maxlen=stream_maxlen,
         )
+        # Fail early on unknown codecs or missing optional dependencies.
+        for name in [self.codec, *self.channel_codecs.values()]:
+            get_codec(name)
+        self._channel_codec_cache: dict[str, MessageCodec] = {}
+        self._compressor = get_compressor(compression)
+        self.compression_stats = CompressionStats()
 
-        self.r: Redis = Redis.from_url(redis_url)
-        self.pubsub = self.r.pubsub()
+        self.shared_pubsub = shared_pubsub
+        if shared_pubsub is not None:
+            self.r: Redis = shared_pubsub.r
+            self.channel_transport: Transport = SharedPubSubTransport(shared_pubsub)
+        else:
+            # Connections are only opened on use, so this is free with the in-memory transport.
+            self.r = Redis.from_url(redis_url)
+            self.channel_transport = make_transport(
+                self.transport,
+                self.r,
+                group=self.stream_group,
+                maxlen=stream_maxlen,
+                ephemeral_group=self.ephemeral_stream_group,
+            )
         self.pid = os.getpid()
+        self.heartbeat: Heartbeat = get_heartbeat(redis_url, self.pid)
+        self.latency_recorder: LatencyRecorder | None = None
+
+    @property
+    def stream_group(self) -> str:
+        """
+        Consumer group of the node for the streams transport.
+
+        Stable across restarts of the same node, so that a restarted node replays what it
+        has not acknowledged. Nodes of the same class with the same input channels share
+        the group and therefore split the frames between them.
+        """
+        return f"{type(self).__name__}:{content_hash(sorted(self.input_channel_types))}"
+
+    @property
+    def ephemeral_stream_group(self) -> bool:
+        """
+        Whether the node reads through a consumer group of its own instead of `stream_group`.
+
+        The group of such a node only receives the frames published after it subscribes and
+        is deleted when the node exits (see `collaborative_gym.nodes.transports`). It suits
+        nodes tied to a connection, several of which may run with the same channels.
+        """
+        return False
+
+    @property
+    def uses_redis(self) -> bool:
+        """Whether the node talks to Redis (not the case with the in-memory transport)."""
+        return self.channel_transport.uses_redis
+
+    @property
+    def session_id(self) -> str | None:
+        """Session (env_uuid) the node belongs to, recorded with its heartbeat."""
+        return getattr(self, "env_uuid", None)
+
+    @property
+    def node_label(self) -> str:
+        """Name of the node in trace contexts and readiness announcements."""
+        return getattr(self, "node_name", None) or type(self).__name__
+
+    def trace_message(self, message: Message[OutputType]) -> Message[OutputType]:
+        """Copy of a message stamped with a trace context (untraceable messages are returned as is)."""
+        trace = make_trace_context(self.node_label)
+        if isinstance(message, PreEncodedMessage):
+            return message.with_trace(trace)
+        if isinstance(message, Message) and isinstance(message.data, JsonObj):
+            return type(message)(data=message.data.model_copy(update={"trace": trace}))
+        return message
+
+    async def announce_ready(self):
+        """Tell the runner waiting on this session that the node is subscribed to its channels."""
+        if self.uses_redis and self.session_id is not None:
+            key = readiness_key(self.session_id)
+            async with self.r.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, self.node_label)
+                pipe.expire(key, READY_KEY_TTL)
+                await pipe.execute()
 
     async def update_last_active_time(self):
-        await self.r.hset(LAST_ACTIVE_TIME_KEY, str(self.pid), str(time.time()))
+        if self.uses_redis:
+            await self.heartbeat.beat(id(self), self.session_id)
 
     async def delete_process_record(self):
-        await self.r.hdel(LAST_ACTIVE_TIME_KEY, str(self.pid))
+        if self.uses_redis:
+            await self.heartbeat.remove(id(self))
 
     async def __aenter__(self) -> Self:
-        try:
-            await self.r.ping()
-        except ConnectionError:
-            raise ValueError(
-                f"Could not connect to Redis with the provided url. {self.redis_url}"
-            )
-        await self.pubsub.subscribe(*self.input_channel_types.keys())
+        if self.uses_redis:
+            try:
+                await self.r.ping()
+            except ConnectionError:
+                raise ValueError(
+                    f"Could not connect to Redis with the provided url. {self.redis_url}"
+                )
+        await self.channel_transport.subscribe(list(self.input_channel_types.keys()))
         await self.update_last_active_time()
+        await self.announce_ready()
         return self
 
     async def __aexit__(self, _: Any, __: Any, ___: Any) -> None:
+        if self.compression_stats.frames_compressed:
+            logger.info(
+                f"Compressed {self.compression_stats.frames_compressed} frames with "
+                f"{self.compression}, saving {self.compression_stats.bytes_saved} of "
+                f"{self.compression_stats.bytes_before} bytes."
+            )
         await self.delete_process_record()
-        await self.pubsub.unsubscribe()
-        await self.r.aclose()
+        await self.channel_transport.close()
+        if self.shared_pubsub is None:
+            await self.r.aclose()
+
+    def get_channel_codec(self, channel: str) -> MessageCodec:
+        """Codec configured for a channel; exact names take precedence over patterns."""
+        if channel not in self._channel_codec_cache:
+            name = self.channel_codecs.get(channel)
+            if name is None:
+                name = next(
+                    (
+                        codec
+                        for pattern, codec in self.channel_codecs.items()
+                        if fnmatchcase(channel, pattern)
+                    ),
+                    self.codec,
+                )
+            self._channel_codec_cache[channel] = get_codec(name)
+        return self._channel_codec_cache[channel]
+
+    def encode_message(self, channel: str, message: Message) -> bytes | str:
+        """Encode a message for publishing on `channel`."""
+        if not isinstance(message, Message):
+            # Already encoded, e.g. a PreEncodedMessage
+            frame = message.model_dump_json()
+        else:
+            frame = self.get_channel_codec(channel).encode(message)
+        if self.compression_threshold is None:
+            return frame
+        return compress_frame(
+            frame, self._compressor, self.compression_threshold, self.compression_stats
+        )
+
+    def decode_message(self, channel: str, data: bytes | str) -> Message[InputType]:
+        """Decode a frame received on the input channel `channel`."""
+        data = decompress_frame(data)
+        codec = self.get_channel_codec(channel)
+        if not codec.is_json:
+            codec = get_codec(DEFAULT_CODEC)
+        return detect_codec(data, codec).decode(
+            data, Message[self.input_channel_types[channel]]  # type: ignore
+        )
+
+    async def publish(self, channel: str, message: Message[OutputType]):
+        """Encode a message (or pass a PreEncodedMessage through) and publish it on `channel`."""
+        message = self.trace_message(message)
+        if self.channel_transport.passes_messages:
+            await self.channel_transport.publish(channel, message)
+        else:
+            await self.channel_transport.publish(
+                channel, self.encode_message(channel, message)
+            )
 
     async def _wait_for_input(
         self,
     ) -> AsyncIterator[tuple[str, Message[InputType]]]:
-        async for message in self.pubsub.listen():
-            channel = message["channel"].decode("utf-8")
-            if message["type"] == "message" and channel in self.input_channel_types:
-                data = Message[self.input_channel_types[channel]].model_validate_json(  # type: ignore
-                    message["data"]
+        async for channel, frame in self.channel_transport.listen():
+            if channel in self.input_channel_types:
+                received_at = time.time()
+                if isinstance(frame, Message):
+                    data = frame  # Handed over in process, no decoding needed
+                elif isinstance(frame, PreEncodedMessage):
+                    data = self.decode_message(channel, frame.model_dump_json())
+                else:
+                    data = self.decode_message(channel, frame)
+                start_span(
+                    self.node_label,
+                    channel,
+                    getattr(data.data, "trace", None),
+                    received_at,
                 )
                 yield channel, data
         raise Exception("Input channel closed unexpectedly")
@@ -134,9 +360,10 @@ class BaseNode(BaseModel, Generic[InputType, OutputType]):
                 async for output_channel, output_message in self.event_handler(
                     input_channel, input_message
                 ):
-                    await self.r.publish(
-                        output_channel, output_message.model_dump_json()
-                    )
+                    await self.publish(output_channel, output_message)
+                span = CURRENT_SPAN.get()
+                if self.latency_recorder is not None and span is not None:
+                    self.latency_recorder.record_span(span, time.time())
         except NodeExitSignal as e:
             self.logger.info(f"Event loop cancelled: {e}. Exiting gracefully.")
         except Exception as e:
@@ -235,7 +235,7 @@ class CmdUserNode(BaseNode[JsonObj, JsonObj]):
         async for output_channel, output_message in self.event_handler(
             input_channel, input_message
         ):
-            await self.r.publish(output_channel, output_message.model_dump_json())
+            await self.publish(output_channel, output_message)
 
     async def event_handler(
         self, input_channel: str, input_message: Message[JsonObj]
@@ -0,0 +1,127 @@
+"""
+Wire codecs for messages exchanged between nodes over Redis.
+
+Every frame is self-describing: JSON codecs produce frames starting with ``{`` while
+msgpack frames start with a map header byte. Receivers therefore detect the codec of
+each frame with `detect_codec` and senders are free to choose a codec per output
+channel (see `BaseNode`), without any out-of-band negotiation. The pydantic JSON codec
+is the default and is understood by every node, including older ones.
+"""
+
+from typing import Any, Dict, Type
+
+from aact.messages import Message
+
+DEFAULT_CODEC = "pydantic_json"
+
+
+class MessageCodec:
+    """
+    Base class for encoding and decoding `aact.Message` frames.
+
+    Attributes:
+        name: Name used to select the codec in node configurations
+        is_json: Whether frames are JSON text (and can be decoded by any JSON codec)
+    """
+
+    name: str = ""
+    is_json: bool = True
+
+    def encode(self, message: Message) -> bytes | str:
+        raise NotImplementedError
+
+    def decode(self, data: bytes | str, message_type: Type[Message]) -> Message:
+        raise NotImplementedError
+
+
+class PydanticJsonCodec(MessageCodec):
+    """JSON through pydantic, the encoding used by aact nodes."""
+
+    name = "pydantic_json"
+
+    def encode(self, message: Message) -> str:
+        return message.model_dump_json()
+
+    def decode(self, data: bytes | str, message_type: Type[Message]) -> Message:
+        return message_type.model_validate_json(data)
+
+
+class OrjsonCodec(MessageCodec):
+    """JSON through orjson. Produces the same frames as `PydanticJsonCodec`."""
+
+    name = "orjson"
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError("Please install orjson using 'pip install orjson'")
+        self._orjson = orjson
+
+    def encode(self, message: Message) -> bytes:
+        return self._orjson.dumps(message.model_dump())
+
+    def decode(self, data: bytes | str, message_type: Type[Message]) -> Message:
+        return message_type.model_validate(self._orjson.loads(data))
+
+
+class MsgpackCodec(MessageCodec):
+    """Compact binary frames through msgpack."""
+
+    name = "msgpack"
+    is_json = False
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("Please install msgpack using 'pip install msgpack'")
+        self._msgpack = msgpack
+
+    def encode(self, message: Message) -> bytes:
+        # mode="json" turns values msgpack cannot pack (e.g., enums) into JSON types.
+        return self._msgpack.packb(message.model_dump(mode="json"))
+
+    def decode(self, data: bytes | str, message_type: Type[Message]) -> Message:
+        return message_type.model_validate(self._msgpack.unpackb(data))
+
+
+CODECS: Dict[str, Type[MessageCodec]] = {
+    codec.name: codec for codec in (PydanticJsonCodec, OrjsonCodec, MsgpackCodec)
+}
+
+_codec_instances: Dict[str, MessageCodec] = {}
+
+
+def get_codec(name: str) -> MessageCodec:
+    """Return the (shared) codec instance registered under `name`."""
+    if name not in _codec_instances:
+        if name not in CODECS:
+            raise ValueError(
+                f"Unknown codec {name!r}. Choose from {list(CODECS.keys())}."
+            )
+        _codec_instances[name] = CODECS[name]()
+    return _codec_instances[name]
+
+
+def is_json_frame(data: Any) -> bool:
+    """Whether a frame received from Redis is JSON text (all messages are JSON objects)."""
+    if isinstance(data, str):
+        return data[:1] == "{"
+    return data[:1] == b"{"
+
+
+def detect_codec(data: Any, json_codec: MessageCodec) -> MessageCodec:
+    """
+    Pick the codec able to decode a received frame.
+
+    Args:
+        data: Raw frame received from Redis
+        json_codec: Codec used for JSON frames, so that receivers can prefer a faster JSON backend
+
+    Returns:
+        `json_codec` for JSON frames, the msgpack codec otherwise
+    """
+    if is_json_frame(data):
+        return json_codec
+    return get_codec(MsgpackCodec.name)
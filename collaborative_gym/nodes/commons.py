@@ -1,8 +1,98 @@
-from typing import Any
+import hashlib
+from typing import Any, Optional
 
 from aact.messages import DataModelFactory, DataModel
+from pydantic_core import to_json
+
+from collaborative_gym.nodes.tracing import TraceContext
 
 
 @DataModelFactory.register("json_obj")
 class JsonObj(DataModel):
     object: dict[str, Any]
+    trace: Optional[TraceContext] = None  # Stamped by BaseNode.publish
+
+
+def content_hash(obj: Any) -> str:
+    """Short stable hash of a JSON-serializable object (dictionary order matters)."""
+    return hashlib.sha256(to_json(obj)).hexdigest()[:16]
+
+
+class PreEncodedMessage:
+    """
+    Message whose JSON encoding has already been produced, e.g. by `encode_json_obj_messages`.
+
+    Nodes publish `output_message.model_dump_json()`, so this can be yielded from an event
+    handler in place of `Message[JsonObj]` to skip pydantic validation and serialization.
+    The encoding is kept as UTF-8 bytes, which Redis publishes as is.
+    """
+
+    def __init__(self, json_bytes: bytes):
+        self.json_bytes = json_bytes
+
+    def model_dump_json(self) -> bytes:
+        return self.json_bytes
+
+    def with_trace(self, trace: TraceContext) -> "PreEncodedMessage":
+        """Copy with `trace` set on the JsonObj, spliced before the closing `}}` of the envelope."""
+        return PreEncodedMessage(
+            self.json_bytes[:-2]
+            + b',"trace":'
+            + trace.model_dump_json().encode("utf-8")
+            + b"}}"
+        )
+
+
+def _encode_with_cache(
+    obj: Any, cache: dict[int, tuple[Any, list[bytes]]], out: list[bytes]
+):
+    """Append the JSON encoding of obj to `out` as pieces, reusing pieces of shared objects."""
+    key = id(obj)
+    if key in cache:
+        out.extend(cache[key][1])
+        return
+    pieces = []
+    if isinstance(obj, dict):
+        pieces.append(b"{")
+        for i, (k, v) in enumerate(obj.items()):
+            if i > 0:
+                pieces.append(b",")
+            pieces.append(to_json(k if isinstance(k, str) else str(k)))
+            pieces.append(b":")
+            _encode_with_cache(v, cache, pieces)
+        pieces.append(b"}")
+    else:
+        # Same serializer as pydantic's model_dump_json (e.g., enums are dumped as values)
+        pieces.append(to_json(obj))
+    # Keep a reference to obj so that its id cannot be reused while the cache is alive.
+    cache[key] = (obj, pieces)
+    out.extend(pieces)
+
+
+def encode_json_obj_messages(payloads: dict[str, dict]) -> dict[str, bytes]:
+    """
+    Encode several `Message[JsonObj]` payloads that share sub-objects.
+
+    Any object referenced by more than one payload (e.g. the public part of an observation
+    that every team member receives) is serialized only once and spliced into each message.
+    The payloads are trusted JSON-serializable dictionaries and are not validated.
+
+    Args:
+        payloads: Mapping of keys (e.g. team member roles) to message payloads
+
+    Returns:
+        Mapping of the same keys to `Message[JsonObj]` JSON encodings (UTF-8 bytes)
+    """
+    cache: dict[int, tuple[Any, list[bytes]]] = {}
+    prefix = (
+        b'{"data":{"data_type":'
+        + to_json(JsonObj.model_fields["data_type"].default)
+        + b',"object":'
+    )
+    encoded = {}
+    for k, payload in payloads.items():
+        pieces = [prefix]
+        _encode_with_cache(payload, cache, pieces)
+        pieces.append(b"}}")
+        encoded[k] = b"".join(pieces)
+    return encoded
@@ -0,0 +1,149 @@
+"""
+Transparent compression of large frames published over Redis.
+
+A compressed frame is an envelope made of `COMPRESSED_FRAME_FLAG`, one byte identifying
+the compressor, and the compressed encoded message. The flag byte can start neither a
+JSON frame nor a msgpack frame (see `collaborative_gym.nodes.codecs`), so receivers can
+tell compressed frames apart from plain ones and senders only compress frames above a
+size threshold.
+"""
+
+import zlib
+from typing import Dict, Type
+
+from pydantic import BaseModel
+
+COMPRESSED_FRAME_FLAG = b"\x00"
+
+
+class FrameCompressor:
+    """
+    Base class for frame compressors.
+
+    Attributes:
+        name: Name used to select the compressor in node configurations
+        tag: Byte written after `COMPRESSED_FRAME_FLAG` to identify the compressor
+    """
+
+    name: str = ""
+    tag: bytes = b""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ZlibCompressor(FrameCompressor):
+    """zlib at its fastest level; no extra dependency."""
+
+    name = "zlib"
+    tag = b"z"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, 1)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class Lz4Compressor(FrameCompressor):
+    """LZ4 frames, cheaper than zlib at a lower compression ratio."""
+
+    name = "lz4"
+    tag = b"l"
+
+    def __init__(self):
+        try:
+            import lz4.frame
+        except ImportError:
+            raise ImportError("Please install lz4 using 'pip install lz4'")
+        self._lz4_frame = lz4.frame
+
+    def compress(self, data: bytes) -> bytes:
+        return self._lz4_frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._lz4_frame.decompress(data)
+
+
+COMPRESSORS: Dict[str, Type[FrameCompressor]] = {
+    compressor.name: compressor for compressor in (ZlibCompressor, Lz4Compressor)
+}
+_COMPRESSORS_BY_TAG = {compressor.tag: compressor for compressor in COMPRESSORS.values()}
+
+_compressor_instances: Dict[str, FrameCompressor] = {}
+
+
+def get_compressor(name: str) -> FrameCompressor:
+    """Return the (shared) compressor instance registered under `name`."""
+    if name not in _compressor_instances:
+        if name not in COMPRESSORS:
+            raise ValueError(
+                f"Unknown compressor {name!r}. Choose from {list(COMPRESSORS.keys())}."
+            )
+        _compressor_instances[name] = COMPRESSORS[name]()
+    return _compressor_instances[name]
+
+
+class CompressionStats(BaseModel):
+    """Counters of the frames a node compressed before publishing."""
+
+    frames_compressed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def record(self, bytes_before: int, bytes_after: int):
+        self.frames_compressed += 1
+        self.bytes_before += bytes_before
+        self.bytes_after += bytes_after
+
+
+def compress_frame(
+    frame: bytes | str,
+    compressor: FrameCompressor,
+    threshold: int,
+    stats: CompressionStats | None = None,
+) -> bytes | str:
+    """
+    Wrap an encoded message into a compressed envelope if it is larger than `threshold`.
+
+    Frames that do not shrink are returned unchanged.
+
+    Args:
+        frame: Encoded message
+        compressor: Compressor to use
+        threshold: Minimum frame size in bytes to attempt compression
+        stats: Counters updated for every compressed frame
+
+    Returns:
+        The compressed envelope or the original frame
+    """
+    if len(frame) < threshold:
+        return frame
+    data = frame.encode("utf-8") if isinstance(frame, str) else frame
+    envelope = COMPRESSED_FRAME_FLAG + compressor.tag + compressor.compress(data)
+    if len(envelope) >= len(data):
+        return frame
+    if stats is not None:
+        stats.record(len(data), len(envelope))
+    return envelope
+
+
+def is_compressed_frame(data: bytes | str) -> bool:
+    return isinstance(data, bytes) and data[:1] == COMPRESSED_FRAME_FLAG
+
+
+def decompress_frame(data: bytes | str) -> bytes | str:
+    """Unwrap a compressed envelope; other frames are returned unchanged."""
+    if not is_compressed_frame(data):
+        return data
+    tag = data[1:2]
+    if tag not in _COMPRESSORS_BY_TAG:
+        raise ValueError(f"Unknown compressed frame tag {tag!r}.")
+    return get_compressor(_COMPRESSORS_BY_TAG[tag].name).decompress(data[2:])
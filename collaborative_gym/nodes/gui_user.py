@@ -12,7 +12,15 @@ from collaborative_gym.core import ObservationTypes, logger
 from collaborative_gym.nodes.agent_interface import AGENT_TO_PID_KEY
 from collaborative_gym.nodes.base_node import BaseNode
 from collaborative_gym.nodes.commons import JsonObj
-from collaborative_gym.utils.code_executor import JupyterManager
+from collaborative_gym.nodes.observation_sync import (
+    ObservationReceiver,
+    receive_observation,
+)
+from collaborative_gym.nodes.transports import SharedPubSub
+from collaborative_gym.utils.jupyter_history import (
+    cell_output_to_str,
+    load_execution_history,
+)
 
 
 def reformat_observation(raw_observation, obs_type):
@@ -35,7 +43,10 @@ def reformat_observation(raw_observation, obs_type):
             continue
         # Ensure the content matches the type
         if obs_type[k] == ObservationTypes.JUPYTER_NOTEBOOK:
-            content = JupyterManager.str_to_execution_history(raw_observation[k])
+            content = [
+                {"id": cell["id"], "code": cell["code"], "result": cell_output_to_str(cell)}
+                for cell in load_execution_history(raw_observation[k])
+            ]
         elif obs_type[k] == ObservationTypes.DISTANCE_MATRIX:
             if "query" not in raw_observation[k] or "output" not in raw_observation[k]:
                 continue
@@ -119,6 +130,33 @@ def reformat_observation(raw_observation, obs_type):
     return observation_space
 
 
+def reformat_partial_observation(updates, executed_cell_ids):
+    """
+    Format the partial observations emitted while an action runs for GUI display.
+
+    Jupyter updates of cells that are already in the last observation are dropped, as
+    the observation replaced them.
+
+    Args:
+        updates: List of partial observation updates, each with the observation key
+        executed_cell_ids: Dictionary mapping observation keys to the id of the last cell
+            in the last observation
+
+    Returns:
+        list: List of formatted updates with the name of the observation they belong to
+    """
+    formatted_updates = []
+    for update in updates:
+        update = dict(update)
+        k = update.pop("key")
+        if "cell_id" in update:
+            if update["cell_id"] <= executed_cell_ids.get(k, -1):
+                continue
+            update["id"] = update.pop("cell_id")
+        formatted_updates.append({"name": k.replace("_", " ").capitalize(), **update})
+    return formatted_updates
+
+
 def reformat_confirmations(confirmations):
     """Format confirmations into a structured format for GUI display.
 
@@ -159,6 +197,10 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
         node_name: Name/role of this GUI user interface
         team_member_state: Dict tracking status and actions of team members
         team_member_finished: Flag indicating task completion
+        observation_receiver: Rebuilds full observations from versioned deltas
+        executed_cell_ids: Id of the last cell of each Jupyter observation, to drop late
+            partial observations of cells already executed
+        descriptors: Cached session descriptors (descriptor_hash, observation_type, action_space)
         websocket: WebSocket connection to the frontend
         is_websocket_open: Flag indicating WebSocket connection status
         listener_task: Background task for WebSocket message listening
@@ -171,6 +213,7 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
         team_members: list[str],
         websocket: WebSocket,
         redis_url: str = "redis://localhost:6379/0",
+        shared_pubsub: SharedPubSub | None = None,
     ):
         super().__init__(
             input_channel_types=[
@@ -181,6 +224,7 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
                     f"{env_uuid}/step",
                     JsonObj,
                 ),  # For monitoring team members' activities
+                (f"{env_uuid}/partial_observation", JsonObj),
                 (
                     f"{env_uuid}/{node_name}/answer_state",
                     JsonObj,
@@ -191,8 +235,10 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
                     f"{env_uuid}/{node_name}/request_state",
                     JsonObj,
                 ),  # For frontend update
+                (f"{env_uuid}/{node_name}/observation_ack", JsonObj),
             ],
             redis_url=redis_url,
+            shared_pubsub=shared_pubsub,
         )
         self.env_uuid = env_uuid
         self.node_name = node_name
@@ -204,6 +250,9 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
             for team_member in team_members
         }
         self.team_member_finished = False
+        self.observation_receiver = ObservationReceiver()
+        self.executed_cell_ids: dict[str, int] = {}
+        self.descriptors: dict | None = None
         self.websocket = websocket
         self.is_websocket_open = True
 
@@ -211,6 +260,16 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
         signal.signal(signal.SIGINT, self.handle_signal)
         signal.signal(signal.SIGTERM, self.handle_signal)
 
+    @property
+    def ephemeral_stream_group(self) -> bool:
+        """
+        Read through a consumer group of this connection (see `BaseNode.ephemeral_stream_group`).
+
+        Each websocket connection receives every frame, as with pub/sub, instead of splitting
+        the frames of the user's channels with the other connections of the user.
+        """
+        return True
+
     async def __aenter__(self) -> Self:
         self.listener_task = asyncio.create_task(self.websocket_listener())
         return await super().__aenter__()
@@ -235,9 +294,12 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
                     logger.info(
                         f"GUIUserListenNode ({self.node_name}): received request_state message from GUI"
                     )
-                    await self.r.publish(
+                    request = {}
+                    if self.descriptors is not None:
+                        request["descriptor_hash"] = self.descriptors["descriptor_hash"]
+                    await self.publish(
                         f"{self.env_uuid}/{self.node_name}/request_state",
-                        Message[JsonObj](data=JsonObj(object={})).model_dump_json(),
+                        Message[JsonObj](data=JsonObj(object=request)),
                     )
 
         except asyncio.CancelledError:
@@ -296,6 +358,14 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
                 # Handle WebSocket closing here if needed
                 await self.close_websocket()
 
+    def update_executed_cell_ids(self, observation, obs_type):
+        """Remember the id of the last cell of each Jupyter observation."""
+        for k in obs_type:
+            if obs_type[k] == ObservationTypes.JUPYTER_NOTEBOOK and k in observation:
+                cells = load_execution_history(observation[k])
+                if cells:
+                    self.executed_cell_ids[k] = cells[-1]["id"]
+
     async def check_team_member_process(self):
         """
         Verify the status of team member processes.
@@ -329,6 +399,7 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
         3. Answer State: Update team member states and observations
         4. Step: Track team member actions and status
         5. End: Handle task completion and cleanup
+        6. Partial Observation: Forward the output of a running action (e.g. a Jupyter cell)
 
         Args:
             input_channel: The Redis channel receiving the message
@@ -345,9 +416,18 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
             await self.websocket_send_message(payload)
         elif input_channel == f"{self.env_uuid}/{self.node_name}/observation":
             # await asyncio.sleep(5)
+            input_message = await receive_observation(
+                publish=self.publish,
+                receiver=self.observation_receiver,
+                ack_channel=f"{self.env_uuid}/{self.node_name}/observation_ack",
+                input_message=input_message,
+            )
+            if input_message is None:
+                return  # Wait for the full snapshot
             observation = input_message.data.object["observation"]
             obs_type = input_message.data.object["observation_type"]
             pending_confirmations = input_message.data.object["pending_confirmations"]
+            self.update_executed_cell_ids(observation, obs_type)
             payload = {
                 "type": "observation",
                 "observation_space": reformat_observation(
@@ -359,10 +439,37 @@ class GUIUserListenNode(BaseNode[JsonObj, JsonObj]):
             }
             await self.update_last_active_time()
             await self.websocket_send_message(payload)
+        elif input_channel == f"{self.env_uuid}/partial_observation":
+            updates = reformat_partial_observation(
+                updates=input_message.data.object["updates"],
+                executed_cell_ids=self.executed_cell_ids,
+            )
+            if updates:
+                await self.websocket_send_message(
+                    {"type": "partial_observation", "updates": updates}
+                )
         elif input_channel == f"{self.env_uuid}/{self.node_name}/answer_state":
+            if "observation_type" in input_message.data.object:
+                self.descriptors = {
+                    k: input_message.data.object[k]
+                    for k in ("descriptor_hash", "observation_type", "action_space")
+                }
+            elif (
+                self.descriptors is None
+                or self.descriptors["descriptor_hash"]
+                != input_message.data.object["descriptor_hash"]
+            ):
+                # The descriptors were omitted for a hash sent by another node instance of
+                # this member (e.g. another tab); ask again without a hash.
+                await self.publish(
+                    f"{self.env_uuid}/{self.node_name}/request_state",
+                    Message[JsonObj](data=JsonObj(object={})),
+                )
+                return
             observation = input_message.data.object["observation"]
-            obs_type = input_message.data.object["observation_type"]
+            obs_type = self.descriptors["observation_type"]
             pending_confirmations = input_message.data.object["pending_confirmations"]
+            self.update_executed_cell_ids(observation, obs_type)
             await self.check_team_member_process()
             payload = {
                 "type": "answer_state",
@@ -0,0 +1,190 @@
+"""
+Coalesced liveness records of the nodes of a process.
+
+Nodes report activity on every event they handle. Instead of writing to Redis each time,
+the process keeps the latest activity time of each session it serves in memory and a
+background task flushes them every `flush_interval` seconds, in one pipeline for all the
+nodes of the process. A process serving several sessions (an env host, the server hosting
+the GUI nodes) keeps one record per session, so that an active session does not keep an
+idle one alive and the reapers can act per session.
+
+Records are stored in the `SESSION_HEARTBEATS_KEY` hash under `heartbeat_field` and hold
+a JSON `HeartbeatRecord`. Records of shared processes (see `mark_process_shared`) tell the
+reapers that the process must not be signalled to stop one of its sessions.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from typing import Dict, Optional, Set
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from collaborative_gym.core import logger
+
+SESSION_HEARTBEATS_KEY = "session_heartbeats"
+HEARTBEAT_FLUSH_INTERVAL = 10
+
+_process_shared = False
+
+
+class HeartbeatRecord(BaseModel):
+    """
+    Last activity of the nodes of one session in one process.
+
+    Attributes:
+        hostname: Host of the process
+        pid: Process ID on that host
+        session: Session (env_uuid) of the nodes, or None for nodes without a session
+        last_active_time: Time of the latest activity of the nodes
+        shared: Whether the process serves other sessions as well (or may do so), in which
+            case it must not be killed to stop this session
+    """
+
+    hostname: str
+    pid: int
+    session: Optional[str] = None
+    last_active_time: float
+    shared: bool = False
+
+
+def heartbeat_field(hostname: str, pid: int, session: Optional[str]) -> str:
+    """Field of a record in the `SESSION_HEARTBEATS_KEY` hash."""
+    return f"{hostname}:{pid}:{session or ''}"
+
+
+def mark_process_shared():
+    """Record that the current process runs nodes of many sessions (see `HeartbeatRecord`)."""
+    global _process_shared
+    _process_shared = True
+
+
+class Heartbeat:
+    """
+    Last active time of the sessions served by the nodes of one process, flushed
+    periodically to Redis.
+
+    Attributes:
+        r: Redis client owned by the heartbeat
+        pid: Process ID the records are stored under
+        flush_interval: Seconds between two flushes of pending activity
+        hostname: Host the records are stored under
+    """
+
+    def __init__(self, r: Redis, pid: int, flush_interval: float = HEARTBEAT_FLUSH_INTERVAL):
+        self.r = r
+        self.pid = pid
+        self.flush_interval = flush_interval
+        self.hostname = socket.gethostname()
+        self._node_sessions: Dict[int, Optional[str]] = {}  # id(node) -> session
+        self._last_active_time: Dict[Optional[str], float] = {}  # session -> time
+        self._dirty: Set[Optional[str]] = set()
+        self._flusher: Optional[asyncio.Task] = None
+
+    @property
+    def shared(self) -> bool:
+        return _process_shared or len(self._last_active_time) > 1
+
+    def field(self, session: Optional[str]) -> str:
+        return heartbeat_field(self.hostname, self.pid, session)
+
+    async def beat(self, node_id: int, session_id: Optional[str] = None):
+        """
+        Record activity of a node.
+
+        The first activity of a session is flushed right away so that it is visible to
+        the reapers from the start; later ones wait for the next flush.
+        """
+        is_new_session = session_id not in self._last_active_time
+        self._node_sessions[node_id] = session_id
+        self._last_active_time[session_id] = time.time()
+        if is_new_session:
+            # Records of the other sessions become shared along with this one.
+            self._dirty.update(self._last_active_time)
+            await self.flush()
+        else:
+            self._dirty.add(session_id)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def remove(self, node_id: int):
+        """Forget a node; the record of its session is deleted with the last node of it."""
+        if node_id not in self._node_sessions:
+            return
+        session_id = self._node_sessions.pop(node_id)
+        if session_id in self._node_sessions.values():
+            return
+        self._last_active_time.pop(session_id, None)
+        self._dirty.discard(session_id)
+        if not self._node_sessions and self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.r.hdel(SESSION_HEARTBEATS_KEY, self.field(session_id))
+
+    async def flush(self):
+        """Write pending activity of all sessions in one pipeline."""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        shared = self.shared
+        try:
+            async with self.r.pipeline(transaction=False) as pipe:
+                for session_id in dirty:
+                    if session_id not in self._last_active_time:
+                        continue
+                    record = HeartbeatRecord(
+                        hostname=self.hostname,
+                        pid=self.pid,
+                        session=session_id,
+                        last_active_time=self._last_active_time[session_id],
+                        shared=shared,
+                    )
+                    pipe.hset(
+                        SESSION_HEARTBEATS_KEY,
+                        self.field(session_id),
+                        record.model_dump_json(),
+                    )
+                await pipe.execute()
+        except Exception:
+            self._dirty |= dirty
+            raise
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Heartbeat of process {self.pid} failed to flush: {e}")
+
+
+_heartbeats: Dict[str, Heartbeat] = {}
+
+
+def get_heartbeat(redis_url: str, pid: int) -> Heartbeat:
+    """Return the heartbeat of the current process for the Redis server at `redis_url`."""
+    if redis_url not in _heartbeats:
+        _heartbeats[redis_url] = Heartbeat(Redis.from_url(redis_url), pid)
+    return _heartbeats[redis_url]
+
+
+def read_heartbeat_records(r) -> list[HeartbeatRecord]:
+    """All heartbeat records, read with a synchronous Redis client."""
+    return [
+        HeartbeatRecord.model_validate_json(value)
+        for value in r.hgetall(SESSION_HEARTBEATS_KEY).values()
+    ]
+
+
+def delete_session_records(r, session: str):
+    """Delete the records of a session left by processes that did not exit cleanly."""
+    fields = [field for field, _ in r.hscan_iter(SESSION_HEARTBEATS_KEY, match=f"*:{session}")]
+    if fields:
+        r.hdel(SESSION_HEARTBEATS_KEY, *fields)
+
+
+def is_local_process(record: HeartbeatRecord) -> bool:
+    """Whether the process of a record runs on this host (and is not this process)."""
+    return record.hostname == socket.gethostname() and record.pid != os.getpid()
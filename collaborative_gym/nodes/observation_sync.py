@@ -0,0 +1,240 @@
+"""
+Versioned observation delta protocol between TaskEnvNode and team members.
+
+Every observation sent to a team member carries a per-member version number. The
+environment node diffs the member's state (observation, observation type, chat
+history, pending confirmations, agent sleep state) against the latest version the
+member acknowledged on `{env_uuid}/{member}/observation_ack` and only sends the
+patch. Members rebuild the full payload locally with `ObservationReceiver` and ask
+for a full snapshot (`{"resync": True}` on the same ack channel) whenever they miss
+the base version of a patch.
+
+Wire format of an observation message:
+    {
+        "version": int,
+        "base_version": int | None,  # None for full snapshots
+        "state": {...},  # full state, only for snapshots
+        "state_delta": {"patch": {...}, "chat_history_delta": [...]},  # only for patches
+        "reward": ...,
+        "info": {...},
+    }
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aact import Message
+
+from collaborative_gym.core import (
+    RequestTeammateConfirm,
+    SendTeammateMessage,
+    WaitTeammateContinue,
+)
+from collaborative_gym.nodes.commons import JsonObj
+from collaborative_gym.utils.event_log import diff_dict, patched
+
+
+def make_observation_state(
+    observation: dict,
+    observation_type: dict,
+    chat_history: List[dict],
+    pending_confirmations: dict,
+    agent_asleep: bool,
+) -> Dict[str, Any]:
+    """Assemble the per-member state.
+
+    The arguments must be snapshots that the environment will not mutate later, since the
+    state is kept as the base of future patches. Snapshots can be shared across members.
+    """
+    return {
+        "observation": observation,
+        "observation_type": observation_type,
+        "chat_history": chat_history,
+        "pending_confirmations": pending_confirmations,
+        "agent_asleep": agent_asleep,
+    }
+
+
+def diff_observation_state(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the state delta; chat history is append-only so only new turns are sent."""
+    old_chat_history, new_chat_history = old["chat_history"], new["chat_history"]
+    if len(new_chat_history) >= len(old_chat_history):
+        chat_history_delta = new_chat_history[len(old_chat_history) :]
+        patch = diff_dict(
+            {k: v for k, v in old.items() if k != "chat_history"},
+            {k: v for k, v in new.items() if k != "chat_history"},
+        )
+    else:
+        chat_history_delta = []
+        patch = diff_dict(old, new)
+    return {"patch": patch, "chat_history_delta": chat_history_delta}
+
+
+def apply_observation_state_delta(
+    base: Dict[str, Any], state_delta: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Apply a state delta to `base` without mutating it."""
+    state = patched(base, state_delta["patch"])
+    if state_delta["chat_history_delta"]:
+        state["chat_history"] = state["chat_history"] + state_delta["chat_history_delta"]
+    return state
+
+
+class ObservationPublisher:
+    """
+    Environment-side bookkeeping of the observation versions sent to each team member.
+
+    Attributes:
+        team_members: Team members receiving observations
+        versions: Latest version sent to each team member
+        max_unacked_versions: Number of unacknowledged versions kept per team member; older
+            ones are evicted so that members that never acknowledge (crashed agents, older
+            GUI clients) do not grow the bookkeeping without bound. Acknowledgements of
+            evicted versions are ignored; the member then keeps receiving patches against
+            its last recorded acknowledgement, or asks for a snapshot if it dropped that base.
+    """
+
+    def __init__(self, team_members: List[str], max_unacked_versions: int = 16):
+        self.team_members = team_members
+        self.max_unacked_versions = max_unacked_versions
+        self.versions: Dict[str, int] = {member: 0 for member in team_members}
+        # Versions sent but not yet acknowledged: member -> {version: state}
+        self._sent: Dict[str, Dict[int, Dict[str, Any]]] = {
+            member: {} for member in team_members
+        }
+        # Latest acknowledged version and its state: member -> (version, state)
+        self._acked: Dict[str, Optional[tuple[int, Dict[str, Any]]]] = {
+            member: None for member in team_members
+        }
+
+    def make_payload(
+        self, member: str, state: Dict[str, Any], reward: Any, info: dict
+    ) -> Dict[str, Any]:
+        """Create the observation payload for `member`, as a patch whenever possible."""
+        self.versions[member] += 1
+        version = self.versions[member]
+        sent = self._sent[member]
+        sent[version] = state
+        if len(sent) > self.max_unacked_versions:
+            # Versions are inserted in increasing order, so the first one is the oldest.
+            del sent[next(iter(sent))]
+        payload = {"version": version, "reward": reward, "info": info}
+        acked = self._acked[member]
+        if acked is None:
+            payload["base_version"] = None
+            payload["state"] = state
+        else:
+            payload["base_version"] = acked[0]
+            payload["state_delta"] = diff_observation_state(acked[1], state)
+        return payload
+
+    def ack(self, member: str, version: int):
+        """Record that `member` has applied `version`."""
+        if version not in self._sent[member]:
+            return  # Stale or duplicated acknowledgement
+        self._acked[member] = (version, self._sent[member][version])
+        self._sent[member] = {
+            v: state for v, state in self._sent[member].items() if v > version
+        }
+
+    def make_snapshot_payload(self, member: str) -> Optional[Dict[str, Any]]:
+        """Full snapshot of the latest version sent to `member` for resynchronization."""
+        version = self.versions[member]
+        if version in self._sent[member]:
+            state = self._sent[member][version]
+        elif self._acked[member] is not None and self._acked[member][0] == version:
+            state = self._acked[member][1]
+        else:
+            return None
+        return {
+            "version": version,
+            "base_version": None,
+            "state": state,
+            "reward": 0,
+            "info": {},
+        }
+
+
+class ObservationReceiver:
+    """
+    Member-side reconstruction of full observation payloads from versioned patches.
+
+    Attributes:
+        version: Latest version applied locally (0 before the first observation)
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._states: Dict[int, Dict[str, Any]] = {}
+
+    def apply(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply an observation message.
+
+        Args:
+            payload: Observation message object sent by TaskEnvNode
+
+        Returns:
+            The full observation payload (observation, observation_type, reward, info,
+            chat_history, pending_confirmations, agent_asleep), or None if the base
+            version of the patch is unknown and a full snapshot must be requested.
+        """
+        if payload["base_version"] is None:
+            state = payload["state"]
+        else:
+            base_version = payload["base_version"]
+            if base_version not in self._states:
+                return None
+            state = apply_observation_state_delta(
+                self._states[base_version], payload["state_delta"]
+            )
+            # The environment never diffs against versions older than its base.
+            self._states = {
+                v: s for v, s in self._states.items() if v >= base_version
+            }
+        self._states[payload["version"]] = state
+        self.version = max(self.version, payload["version"])
+        return {**state, "reward": payload["reward"], "info": payload["info"]}
+
+
+# Actions after which the environment sends no observation back to their author: messages
+# and confirmation requests only notify the other members, and waiting changes nothing.
+_NO_REPLY_ACTIONS = [SendTeammateMessage(), RequestTeammateConfirm(), WaitTeammateContinue()]
+
+
+def expects_observation_reply(action: str) -> bool:
+    """Whether the environment answers an action with a new observation for its author."""
+    return not any(act.contains(action) for act in _NO_REPLY_ACTIONS)
+
+
+async def receive_observation(
+    publish: Callable[[str, Message[JsonObj]], Awaitable[None]],
+    receiver: ObservationReceiver,
+    ack_channel: str,
+    input_message: Message[JsonObj],
+) -> Optional[Message[JsonObj]]:
+    """
+    Rebuild the full observation message on the member side and acknowledge it.
+
+    Args:
+        publish: `publish` method of the member node
+        receiver: The member's ObservationReceiver
+        ack_channel: `{env_uuid}/{member}/observation_ack`
+        input_message: Observation message received from TaskEnvNode
+
+    Returns:
+        The observation message with the full payload, or None if a full snapshot has
+        been requested because the patch could not be applied.
+    """
+    payload = receiver.apply(input_message.data.object)
+    if payload is None:
+        await publish(
+            ack_channel, Message[JsonObj](data=JsonObj(object={"resync": True}))
+        )
+        return None
+    await publish(
+        ack_channel,
+        Message[JsonObj](
+            data=JsonObj(object={"version": input_message.data.object["version"]})
+        ),
+    )
+    return Message[JsonObj](data=JsonObj(object=payload))
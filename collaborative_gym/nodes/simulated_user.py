@@ -7,11 +7,15 @@ from typing import Union, Dict, AsyncIterator
 
 import dspy
 from aact import NodeFactory, Message
-from knowledge_storm import OpenAIModel
 
 from collaborative_gym import JsonObj
 from collaborative_gym.core import SendTeammateMessage, WaitTeammateContinue, logger
 from collaborative_gym.nodes.base_node import BaseNode
+from collaborative_gym.nodes.observation_sync import (
+    ObservationReceiver,
+    expects_observation_reply,
+    receive_observation,
+)
 from collaborative_gym.utils.context_processing import ContextProcessor
 
 
@@ -481,9 +485,13 @@ class SimulatedUserNode(BaseNode[JsonObj, JsonObj]):
         env_uuid: Unique identifier for the environment instance
         node_name: Name/role of this simulated user
         simulated_user: Instance of SimulatedUserProxy handling behavior
+        observation_receiver: Rebuilds full observations from versioned deltas
         tasks: List of active async tasks
         is_processing_observation: Flag to prevent concurrent observation processing
         is_processing_observation_lock: AsyncIO lock for observation handling
+        pending_observation: Latest observation received while processing another one, handled
+            once that one is done (older pending observations are superseded by it, and all of
+            them by the reply to an environment action published in the meantime)
     """
 
     def __init__(
@@ -501,11 +509,17 @@ class SimulatedUserNode(BaseNode[JsonObj, JsonObj]):
                 (f"{env_uuid}/start", JsonObj),
                 (f"{env_uuid}/end", JsonObj),
             ],
-            output_channel_types=[(f"{env_uuid}/step", JsonObj)],
+            output_channel_types=[
+                (f"{env_uuid}/step", JsonObj),
+                (f"{env_uuid}/{node_name}/observation_ack", JsonObj),
+            ],
             redis_url=redis_url,
         )
         self.env_uuid = env_uuid
         self.node_name = node_name
+        # knowledge_storm takes seconds to import, so it is only imported by simulated user nodes.
+        from knowledge_storm import OpenAIModel
+
         self.simulated_user = SimulatedUserProxy(
             planning_lm=OpenAIModel(
                 model="gpt-4o-2024-08-06",
@@ -522,9 +536,12 @@ class SimulatedUserNode(BaseNode[JsonObj, JsonObj]):
             proactive_action=proactive_action,
         )
 
+        self.observation_receiver = ObservationReceiver()
+
         self.tasks = []
         self.is_processing_observation = False
         self.is_processing_observation_lock = asyncio.Lock()
+        self.pending_observation: Message[JsonObj] | None = None
 
     async def event_loop(self) -> None:
         """
@@ -539,13 +556,23 @@ class SimulatedUserNode(BaseNode[JsonObj, JsonObj]):
         self.tasks = []
         async for input_channel, input_message in self._wait_for_input():
             if input_channel == f"{self.env_uuid}/{self.node_name}/observation":
+                # Apply every observation delta, even if the observation is superseded below
+                input_message = await receive_observation(
+                    publish=self.publish,
+                    receiver=self.observation_receiver,
+                    ack_channel=f"{self.env_uuid}/{self.node_name}/observation_ack",
+                    input_message=input_message,
+                )
+                if input_message is None:
+                    continue
                 async with self.is_processing_observation_lock:
                     if self.is_processing_observation:
+                        self.pending_observation = input_message
                         continue
                     self.is_processing_observation = True
                 # Run the event handler in a separate task
                 task = asyncio.create_task(
-                    self.handle_event(input_channel, input_message)
+                    self.process_observations(input_channel, input_message)
                 )
                 self.tasks.append(task)
             else:
@@ -553,11 +580,36 @@ class SimulatedUserNode(BaseNode[JsonObj, JsonObj]):
 
         await asyncio.gather(*self.tasks)
 
+    async def process_observations(
+        self, input_channel: str, input_message: Message[JsonObj]
+    ):
+        """
+        Handle an observation, then the latest one received in the meantime, until none is
+        pending.
+
+        Observations received before the node publishes an action the environment replies
+        to (see `expects_observation_reply`) are discarded: they lack the effect of that
+        action, and the reply replaces them.
+        """
+        while input_message is not None:
+            async for output_channel, output_message in self.event_handler(
+                input_channel, input_message
+            ):
+                if output_channel == f"{self.env_uuid}/step" and expects_observation_reply(
+                    output_message.data.object["action"]
+                ):
+                    async with self.is_processing_observation_lock:
+                        self.pending_observation = None
+                await self.publish(output_channel, output_message)
+            async with self.is_processing_observation_lock:
+                input_message, self.pending_observation = self.pending_observation, None
+                self.is_processing_observation = input_message is not None
+
     async def handle_event(self, input_channel, input_message):
         async for output_channel, output_message in self.event_handler(
             input_channel, input_message
         ):
-            await self.r.publish(output_channel, output_message.model_dump_json())
+            await self.publish(output_channel, output_message)
 
     async def event_handler(
         self, input_channel: str, input_message: Message[JsonObj]
@@ -605,5 +657,3 @@ class SimulatedUserNode(BaseNode[JsonObj, JsonObj]):
             yield f"{self.env_uuid}/step", Message[JsonObj](
                 data=JsonObj(object=payload)
             )
-            async with self.is_processing_observation_lock:
-                self.is_processing_observation = False
@@ -1,13 +1,19 @@
 import asyncio
+import copy
+import functools
 import json
 import os
 import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import AsyncIterator, Literal, Union
 
-from aact import NodeFactory, Node, Message
+from aact import NodeFactory, Message
+from pydantic import BaseModel, Field
 
 from collaborative_gym.core import (
+    CoEnv,
     SendTeammateMessage,
     WaitTeammateContinue,
     logger,
@@ -19,7 +25,24 @@ from collaborative_gym.core import (
 )
 from collaborative_gym.envs import EnvConfig, EnvFactory
 from collaborative_gym.nodes.base_node import BaseNode
-from collaborative_gym.nodes.commons import JsonObj
+from collaborative_gym.nodes.codecs import DEFAULT_CODEC
+from collaborative_gym.nodes.commons import (
+    content_hash,
+    JsonObj,
+    PreEncodedMessage,
+    encode_json_obj_messages,
+)
+from collaborative_gym.nodes.observation_sync import (
+    ObservationPublisher,
+    make_observation_state,
+)
+from collaborative_gym.nodes.tracing import LATENCY_FILE_NAME, LatencyRecorder
+from collaborative_gym.nodes.transports import SharedPubSub
+from collaborative_gym.utils.event_log import (
+    EVENT_LOG_FILE_NAME,
+    EventLogEncoder,
+    EventLogWriter,
+)
 from collaborative_gym.utils.time import get_formatted_local_time
 
 if sys.version_info >= (3, 11):
@@ -27,6 +50,34 @@ if sys.version_info >= (3, 11):
 else:
     from typing_extensions import Self
 
+# Seconds a stopped session waits for its running step before closing the environment
+STEP_SHUTDOWN_TIMEOUT = 30
+
+
+class StepStats(BaseModel):
+    """
+    Running action counters of a collaboration session, updated once per logged event.
+
+    Attributes:
+        agent_action_cnt: Number of actions taken by agent roles (role name contains "agent")
+        user_action_cnt: Number of actions taken by user roles (role name contains "user")
+        role_action_cnt: Number of actions taken by each role
+        action_type_cnt: Number of actions of each action type ("collaborative", "environment")
+    """
+
+    agent_action_cnt: int = 0
+    user_action_cnt: int = 0
+    role_action_cnt: dict[str, int] = Field(default_factory=dict)
+    action_type_cnt: dict[str, int] = Field(default_factory=dict)
+
+    def record(self, role: str, action_type: str):
+        if "agent" in role:
+            self.agent_action_cnt += 1
+        if "user" in role:
+            self.user_action_cnt += 1
+        self.role_action_cnt[role] = self.role_action_cnt.get(role, 0) + 1
+        self.action_type_cnt[action_type] = self.action_type_cnt.get(action_type, 0) + 1
+
 
 @NodeFactory.register("task_env")
 class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
@@ -45,8 +96,11 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
         env: The actual environment instance being managed
         team_members: List of team member names/roles
         event_log: List of action records with timestamps and outcomes
+        step_stats: Per-role and per-action-type action counters, published in observation info
         chat_history: List of communication messages between team members
         pending_confirmations: Dictionary of pending confirmation requests
+        observation_publisher: Versioned observation delta bookkeeping per team member
+        observation_codec: Wire codec of the observation channels (see `collaborative_gym.nodes.codecs`)
         result_dir: Directory for storing task results and logs
         collaboration_acts: Available collaboration actions (message, wait)
         disable_collaboration: Flag to disable collaboration features
@@ -56,6 +110,15 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
         max_tick_cnt: Maximum allowed ticks before timeout
         last_step_timestamp: Time of last environment step
         max_steps: Maximum allowed steps per agent type
+        start_action_space: Action space sent to team members at the start of the task
+        action_space: Full action space (environment and collaboration actions) sent with the state
+        observation_type: Rendering type of each observation field
+        descriptor_hash: Content hash of action_space and observation_type, cached by members
+        event_log_encoder: Delta encoder for event_log.jsonl (keyframe every event_log_keyframe_interval events)
+        event_log_writer: Buffered writer holding the open event_log.jsonl handle
+        latency_recorder: Per-hop latency histograms of the session, written next to event_log.jsonl
+        partial_obs_interval: Seconds between two messages forwarding the partial observations
+            emitted while a step runs (see `step_env`)
     """
 
     def __init__(
@@ -68,7 +131,14 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
         tick_interval: float = 60,
         max_tick_cnt: int = 5,
         result_dir: str = "./workdir/results",
+        event_log_keyframe_interval: int = 20,
+        event_log_flush_interval: float = 1.0,
+        event_log_fsync_policy: str = "never",
+        observation_codec: str = DEFAULT_CODEC,
+        compression_threshold: int | None = 64 * 1024,
+        partial_obs_interval: float = 0.2,
         redis_url: str = "redis://localhost:6379/0",
+        shared_pubsub: SharedPubSub | None = None,
     ):
         super().__init__(
             input_channel_types=[
@@ -79,11 +149,16 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                 (f"{env_uuid}/{node_name}/request_state", JsonObj)
                 for node_name in team_members
                 # For frontend update
+            ]
+            + [
+                (f"{env_uuid}/{node_name}/observation_ack", JsonObj)
+                for node_name in team_members
             ],
             output_channel_types=[
                 # (f"{env_uuid}/observation", JsonObj),
                 (f"{env_uuid}/start", JsonObj),
                 (f"{env_uuid}/end", JsonObj),
+                (f"{env_uuid}/partial_observation", JsonObj),
             ]
             + [
                 (f"{env_uuid}/{node_name}/observation", JsonObj)
@@ -95,6 +170,9 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                 # For frontend update
             ],
             redis_url=redis_url,
+            channel_codecs={f"{env_uuid}/*/observation": observation_codec},
+            compression_threshold=compression_threshold,
+            shared_pubsub=shared_pubsub,
         )
         if type(env_config) is dict:
             env_config = EnvConfig(**env_config)
@@ -107,17 +185,33 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
         )
         self.team_members = team_members
         # [{'role': ..., 'timestamp': ..., 'action': ..., 'action_status': ..., 'action_type': ...}, ...]
+        # The chat history and observation at each event are only kept (delta-encoded) in event_log.jsonl.
         self.event_log = []
+        self.step_stats = StepStats()
+        self.event_log_encoder = EventLogEncoder(
+            keyframe_interval=event_log_keyframe_interval
+        )
         # [{'role': ..., 'timestamp': ..., 'message': ...}, ...]
         self.chat_history = []
         # request_id -> {requester, timestamp, pending_action}
         self.pending_confirmations: dict[str, dict] = {}
+        self.observation_publisher = ObservationPublisher(team_members=team_members)
+        self.observation_codec = observation_codec
+        # (observation, observation version, deep copy) of the latest observation snapshot
+        self._obs_snapshot: tuple[dict, int, dict] | None = None
         self.result_dir = result_dir
         os.makedirs(os.path.join(self.result_dir, self.env_uuid), exist_ok=True)
-        with open(
-            os.path.join(self.result_dir, self.env_uuid, "event_log.jsonl"), "w"
-        ) as f:
-            f.write("")
+        self.event_log_writer = EventLogWriter(
+            event_log_path=os.path.join(
+                self.result_dir, self.env_uuid, EVENT_LOG_FILE_NAME
+            ),
+            flush_interval=event_log_flush_interval,
+            fsync_policy=event_log_fsync_policy,
+        )
+        self.latency_recorder = LatencyRecorder()
+        self.partial_obs_interval = partial_obs_interval
+        # Runs the blocking calls to the environment (see `run_env`), created on first use
+        self._env_executor: ThreadPoolExecutor | None = None
 
         self.collaboration_acts = {
             "send_teammate_message": SendTeammateMessage(),
@@ -131,6 +225,25 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
         self.disable_collaboration = disable_collaboration
         self.agent_asleep = False
 
+        # Descriptors are static for a session, so they are computed once. Members send back
+        # the descriptor hash with request_state to skip receiving them again.
+        env_action_space = self.env.dump_action_space()
+        self.start_action_space = list(env_action_space)
+        self.action_space = list(env_action_space)
+        if not self.disable_collaboration:
+            # Add two core collaboration actions to the action space sent at the start
+            self.start_action_space += [
+                self.collaboration_acts["send_teammate_message"].dump_json(),
+                self.collaboration_acts["wait_teammate_continue"].dump_json(),
+            ]
+            self.action_space += [
+                action.dump_json() for action in self.collaboration_acts.values()
+            ]
+        self.observation_type = self.env.obs_type()
+        self.descriptor_hash = content_hash(
+            {"action_space": self.action_space, "observation_type": self.observation_type}
+        )
+
         self.task_completed = False
 
         self.tick_interval = tick_interval
@@ -153,28 +266,107 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                 "action": action,
                 "action_status": action_status,
                 "action_type": action_type,
-                "current_chat_history": self.chat_history,
-                "current_observation": self.env.get_obs(),
             }
         )
-        with open(
-            os.path.join(self.result_dir, self.env_uuid, "event_log.jsonl"), "a"
-        ) as f:
-            f.write(json.dumps(self.event_log[-1]) + "\n")
+        self.step_stats.record(role=role, action_type=action_type)
+        self.event_log_writer.write(
+            self.event_log_encoder.encode(
+                record=self.event_log[-1],
+                chat_history=self.chat_history,
+                observation=self.get_obs_snapshot(),
+                copy_observation=False,
+            )
+        )
 
     def count_agent_action(self):
-        agent_action_cnt = 0
-        for e in self.event_log:
-            if "agent" in e["role"]:
-                agent_action_cnt += 1
-        return agent_action_cnt
+        return self.step_stats.agent_action_cnt
 
     def count_user_action(self):
-        user_action_cnt = 0
-        for e in self.event_log:
-            if "user" in e["role"]:
-                user_action_cnt += 1
-        return user_action_cnt
+        return self.step_stats.user_action_cnt
+
+    def info_with_step_stats(self, info: dict) -> dict:
+        return {**info, "step_stats": self.step_stats.model_dump()}
+
+    def get_obs_snapshot(self, obs: dict | None = None) -> dict:
+        """
+        Deep copy of the environment observation that later steps will not mutate.
+
+        Environments relying on the cached `CoEnv.get_obs` return the same observation until
+        `obs_version` changes, so the copy is only taken once per observation version.
+
+        Args:
+            obs: Observation returned by the environment (defaults to `self.env.get_obs()`)
+
+        Returns:
+            The snapshot, shared between callers and never mutated
+        """
+        if obs is None:
+            obs = self.env.get_obs()
+        if (
+            self._obs_snapshot is not None
+            and self._obs_snapshot[0] is obs
+            and self._obs_snapshot[1] == self.env.obs_version
+        ):
+            return self._obs_snapshot[2]
+        snapshot = copy.deepcopy(obs)
+        if type(self.env).get_obs is CoEnv.get_obs:
+            self._obs_snapshot = (obs, self.env.obs_version, snapshot)
+        return snapshot
+
+    def make_observation_messages(
+        self, roles: list[str], obs: dict, reward, info: dict
+    ) -> dict[str, Union[PreEncodedMessage, Message[JsonObj]]]:
+        """
+        Create the (delta-encoded) observation messages for several team members at once.
+
+        The observation is snapshotted once per version and the public part is shared by all members,
+        so it is also serialized only once when the messages are encoded with a JSON codec.
+        Messages for channels using a binary codec (or handed over in process) are left
+        as `Message[JsonObj]`.
+
+        Args:
+            roles: Team members to notify
+            obs: Raw observation dictionary with 'public' and 'private' sections
+            reward: Reward of the step
+            info: Auxiliary information of the step
+
+        Returns:
+            Dictionary mapping each role to its encoded observation message
+        """
+        processed_obs = self.process_observation(self.get_obs_snapshot(obs))
+        observation_type = self.observation_type
+        chat_history = list(self.chat_history)
+        pending_confirmations = copy.deepcopy(self.pending_confirmations)
+        info = self.info_with_step_stats(info)
+        payloads = {
+            role: self.observation_publisher.make_payload(
+                member=role,
+                state=make_observation_state(
+                    observation=processed_obs[role],
+                    observation_type=observation_type,
+                    chat_history=chat_history,
+                    pending_confirmations=pending_confirmations,
+                    agent_asleep=self.agent_asleep,
+                ),
+                reward=reward,
+                info=info,
+            )
+            for role in roles
+        }
+        json_payloads = {
+            role: payload
+            for role, payload in payloads.items()
+            if self.get_channel_codec(f"{self.env_uuid}/{role}/observation").is_json
+            and not self.channel_transport.passes_messages
+        }
+        messages = {
+            role: PreEncodedMessage(json_bytes)
+            for role, json_bytes in encode_json_obj_messages(json_payloads).items()
+        }
+        for role, payload in payloads.items():
+            if role not in messages:
+                messages[role] = Message[JsonObj](data=JsonObj(object=payload))
+        return messages
 
     def add_message_to_chat_history(self, role: str, message: str):
         self.chat_history.append(
@@ -227,17 +419,117 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
             for role in self.team_members
         }
 
+    async def run_env(self, func, *args, **kwargs):
+        """
+        Run a blocking call to the environment (reset, step, evaluation, close) in the
+        worker thread of the node, so that the event loop (shared with other sessions in an
+        env host) keeps running. Calls run one at a time, in the order they are made.
+
+        Returns:
+            The return value of `func`
+        """
+        if self._env_executor is None:
+            self._env_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"env-{self.env_uuid}"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._env_executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def step_env(self, role: str, action: str):
+        """
+        Run `env.step` (see `run_env`), forwarding the partial observations it emits while
+        it runs.
+
+        Partial observations emitted during the step are batched and published on the
+        partial_observation channel every `partial_obs_interval` seconds. Those not
+        published when the step returns are dropped, since the observation of the step
+        replaces them.
+
+        Returns:
+            The return value of `env.step`
+        """
+        if not self.env.streams_partial_obs:
+            return await self.run_env(self.env.step, role=role, action=action)
+        pending = deque()  # Appended to by the worker thread
+        step_done = asyncio.Event()
+
+        async def forward_partial_obs():
+            while not step_done.is_set():
+                updates = []
+                while pending:
+                    updates.append(pending.popleft())
+                if updates:
+                    await self.publish(
+                        f"{self.env_uuid}/partial_observation",
+                        Message[JsonObj](data=JsonObj(object={"updates": updates})),
+                    )
+                try:
+                    await asyncio.wait_for(
+                        step_done.wait(), timeout=self.partial_obs_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+        self.env.set_partial_obs_listener(
+            lambda key, update: pending.append({"key": key, **update})
+        )
+        forwarder = asyncio.create_task(forward_partial_obs())
+        try:
+            return await self.run_env(self.env.step, role=role, action=action)
+        finally:
+            self.env.set_partial_obs_listener(None)
+            step_done.set()
+            await forwarder
+
     async def end(self):
         self.task_completed = True
-        task_performance = self.env.evaluate_task_performance()
+        task_performance = await self.run_env(self.env.evaluate_task_performance)
         os.makedirs(os.path.join(self.result_dir, self.env_uuid), exist_ok=True)
         with open(
             os.path.join(self.result_dir, self.env_uuid, "task_performance.json"), "w"
         ) as f:
             json.dump(task_performance, f, indent=4)
-        self.env.close()
+        self.latency_recorder.write(
+            os.path.join(self.result_dir, self.env_uuid, LATENCY_FILE_NAME)
+        )
+        await self.run_env(self.env.close)
+        await self.event_log_writer.close()
         await self.delete_process_record()
 
+    async def __aenter__(self) -> Self:
+        await super().__aenter__()
+        self.event_log_writer.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            if self._env_executor is not None:
+                # A session stopped during a step leaves the step running in the worker
+                # thread; let it finish (up to STEP_SHUTDOWN_TIMEOUT seconds) before closing
+                # the environment under it.
+                self._env_executor.shutdown(wait=False, cancel_futures=True)
+                try:
+                    await asyncio.wait_for(
+                        loop.run_in_executor(None, self._env_executor.shutdown),
+                        timeout=STEP_SHUTDOWN_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Step of {self.env_uuid} still running after "
+                        f"{STEP_SHUTDOWN_TIMEOUT} seconds; closing the environment."
+                    )
+            if not self.task_completed:
+                # Stopped before the end; free the resources of the environment (e.g. its
+                # Jupyter container) as env hosts keep running after the session.
+                await loop.run_in_executor(None, self.env.close)
+        finally:
+            try:
+                await self.event_log_writer.close()
+            finally:
+                await super().__aexit__(*args)
+
     async def event_loop(
         self,
     ) -> None:
@@ -252,19 +544,12 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
             None
         """
         # Reset the environment
-        obs, info = self.env.reset()
-        action_space = self.env.dump_action_space()
-        if not self.disable_collaboration:
-            # Add two core collaboration actions to the action space
-            action_space += [
-                self.collaboration_acts["send_teammate_message"].dump_json(),
-                self.collaboration_acts["wait_teammate_continue"].dump_json(),
-            ]
+        obs, info = await self.run_env(self.env.reset)
 
         # Indicate the start of the task
         payload = {
             "task_description": self.env.task_description,
-            "action_space": action_space,
+            "action_space": self.start_action_space,
             "team_members": self.team_members,
             "example_question": self.env.example_question,  # For agent
             "example_trajectory": self.env.example_trajectory,  # For agent
@@ -284,29 +569,17 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
             action_status="succeeded",
             action_type="environment",
         )
-        await self.r.publish(
-            f"{self.env_uuid}/start",
-            Message[JsonObj](data=JsonObj(object=payload)).model_dump_json(),
+        await self.publish(
+            f"{self.env_uuid}/start", Message[JsonObj](data=JsonObj(object=payload))
         )
 
         # Broadcast the initial observation
-        processed_obs = self.process_observation(obs)
-        for role in self.team_members:
-            payload = {
-                "observation": processed_obs[role],
-                "observation_type": self.env.obs_type(),
-                "reward": 0,
-                "info": info,
-                "chat_history": self.chat_history,
-                "pending_confirmations": self.pending_confirmations,
-                "agent_asleep": self.agent_asleep,
-            }
-            await self.r.publish(
-                f"{self.env_uuid}/{role}/observation",
-                Message[JsonObj](data=JsonObj(object=payload)).model_dump_json(),
-            )
+        messages = self.make_observation_messages(
+            roles=self.team_members, obs=obs, reward=0, info=info
+        )
+        for role, message in messages.items():
+            await self.publish(f"{self.env_uuid}/{role}/observation", message)
 
-        await asyncio.sleep(1)
         self.last_step_timestamp = time.time()
         await super().event_loop()
 
@@ -316,10 +589,11 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
         """
         Process incoming messages and generate appropriate responses.
 
-        Handles three types of messages:
+        Handles four types of messages:
         1. Step: Process actions from team members, update environment state
         2. Tick: Check for timeouts and send notifications
-        3. Request State: Respond to frontend state queries
+        3. Observation Ack: Track acknowledged observation versions and answer resync requests
+        4. Request State: Respond to frontend state queries
 
         Args:
             input_channel: The Redis channel receiving the message
@@ -399,7 +673,7 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                         action_type="collaborative",
                     )
                     # Execute the pending action
-                    obs, reward, terminated, private, info = self.env.step(
+                    obs, reward, terminated, private, info = await self.step_env(
                         role=confirmation["requester"],
                         action=confirmation["pending_action"],
                     )
@@ -457,7 +731,7 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                     print("Agent is awake now.")
                 else:
                     # Process environment actions
-                    obs, reward, terminated, private, info = self.env.step(
+                    obs, reward, terminated, private, info = await self.step_env(
                         role=role, action=action_str
                     )
                     action_status = "succeeded" if reward >= 0 else "failed"
@@ -475,8 +749,8 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                     )
 
                 if (
-                    self.count_agent_action() >= self.max_steps
-                    or self.count_user_action() >= self.max_steps
+                    self.step_stats.agent_action_cnt >= self.max_steps
+                    or self.step_stats.user_action_cnt >= self.max_steps
                 ):
                     terminated = True
 
@@ -493,44 +767,31 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                     )
                     raise asyncio.CancelledError
                 else:
-                    processed_obs = self.process_observation(obs)
                     if not private:
-                        for team_member in self.team_members:
-                            if (notify_others_only and team_member == role) or (
-                                self.agent_asleep and "agent" in team_member
-                            ):
-                                continue
-                            payload = {
-                                "observation": processed_obs[team_member],
-                                "observation_type": self.env.obs_type(),
-                                "reward": reward,
-                                "info": info,
-                                "chat_history": self.chat_history,
-                                "pending_confirmations": self.pending_confirmations,
-                                "agent_asleep": self.agent_asleep,
-                            }
+                        recipients = [
+                            team_member
+                            for team_member in self.team_members
+                            if not (
+                                (notify_others_only and team_member == role)
+                                or (self.agent_asleep and "agent" in team_member)
+                            )
+                        ]
+                        messages = self.make_observation_messages(
+                            roles=recipients, obs=obs, reward=reward, info=info
+                        )
+                        for team_member, message in messages.items():
                             logger.info(
                                 f"EnvNode ({self.env_uuid}): sending notification to {team_member} with new observation"
                             )
-                            yield f"{self.env_uuid}/{team_member}/observation", Message[
-                                JsonObj
-                            ](data=JsonObj(object=payload))
+                            yield f"{self.env_uuid}/{team_member}/observation", message
                     else:
-                        payload = {
-                            "observation": processed_obs[role],
-                            "observation_type": self.env.obs_type(),
-                            "reward": reward,
-                            "info": info,
-                            "chat_history": self.chat_history,
-                            "pending_confirmations": self.pending_confirmations,
-                            "agent_asleep": self.agent_asleep,
-                        }
+                        messages = self.make_observation_messages(
+                            roles=[role], obs=obs, reward=reward, info=info
+                        )
                         logger.info(
                             f"EnvNode ({self.env_uuid}): sending observation to {role} with new observation"
                         )
-                        yield f"{self.env_uuid}/{role}/observation", Message[JsonObj](
-                            data=JsonObj(object=payload)
-                        )
+                        yield f"{self.env_uuid}/{role}/observation", messages[role]
                 self.last_step_timestamp = time.time()
                 await self.update_last_active_time()
             elif input_channel == f"{self.env_uuid}/tick":
@@ -557,41 +818,52 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
                         message="Idle for a long time. The agent should take an action. The user can also send a message.",
                     )
                     # If no action is taken for a long time, send a tick message
-                    processed_obs = self.process_observation(self.env.get_obs())
-                    for team_member in self.team_members:
-                        if self.agent_asleep and "agent" in team_member:
-                            continue
-                        payload = {
-                            "observation": processed_obs[team_member],
-                            "observation_type": self.env.obs_type(),
-                            "reward": 0,
-                            "info": {},
-                            "chat_history": self.chat_history,
-                            "pending_confirmations": self.pending_confirmations,
-                            "agent_asleep": self.agent_asleep,
-                        }
-                        yield f"{self.env_uuid}/{team_member}/observation", Message[
-                            JsonObj
-                        ](data=JsonObj(object=payload))
+                    messages = self.make_observation_messages(
+                        roles=[
+                            team_member
+                            for team_member in self.team_members
+                            if not (self.agent_asleep and "agent" in team_member)
+                        ],
+                        obs=self.env.get_obs(),
+                        reward=0,
+                        info={},
+                    )
+                    for team_member, message in messages.items():
+                        yield f"{self.env_uuid}/{team_member}/observation", message
                     self.last_step_timestamp = time.time()
                     await self.update_last_active_time()
+            elif input_channel.endswith("/observation_ack"):
+                role = input_channel.split("/")[-2]
+                if input_message.data.object.get("resync"):
+                    payload = self.observation_publisher.make_snapshot_payload(role)
+                    if payload is not None:
+                        logger.info(
+                            f"EnvNode ({self.env_uuid}): resending full observation to {role}"
+                        )
+                        yield f"{self.env_uuid}/{role}/observation", Message[JsonObj](
+                            data=JsonObj(object=payload)
+                        )
+                else:
+                    self.observation_publisher.ack(
+                        member=role, version=input_message.data.object["version"]
+                    )
             elif "request_state" in input_channel:  # For frontend update
                 role = input_channel.split("/")[-2]
-                action_space = self.env.dump_action_space()
-                if not self.disable_collaboration:
-                    action_space += [
-                        action.dump_json()
-                        for action in self.collaboration_acts.values()
-                    ]
                 payload = {
                     "observation": self.process_observation(self.env.get_obs())[role],
-                    "observation_type": self.env.obs_type(),
                     "task_description": self.env.task_description,
-                    "action_space": action_space,
+                    "descriptor_hash": self.descriptor_hash,
                     "chat_history": self.chat_history,
                     "pending_confirmations": self.pending_confirmations,
                     "agent_asleep": self.agent_asleep,
                 }
+                # Only send the descriptors if the member does not have them cached
+                if (
+                    input_message.data.object.get("descriptor_hash")
+                    != self.descriptor_hash
+                ):
+                    payload["observation_type"] = self.observation_type
+                    payload["action_space"] = self.action_space
                 await self.update_last_active_time()
                 yield f"{self.env_uuid}/{role}/answer_state", Message[JsonObj](
                     data=JsonObj(object=payload)
@@ -601,7 +873,7 @@ class TaskEnvNode(BaseNode[JsonObj, JsonObj]):
 
 
 @NodeFactory.register("env_tick")
-class TaskEnvTickNode(Node[JsonObj, JsonObj]):
+class TaskEnvTickNode(BaseNode[JsonObj, JsonObj]):
     """
     Auxiliary node that manages timeouts and deadlock prevention in collaborative tasks.
 
@@ -622,15 +894,23 @@ class TaskEnvTickNode(Node[JsonObj, JsonObj]):
         env_uuid: str,
         tick_interval: float = 30,
         redis_url: str = "redis://localhost:6379/0",
+        shared_pubsub: SharedPubSub | None = None,
     ):
         super().__init__(
             input_channel_types=[(f"{env_uuid}/end", JsonObj)],
             output_channel_types=[(f"{env_uuid}/tick", JsonObj)],
             redis_url=redis_url,
+            shared_pubsub=shared_pubsub,
         )
         self.env_uuid = env_uuid
         self.tick_interval = tick_interval
 
+    async def update_last_active_time(self):
+        pass  # Lives as long as the environment node, so it is not tracked for inactivity
+
+    async def delete_process_record(self):
+        pass
+
     async def tick_at_given_interval(self, channel: str, interval: float) -> None:
         """
         Send periodic tick messages with adaptive timing.
@@ -649,9 +929,7 @@ class TaskEnvTickNode(Node[JsonObj, JsonObj]):
         last: float | None = None
         last_sleep = interval
         while True:
-            await self.r.publish(
-                channel, Message[JsonObj](data=JsonObj(object={})).model_dump_json()
-            )
+            await self.publish(channel, Message[JsonObj](data=JsonObj(object={})))
             tick_count += 1
             now = time.time()
             if last is not None:
@@ -664,10 +942,9 @@ class TaskEnvTickNode(Node[JsonObj, JsonObj]):
         tick_channel = f"{self.env_uuid}/tick"
 
         async def listen_for_end():
-            async for message in self.pubsub.listen():
-                if message["type"] == "message":
-                    if message["channel"].decode("utf-8") == end_channel:
-                        raise asyncio.CancelledError
+            async for input_channel, _ in self._wait_for_input():
+                if input_channel == end_channel:
+                    raise asyncio.CancelledError
 
         async def tick_loop():
             await self.tick_at_given_interval(tick_channel, self.tick_interval)
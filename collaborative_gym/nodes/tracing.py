@@ -0,0 +1,215 @@
+"""
+Latency tracing of the messages exchanged by nodes.
+
+Every `JsonObj` message published by a node carries a `TraceContext`: the trace it belongs
+to, its own span id, the id of the span (received message) that caused it, and when it was
+published. The receiving side of that cause (when it was published, received, and handed
+to the event handler) travels along as `upstream`, so the node at the end of a round trip
+can measure every hop of it without any clock other than the message timestamps.
+
+`TaskEnvNode` sits at the end of every round trip (observation -> team member -> step) and
+aggregates these timings into the per-session histograms of `LatencyRecorder`, written to
+`LATENCY_FILE_NAME` next to event_log.jsonl.
+"""
+
+import json
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import ClassVar, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+LATENCY_FILE_NAME = "latency.json"
+
+
+def new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def channel_kind(channel: str) -> str:
+    """Channel name without the environment prefix, e.g. "agent/observation" or "step"."""
+    return channel.split("/", 1)[1] if "/" in channel else channel
+
+
+class SpanTiming(BaseModel):
+    """
+    Timestamps of a message on the receiving side.
+
+    Attributes:
+        channel: Channel the message was received on
+        node: Name of the receiving node
+        span_id: Span of the message (None for untraced messages)
+        published_at: When the message was published (None for untraced messages)
+        received_at: When the frame was taken from the transport
+        handler_started_at: When the decoded message was handed to the event handler
+    """
+
+    channel: str
+    node: str
+    span_id: Optional[str] = None
+    published_at: Optional[float] = None
+    received_at: float
+    handler_started_at: float
+
+
+class TraceContext(BaseModel):
+    """
+    Trace information stamped on a message when it is published.
+
+    Attributes:
+        trace_id: Identifier shared by all messages caused by the same original message
+        span_id: Identifier of this message
+        parent_span_id: Span of the message being handled when this one was published
+        node: Name of the publishing node
+        published_at: Publication time (seconds since the epoch)
+        upstream: Receiving side of the parent message
+    """
+
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    node: str
+    published_at: float
+    upstream: Optional[SpanTiming] = None
+
+
+class Span(BaseModel):
+    """Message being handled by a node: its trace (if any) and its receiving side."""
+
+    trace_id: str
+    received: Optional[TraceContext] = None
+    timing: SpanTiming
+
+
+CURRENT_SPAN: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def start_span(
+    node: str, channel: str, trace: Optional[TraceContext], received_at: float
+) -> Span:
+    """Make a received message the current span of the task handling it."""
+    span = Span(
+        trace_id=trace.trace_id if trace is not None else new_span_id(),
+        received=trace,
+        timing=SpanTiming(
+            channel=channel,
+            node=node,
+            span_id=trace.span_id if trace is not None else None,
+            published_at=trace.published_at if trace is not None else None,
+            received_at=received_at,
+            handler_started_at=time.time(),
+        ),
+    )
+    CURRENT_SPAN.set(span)
+    return span
+
+
+def make_trace_context(node: str) -> TraceContext:
+    """Trace context for a message published now, as a child of the current span."""
+    span = CURRENT_SPAN.get()
+    return TraceContext(
+        trace_id=span.trace_id if span is not None else new_span_id(),
+        span_id=new_span_id(),
+        parent_span_id=span.timing.span_id if span is not None else None,
+        node=node,
+        published_at=time.time(),
+        upstream=span.timing if span is not None else None,
+    )
+
+
+class LatencyHistogram(BaseModel):
+    """Histogram of durations over fixed, roughly logarithmic buckets (in milliseconds)."""
+
+    BUCKET_BOUNDS_MS: ClassVar[list[float]] = [
+        1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000
+    ]
+
+    counts: list[int] = Field(
+        default_factory=lambda: [0] * (len(LatencyHistogram.BUCKET_BOUNDS_MS) + 1)
+    )
+    count: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+
+    def record(self, seconds: float):
+        ms = max(seconds, 0) * 1000
+        self.counts[bisect_left(self.BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (max_ms for the last bucket)."""
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKET_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank and seen > 0:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "bucket_bounds_ms": self.BUCKET_BOUNDS_MS,
+            "counts": self.counts,
+        }
+
+
+class LatencyRecorder(BaseModel):
+    """
+    Per-session latency histograms, keyed by "<channel kind>:<stage>".
+
+    Stages of a message: "transport" (published -> received, including the time spent
+    waiting for a busy node to read it), "decode" (received ->
+    handler started) and "handler" (handler started -> handler done). For messages
+    handled by other nodes, the handler is measured up to each kind of reply, e.g.
+    "agent/observation->step:reply" covers the agent's LM call.
+    """
+
+    histograms: dict[str, LatencyHistogram] = {}
+    _recorded_upstream: set[str] = PrivateAttr(default_factory=set)
+
+    def record(self, key: str, seconds: float):
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram()
+        self.histograms[key].record(seconds)
+
+    def record_delivery(self, timing: SpanTiming):
+        kind = channel_kind(timing.channel)
+        if timing.published_at is not None:
+            self.record(f"{kind}:transport", timing.received_at - timing.published_at)
+        self.record(f"{kind}:decode", timing.handler_started_at - timing.received_at)
+
+    def record_span(self, span: Span, handler_ended_at: float):
+        """Record a message handled by this node and, from its trace, the hop that caused it."""
+        kind = channel_kind(span.timing.channel)
+        self.record_delivery(span.timing)
+        self.record(f"{kind}:handler", handler_ended_at - span.timing.handler_started_at)
+        if span.received is None or span.received.upstream is None:
+            return
+        upstream = span.received.upstream
+        # Several replies (e.g. an observation ack, then a step) share the same upstream.
+        if upstream.span_id is None or upstream.span_id not in self._recorded_upstream:
+            if upstream.span_id is not None:
+                self._recorded_upstream.add(upstream.span_id)
+            self.record_delivery(upstream)
+        self.record(
+            f"{channel_kind(upstream.channel)}->{kind}:reply",
+            span.received.published_at - upstream.handler_started_at,
+        )
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            json.dump(
+                {key: h.summary() for key, h in sorted(self.histograms.items())},
+                f,
+                indent=4,
+            )
@@ -0,0 +1,417 @@
+"""
+Channel transports used by nodes to exchange encoded frames.
+
+"pubsub" (default): Redis pub/sub. Frames published while a node is not listening (busy
+    starting up, briefly disconnected) are lost.
+"memory": Asyncio queues within one process (see `collaborative_gym.in_process_runner`).
+    Messages are handed over as objects, without encoding, and Redis is not used at all.
+"streams": One Redis stream per channel, bounded to `maxlen` entries. Each subscribing
+    node reads through its own consumer group and acknowledges a frame once it asks
+    for the next one, so a restarted node first replays the frames it never finished
+    and then resumes from the last ID its group has seen. Frames wait in the stream
+    while a node is busy instead of being dropped.
+
+Nodes living in the same process as many others (the server creates one per websocket)
+can share a single pub/sub connection through `SharedPubSub` instead of opening their own.
+
+The transport is selected per deployment with the `COLLABORATIVE_GYM_TRANSPORT`
+environment variable, which the server, the runner and the node processes it spawns
+all inherit.
+"""
+
+import asyncio
+import os
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError, ResponseError
+
+from collaborative_gym.core import logger
+
+TRANSPORT_ENV_VAR = "COLLABORATIVE_GYM_TRANSPORT"
+DEFAULT_TRANSPORT = "pubsub"
+
+
+def get_transport_name(name: Optional[str] = None) -> str:
+    """Transport explicitly requested, otherwise the one configured for the deployment."""
+    return name or os.getenv(TRANSPORT_ENV_VAR, DEFAULT_TRANSPORT)
+
+
+class Transport:
+    """
+    Base class for channel transports.
+
+    Attributes:
+        name: Name used to select the transport
+        uses_redis: Whether the transport needs a Redis server
+        passes_messages: Whether messages are handed over as objects instead of encoded frames
+    """
+
+    name: str = ""
+    uses_redis: bool = True
+    passes_messages: bool = False
+
+    async def subscribe(self, channels: List[str]):
+        """Start receiving frames published on `channels`."""
+        raise NotImplementedError
+
+    async def publish(self, channel: str, data: Any):
+        """Publish an encoded frame (or a message if `passes_messages`) on `channel`."""
+        raise NotImplementedError
+
+    async def listen(self) -> AsyncIterator[tuple[str, Any]]:
+        """Yield (channel, frame or message) pairs for the subscribed channels."""
+        raise NotImplementedError
+        yield "", b""  # unreachable: makes this an async generator
+
+    async def close(self):
+        """Stop receiving frames."""
+        pass
+
+
+class PubSubTransport(Transport):
+    """Redis pub/sub, the original transport of the nodes."""
+
+    name = "pubsub"
+
+    def __init__(self, r: Redis):
+        self.r = r
+        self.pubsub = r.pubsub()
+
+    async def subscribe(self, channels: List[str]):
+        await self.pubsub.subscribe(*channels)
+
+    async def publish(self, channel: str, data: bytes | str):
+        await self.r.publish(channel, data)
+
+    async def listen(self) -> AsyncIterator[tuple[str, bytes | str]]:
+        async for message in self.pubsub.listen():
+            if message["type"] == "message":
+                yield message["channel"].decode("utf-8"), message["data"]
+        raise Exception("Input channel closed unexpectedly")
+
+    async def close(self):
+        await self.pubsub.unsubscribe()
+
+
+class StreamsTransport(Transport):
+    """
+    Redis Streams with consumer groups, acknowledgements and replay.
+
+    Attributes:
+        group: Consumer group of this node; nodes sharing a group split the frames between them
+        maxlen: Approximate maximum number of entries kept per stream
+        ttl: Seconds a stream is kept after its latest entry
+        block_ms: Maximum time in milliseconds a read blocks waiting for new entries
+        batch_size: Maximum number of entries read per stream and read call
+        start_id: Where a newly created group starts reading ("0" replays the whole stream)
+        ephemeral_group: Whether the group belongs to this transport only: a unique suffix is
+            appended to its name, it starts at the end of the streams (only frames published
+            after subscribing are received) and it is destroyed on close
+    """
+
+    name = "streams"
+    STREAM_KEY_PREFIX = "stream:"
+    DATA_FIELD = b"data"
+
+    def __init__(
+        self,
+        r: Redis,
+        group: Optional[str] = None,
+        maxlen: int = 1000,
+        ttl: int = 24 * 3600,
+        block_ms: int = 1000,
+        batch_size: int = 16,
+        start_id: str = "0",
+        ephemeral_group: bool = False,
+    ):
+        self.r = r
+        self.group = group
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self.block_ms = block_ms
+        self.batch_size = batch_size
+        self.start_id = start_id
+        self.ephemeral_group = ephemeral_group
+        if ephemeral_group:
+            if group is not None:
+                self.group = f"{group}:{uuid.uuid4().hex}"
+            self.start_id = "$"
+        self._keys: List[str] = []
+        # Only one consumer per group, so that a restarted node owns its unacknowledged entries.
+        self._consumer = "consumer"
+
+    def stream_key(self, channel: str) -> str:
+        return f"{self.STREAM_KEY_PREFIX}{channel}"
+
+    def channel_of(self, key: bytes | str) -> str:
+        if isinstance(key, bytes):
+            key = key.decode("utf-8")
+        return key[len(self.STREAM_KEY_PREFIX) :]
+
+    @staticmethod
+    def parse_entry_id(entry_id: bytes | str) -> tuple[int, int]:
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode("utf-8")
+        milliseconds, sequence = entry_id.split("-")
+        return int(milliseconds), int(sequence)
+
+    async def subscribe(self, channels: List[str]):
+        if self.group is None:
+            raise ValueError("A consumer group is required to subscribe to streams.")
+        for channel in channels:
+            key = self.stream_key(channel)
+            try:
+                await self.r.xgroup_create(key, self.group, id=self.start_id, mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._keys.append(key)
+
+    async def publish(self, channel: str, data: bytes | str):
+        key = self.stream_key(channel)
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {self.DATA_FIELD: data}, maxlen=self.maxlen, approximate=True)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def _read(self, last_ids: Dict[str, str]):
+        return await self.r.xreadgroup(
+            self.group,
+            self._consumer,
+            last_ids,
+            count=self.batch_size,
+            block=self.block_ms,
+        )
+
+    async def listen(self) -> AsyncIterator[tuple[str, bytes | str]]:
+        # Replay entries delivered to this group but never acknowledged, e.g. before a restart.
+        for key in self._keys:
+            while True:
+                response = await self._read({key: "0"})
+                entries = response[0][1] if response else []
+                if not entries:
+                    break
+                for entry_id, fields in entries:
+                    if fields:  # Entries trimmed from the stream come back empty
+                        yield self.channel_of(key), fields[self.DATA_FIELD]
+                    await self.r.xack(key, self.group, entry_id)
+        # Then read new entries. The consumer resumes the generator once it is done with
+        # an entry, which is when the entry gets acknowledged.
+        while True:
+            response = await self._read({key: ">" for key in self._keys})
+            # Entry IDs are publication times, so merging the streams by ID restores the
+            # order in which frames were published across channels.
+            batch = sorted(
+                (
+                    (self.parse_entry_id(entry_id), key, entry_id, fields)
+                    for key, entries in response or []
+                    for entry_id, fields in entries
+                ),
+                key=lambda item: item[0],
+            )
+            for _, key, entry_id, fields in batch:
+                yield self.channel_of(key), fields[self.DATA_FIELD]
+                await self.r.xack(key, self.group, entry_id)
+
+    async def close(self):
+        if not self.ephemeral_group:
+            return
+        for key in self._keys:
+            try:
+                await self.r.xgroup_destroy(key, self.group)
+            except ResponseError:
+                pass  # The stream expired
+
+
+class InMemoryBroker:
+    """
+    Process-local registry routing messages to the queues subscribed to each channel.
+
+    The broker is shared by the sessions that in-process runners run on several threads
+    (see `collaborative_gym.scheduler`), so its registry is guarded by a lock.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers[channel].append(queue)
+
+    def unsubscribe(self, queue: asyncio.Queue) -> List[str]:
+        """Remove a queue from all its channels; returns the channels left without subscribers."""
+        emptied = []
+        with self._lock:
+            for channel in list(self._subscribers):
+                self._subscribers[channel] = [
+                    q for q in self._subscribers[channel] if q is not queue
+                ]
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+                    emptied.append(channel)
+        return emptied
+
+    def has_subscribers(self, channel: str) -> bool:
+        with self._lock:
+            return channel in self._subscribers
+
+    def publish(self, channel: str, data: Any):
+        with self._lock:
+            queues = list(self._subscribers.get(channel, []))
+        for queue in queues:
+            queue.put_nowait((channel, data))
+
+
+DEFAULT_BROKER = InMemoryBroker()
+
+
+class InMemoryTransport(Transport):
+    """
+    Asyncio queues shared by the nodes running in the same process.
+
+    Messages are passed by reference to every subscriber, so they must not be mutated
+    after being published. Like pub/sub, messages published on a channel before a node
+    subscribes to it are not delivered to that node.
+    """
+
+    name = "memory"
+    uses_redis = False
+    passes_messages = True
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        self.broker = broker or DEFAULT_BROKER
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channels: List[str]):
+        for channel in channels:
+            self.broker.subscribe(channel, self.queue)
+
+    async def publish(self, channel: str, data: Any):
+        self.broker.publish(channel, data)
+
+    async def listen(self) -> AsyncIterator[tuple[str, Any]]:
+        while True:
+            yield await self.queue.get()
+
+    async def close(self):
+        self.broker.unsubscribe(self.queue)
+
+
+class SharedPubSub:
+    """
+    One Redis pub/sub connection shared by all the nodes of a process.
+
+    A single reader task routes every frame to the queues of the nodes subscribed to its
+    channel, and a Redis channel is only unsubscribed once its last node has left. Used
+    by the server, which creates a node per websocket, so that the number of pub/sub
+    connections does not grow with the number of sessions.
+
+    Attributes:
+        r: Redis client shared by the nodes, ideally backed by a bounded connection pool
+        pubsub: The shared pub/sub connection
+    """
+
+    def __init__(self, r: Redis):
+        self.r = r
+        self.pubsub = r.pubsub()
+        self._broker = InMemoryBroker()
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def subscribe(self, channels: List[str], queue: asyncio.Queue):
+        async with self._lock:
+            new_channels = [
+                channel
+                for channel in channels
+                if not self._broker.has_subscribers(channel)
+            ]
+            for channel in channels:
+                self._broker.subscribe(channel, queue)
+            if new_channels:
+                await self.pubsub.subscribe(*new_channels)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._route())
+
+    async def unsubscribe(self, queue: asyncio.Queue):
+        async with self._lock:
+            emptied = self._broker.unsubscribe(queue)
+            if emptied:
+                await self.pubsub.unsubscribe(*emptied)
+
+    async def _route(self):
+        # Polls with a timeout and checks for close, since cancelling a pending read is not
+        # reliably propagated by the Redis client.
+        while not self._closed:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except (ConnectionError, RedisConnectionError) as e:
+                # The pub/sub connection resubscribes to its channels when it reconnects.
+                logger.warning(f"Shared pub/sub connection lost: {e}. Reconnecting.")
+                await asyncio.sleep(1)
+                continue
+            if message is not None and message["type"] == "message":
+                self._broker.publish(message["channel"].decode("utf-8"), message["data"])
+
+    async def close(self):
+        self._closed = True
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self.pubsub.aclose()
+
+
+class SharedPubSubTransport(Transport):
+    """Pub/sub through a `SharedPubSub`; frames are the same as with `PubSubTransport`."""
+
+    name = PubSubTransport.name
+
+    def __init__(self, shared_pubsub: SharedPubSub):
+        self.shared_pubsub = shared_pubsub
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channels: List[str]):
+        await self.shared_pubsub.subscribe(channels, self.queue)
+
+    async def publish(self, channel: str, data: bytes | str):
+        await self.shared_pubsub.r.publish(channel, data)
+
+    async def listen(self) -> AsyncIterator[tuple[str, bytes | str]]:
+        while True:
+            yield await self.queue.get()
+
+    async def close(self):
+        await self.shared_pubsub.unsubscribe(self.queue)
+
+
+def make_transport(
+    name: str, r: Redis, group: Optional[str] = None, **kwargs
+) -> Transport:
+    """
+    Create a transport.
+
+    Args:
+        name: "pubsub", "streams" or "memory"
+        r: Redis client used by the transport (unused by the memory transport)
+        group: Consumer group of the subscribing node (streams only)
+        **kwargs: Additional StreamsTransport arguments
+
+    Returns:
+        The transport
+    """
+    if name == PubSubTransport.name:
+        return PubSubTransport(r)
+    if name == StreamsTransport.name:
+        return StreamsTransport(r, group=group, **kwargs)
+    if name == InMemoryTransport.name:
+        return InMemoryTransport()
+    raise ValueError(
+        f"Unknown transport {name!r}. Choose from "
+        f"{[PubSubTransport.name, StreamsTransport.name, InMemoryTransport.name]}."
+    )
@@ -3,21 +3,41 @@ import atexit
 import json
 import logging
 import os
+import shlex
 import signal
 import sys
 import time
 import uuid
 from subprocess import Popen
-from typing import List
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
+import redis
 import toml
 
 from collaborative_gym.core import TeamMemberConfig
+from collaborative_gym.env_host import EnvHostPool, HostedEnvSession
+from collaborative_gym.nodes.base_node import readiness_key
+
+if TYPE_CHECKING:
+    from collaborative_gym.node_pool import NodeWorkerPool, PooledProcess
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def split_module_command(command: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    Split a `python -m <module> <args>` node command into the module and its arguments.
+
+    Returns:
+        (module, args), or None if the command does not run a Python module
+    """
+    argv = shlex.split(command)
+    if len(argv) < 3 or argv[1] != "-m" or "python" not in os.path.basename(argv[0]):
+        return None
+    return argv[2], argv[3:]
+
+
 class Runner:
     """
     Manages human-agent collaboration sessions.
@@ -27,10 +47,23 @@ class Runner:
     processes, and ensuring proper cleanup on exit.
     It uses Redis for inter-process communication and maintains session state.
 
+    Team members are launched in parallel, and the environment is started as soon as
+    every member node has announced that it is subscribed to its channels (see
+    `BaseNode.announce_ready`), so that no start message or observation is missed.
+
     Attributes:
         result_dir: Directory for storing session results
         redis_url: URL for Redis connection used by team members
-        subprocesses: List of active subprocess handles
+        member_ready_timeout: Maximum time in seconds to wait for team members to be ready
+        node_pool: Pool of pre-warmed workers starting the nodes (see `collaborative_gym.node_pool`);
+            without one, every node is started as a new `python -m ...` process
+        env_host_pool: Hosts running the environment (and tick) nodes of many sessions in
+            one process (see `collaborative_gym.env_host`); without one, each session starts
+            its own environment node process
+        r: Redis client used to wait for readiness announcements
+        subprocesses: List of active subprocess handles (`Popen`, `PooledProcess` or
+            `HostedEnvSession`)
+        session_subprocesses: Subprocess handles of each session, by session UUID
         sessions: List of active session UUIDs
     """
 
@@ -38,12 +71,24 @@ class Runner:
         self,
         result_dir: str = "./workdir/results",
         redis_url: str = "redis://localhost:6379/0",
+        member_ready_timeout: float = 120,
+        node_pool: Optional["NodeWorkerPool"] = None,
+        env_host_pool: Optional[EnvHostPool] = None,
     ):
         if not os.path.exists(result_dir):
             os.makedirs(result_dir)
         self.result_dir = result_dir
         self.redis_url = redis_url
-        self.subprocesses: List[Popen[bytes]] = []
+        self.member_ready_timeout = member_ready_timeout
+        self.node_pool = node_pool
+        self.env_host_pool = env_host_pool
+        self.r = redis.Redis.from_url(redis_url)
+        self.subprocesses: List[
+            Union[Popen[bytes], "PooledProcess", HostedEnvSession]
+        ] = []
+        self.session_subprocesses: Dict[
+            str, List[Union[Popen[bytes], "PooledProcess", HostedEnvSession]]
+        ] = {}
         self.sessions = []
 
     def check_session_exists(self, session_uuid: str) -> bool:
@@ -58,17 +103,19 @@ class Runner:
         """
         return session_uuid in self.sessions
 
-    def launch_team_member(self, env_uuid: str, member: TeamMemberConfig):
+    def get_team_member_command(
+        self, env_uuid: str, member: TeamMemberConfig
+    ) -> Optional[str]:
         """
-        Launch a team member process with the specified configuration.
-
-        Creates and starts a subprocess for the team member, configuring it with
-        the appropriate environment UUID and Redis connection. Handles different
-        member types (cmd_user, simulated_user, agent, gui_user) appropriately.
+        Build the command starting the node of a team member.
 
         Args:
             env_uuid: Unique identifier for the environment
-            member: Configuration for the team member to launch
+            member: Configuration for the team member
+
+        Returns:
+            The command, or None for members without a node process (gui_user, whose node
+            is created by the server for each websocket connection)
         """
         if member.type == "cmd_user":
             start_member_command = (
@@ -87,15 +134,80 @@ class Runner:
                 f"--redis-url {self.redis_url}"
             )
         elif member.type == "gui_user":
-            return
+            return None
+        return start_member_command
+
+    def launch_node(self, command: str) -> Union[Popen[bytes], "PooledProcess"]:
+        """Start a node command, through the node pool if there is one."""
+        if self.node_pool is not None:
+            process = self.node_pool.submit(command)
+        else:
+            process = Popen(
+                [command],
+                shell=True,
+                preexec_fn=os.setsid,  # Start the subprocess in a new process group
+            )
+        self.subprocesses.append(process)
+        return process
 
-        agent_process = Popen(
-            [start_member_command],
-            shell=True,
-            preexec_fn=os.setsid,  # Start the subprocess in a new process group
-        )
-        self.subprocesses.append(agent_process)
-        time.sleep(5)  # Wait for the node to start
+    def launch_team_member(
+        self, env_uuid: str, member: TeamMemberConfig
+    ) -> Optional[Union[Popen[bytes], "PooledProcess"]]:
+        """
+        Launch a team member process with the specified configuration.
+
+        Creates and starts a subprocess for the team member, configuring it with
+        the appropriate environment UUID and Redis connection. Handles different
+        member types (cmd_user, simulated_user, agent, gui_user) appropriately.
+        Does not wait for the node to start (see `wait_for_members_ready`).
+
+        Args:
+            env_uuid: Unique identifier for the environment
+            member: Configuration for the team member to launch
+
+        Returns:
+            The member process, or None for members without a node process
+        """
+        start_member_command = self.get_team_member_command(env_uuid, member)
+        if start_member_command is None:
+            return None
+        return self.launch_node(start_member_command)
+
+    def wait_for_members_ready(
+        self,
+        env_uuid: str,
+        member_processes: Dict[str, Union[Popen[bytes], "PooledProcess"]],
+    ) -> List[str]:
+        """
+        Block until the nodes of the given members announce they are ready.
+
+        Args:
+            env_uuid: Unique identifier for the environment
+            member_processes: Mapping of member names to their processes
+
+        Returns:
+            Names of the members that did not become ready (timed out or exited)
+        """
+        key = readiness_key(env_uuid)
+        pending = set(member_processes)
+        exited = set()
+        deadline = time.time() + self.member_ready_timeout
+        while pending and time.time() < deadline:
+            for name in list(pending):
+                if member_processes[name].poll() is not None:
+                    logger.error(f"Team member {name} exited before becoming ready.")
+                    pending.discard(name)
+                    exited.add(name)
+            announcement = self.r.blpop([key], timeout=1)
+            if announcement is not None:
+                pending.discard(announcement[1].decode("utf-8"))
+        self.r.delete(key)
+        if pending:
+            logger.warning(
+                f"Team members {sorted(pending)} of {env_uuid} are not ready after "
+                f"{self.member_ready_timeout} seconds; starting the environment anyway."
+            )
+        return sorted(pending | exited)
 
     def start_session(
         self,
@@ -129,13 +241,38 @@ class Runner:
             print(f"Session {session_uuid} already started")
             return
         self.sessions.append(session_uuid)
+        session_processes = self.session_subprocesses.setdefault(session_uuid, [])
         env_uuid = f"env_{session_uuid}"
 
+        self.r.delete(readiness_key(env_uuid))  # Announcements of a previous run
+        member_processes = {}
         for member in members:
-            self.launch_team_member(env_uuid, member)
+            member_process = self.launch_team_member(env_uuid, member)
+            if member_process is not None:
+                member_processes[member.name] = member_process
+        session_processes.extend(member_processes.values())
+        self.wait_for_members_ready(env_uuid, member_processes)
 
         team_member_names = [member.name for member in members]
 
+        if self.env_host_pool is not None:
+            hosted_session = self.env_host_pool.submit(
+                env_uuid=env_uuid,
+                env_node_args={
+                    "env_config": toml.load(env_config_path),
+                    "team_members": team_member_names,
+                    "disable_collaboration": disable_collaboration,
+                    "max_steps": max_steps,
+                    "tick_interval": tick_interval,
+                    "max_tick_cnt": max_tick_cnt,
+                    "result_dir": self.result_dir,
+                },
+                add_tick=add_tick,
+            )
+            self.subprocesses.append(hosted_session)
+            session_processes.append(hosted_session)
+            return
+
         start_env_command = (
             f"python -m collaborative_gym.command start-env-node "
             f"--node-name task_env --env-config-toml {env_config_path} --env-uuid {env_uuid} "
@@ -146,24 +283,36 @@ class Runner:
         print(start_env_command)
         if disable_collaboration:
             start_env_command += " --disable-collaboration"
-        env_process = Popen(
-            [start_env_command],
-            shell=True,
-            preexec_fn=os.setsid,  # Start the subprocess in a new process group
-        )
-        self.subprocesses.append(env_process)
+        session_processes.append(self.launch_node(start_env_command))
 
         if add_tick:
             start_tick_command = (
                 f"python -m collaborative_gym.command start-env-tick-node --env-node-name task_env "
                 f"--env-uuid {env_uuid} --redis-url {self.redis_url}"
             )
-            tick_process = Popen(
-                [start_tick_command],
-                shell=True,
-                preexec_fn=os.setsid,  # Start the subprocess in a new process group
-            )
-            self.subprocesses.append(tick_process)
+            session_processes.append(self.launch_node(start_tick_command))
+
+    @staticmethod
+    def terminate_subprocess(
+        proc: Union[Popen[bytes], "PooledProcess", HostedEnvSession],
+    ):
+        """
+        Terminate one subprocess gracefully and wait for it to exit.
+
+        Sends SIGTERM to the process group of node processes. Sessions run by an env host
+        are stopped by the host, which keeps running the other sessions.
+        """
+        try:
+            if isinstance(proc, HostedEnvSession):
+                proc.terminate()
+                proc.wait()
+                print(f"Stopped hosted session {proc.env_uuid}")
+                return
+            os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
+            proc.wait()
+            print(f"Terminated process group {proc.pid}")
+        except Exception as e:
+            print(f"Failed to terminate {proc.pid}: {e}")
 
     def cleanup_subprocesses(self):
         """
@@ -173,12 +322,21 @@ class Runner:
         This ensures all child processes are properly cleaned up.
         """
         for proc in self.subprocesses:
-            try:
-                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-                proc.wait()
-                print(f"Terminated process group {proc.pid}")
-            except Exception as e:
-                print(f"Failed to terminate {proc.pid}: {e}")
+            self.terminate_subprocess(proc)
+
+    def stop_session(self, session_uuid: str):
+        """
+        Terminate the subprocesses of one session and forget the session.
+
+        Args:
+            session_uuid: Unique identifier of the session to stop
+        """
+        for proc in self.session_subprocesses.pop(session_uuid, []):
+            self.terminate_subprocess(proc)
+            if proc in self.subprocesses:
+                self.subprocesses.remove(proc)
+        if session_uuid in self.sessions:
+            self.sessions.remove(session_uuid)
 
     def reset(self):
         """
@@ -188,6 +346,7 @@ class Runner:
         """
         self.cleanup_subprocesses()
         self.subprocesses = []
+        self.session_subprocesses = {}
         self.sessions = []
 
 
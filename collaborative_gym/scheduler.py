@@ -0,0 +1,248 @@
+"""
+Concurrent scheduling of simulated sessions for batch experiments.
+
+Sessions of a sweep mostly wait on LM APIs, so `ExperimentScheduler` runs several of them
+at once, each with its own `Runner` so that finishing or resetting one session does not
+touch the processes of the others. Sessions whose result directory already holds
+`task_performance.json` are skipped, so an interrupted sweep resumes where it stopped, and
+sessions that fail (crash, timeout, no task performance written) are retried with
+exponential backoff. The number of concurrent sessions using the same LM provider can be
+capped to stay within API rate limits.
+"""
+
+import logging
+import os
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+from collaborative_gym.core import TeamMemberConfig
+from collaborative_gym.runner import Runner
+from collaborative_gym.utils.utils import get_lm_provider
+
+logger = logging.getLogger(__name__)
+
+TASK_PERFORMANCE_FILE_NAME = "task_performance.json"
+# Simulated users (and the task evaluation) call OpenAI models.
+SIMULATED_USER_PROVIDER = "openai"
+
+
+class SessionSpec(BaseModel):
+    """Arguments of `Runner.start_session` for one session of a sweep."""
+
+    session_uuid: str
+    env_config_path: str
+    members: List[TeamMemberConfig]
+    max_steps: int
+    disable_collaboration: bool = False
+    add_tick: bool = False
+
+
+class SessionOutcome(BaseModel):
+    """
+    Result of scheduling a session.
+
+    Attributes:
+        session_uuid: Identifier of the session
+        status: "completed", "skipped" (already completed before) or "failed"
+        attempts: Number of times the session was started
+        minutes: Time spent on the session, including retries
+    """
+
+    session_uuid: str
+    status: Literal["completed", "skipped", "failed"]
+    attempts: int = 0
+    minutes: float = 0
+
+
+def get_model_name(command: str) -> Optional[str]:
+    """Value of the `--model-name` option of a node command, if any."""
+    argv = shlex.split(command)
+    for i, arg in enumerate(argv):
+        if arg == "--model-name" and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith("--model-name="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def get_session_providers(spec: SessionSpec) -> List[str]:
+    """LM providers called by the team members of a session."""
+    providers = set()
+    for member in spec.members:
+        if member.type == "simulated_user":
+            providers.add(SIMULATED_USER_PROVIDER)
+        model_name = get_model_name(member.start_node_base_command)
+        if model_name is not None:
+            providers.add(get_lm_provider(model_name))
+    return sorted(providers)
+
+
+class ExperimentScheduler:
+    """
+    Runs the sessions of a sweep concurrently, with resumption and retries.
+
+    Attributes:
+        result_dir: Directory the sessions write their results to
+        runner_factory: Creates the runner of a session attempt; it must write to result_dir
+        max_concurrent_sessions: Maximum number of sessions running at the same time
+        provider_limits: Maximum number of concurrent sessions per LM provider
+            (see `get_lm_provider`); providers not listed are only bounded by
+            max_concurrent_sessions
+        max_retries: Number of times a failed session is started again
+        retry_backoff: Seconds before the first retry, doubled for every further retry
+        session_timeout: Seconds after which a running session is stopped and counted as
+            failed (None for no limit; not enforced by runners whose `start_session` blocks)
+    """
+
+    def __init__(
+        self,
+        result_dir: str,
+        runner_factory: Optional[Callable[[], Runner]] = None,
+        max_concurrent_sessions: int = 4,
+        provider_limits: Optional[Dict[str, int]] = None,
+        max_retries: int = 0,
+        retry_backoff: float = 30,
+        session_timeout: Optional[float] = None,
+    ):
+        self.result_dir = result_dir
+        self.runner_factory = runner_factory or (lambda: Runner(result_dir=result_dir))
+        self.max_concurrent_sessions = max_concurrent_sessions
+        self.provider_limits = provider_limits or {}
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.session_timeout = session_timeout
+        self._provider_semaphores = {
+            provider: threading.BoundedSemaphore(limit)
+            for provider, limit in self.provider_limits.items()
+        }
+        self._active_runners: List[Runner] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def is_session_completed(self, session_uuid: str) -> bool:
+        return os.path.exists(
+            os.path.join(
+                self.result_dir, f"env_{session_uuid}", TASK_PERFORMANCE_FILE_NAME
+            )
+        )
+
+    def _acquire_provider_slots(self, providers: List[str], stack: ExitStack) -> bool:
+        """Hold a slot of every rate-limited provider; False if the scheduler is stopped."""
+        for provider in providers:  # Sorted, so concurrent sessions cannot deadlock
+            semaphore = self._provider_semaphores.get(provider)
+            if semaphore is None:
+                continue
+            while not semaphore.acquire(timeout=1):
+                if self._stopped.is_set():
+                    return False
+            stack.callback(semaphore.release)
+        return True
+
+    def _wait_for_session(self, runner: Runner):
+        deadline = (
+            None if self.session_timeout is None else time.time() + self.session_timeout
+        )
+        for process in runner.subprocesses:
+            process.wait(None if deadline is None else max(deadline - time.time(), 0))
+
+    def run_attempt(self, spec: SessionSpec) -> bool:
+        """Run a session once; returns whether it wrote its task performance."""
+        runner = self.runner_factory()
+        with self._lock:
+            self._active_runners.append(runner)
+        try:
+            runner.start_session(
+                session_uuid=spec.session_uuid,
+                env_config_path=spec.env_config_path,
+                members=spec.members,
+                max_steps=spec.max_steps,
+                disable_collaboration=spec.disable_collaboration,
+                add_tick=spec.add_tick,
+            )
+            self._wait_for_session(runner)
+        except Exception as e:
+            logger.error(f"Session {spec.session_uuid} failed: {e!r}")
+        finally:
+            runner.reset()
+            with self._lock:
+                self._active_runners.remove(runner)
+        return self.is_session_completed(spec.session_uuid)
+
+    def run_session(self, spec: SessionSpec) -> SessionOutcome:
+        """Run a session until it completes or runs out of retries."""
+        if self.is_session_completed(spec.session_uuid):
+            logger.info(f"Skipping completed session {spec.session_uuid}.")
+            return SessionOutcome(session_uuid=spec.session_uuid, status="skipped")
+        providers = get_session_providers(spec)
+        start_time = time.time()
+        attempts = 0
+        completed = False
+        while not completed and attempts <= self.max_retries:
+            if attempts > 0:
+                backoff = self.retry_backoff * 2 ** (attempts - 1)
+                logger.warning(
+                    f"Retrying session {spec.session_uuid} in {backoff:g} seconds "
+                    f"(retry {attempts}/{self.max_retries})."
+                )
+                if self._stopped.wait(backoff):
+                    break
+            with ExitStack() as stack:
+                if not self._acquire_provider_slots(providers, stack):
+                    break
+                if self._stopped.is_set():
+                    break
+                attempts += 1
+                logger.info(f"Starting session {spec.session_uuid} (attempt {attempts}).")
+                completed = self.run_attempt(spec)
+        outcome = SessionOutcome(
+            session_uuid=spec.session_uuid,
+            status="completed" if completed else "failed",
+            attempts=attempts,
+            minutes=(time.time() - start_time) / 60,
+        )
+        logger.info(
+            f"Session {spec.session_uuid} {outcome.status} after {outcome.attempts} "
+            f"attempt(s) in {outcome.minutes:.2f} minutes."
+        )
+        return outcome
+
+    def run(self, specs: List[SessionSpec]) -> List[SessionOutcome]:
+        """
+        Run the sessions of a sweep.
+
+        Args:
+            specs: Sessions to run; their session_uuid must be unique
+
+        Returns:
+            The outcome of every session, in the order of specs
+        """
+        session_uuids = [spec.session_uuid for spec in specs]
+        if len(set(session_uuids)) != len(session_uuids):
+            raise ValueError("Sessions scheduled together must have unique session ids.")
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_sessions) as executor:
+            return list(executor.map(self.run_session, specs))
+
+    def shutdown(self):
+        """Stop scheduling new sessions and terminate the running ones."""
+        self._stopped.set()
+        with self._lock:
+            runners = list(self._active_runners)
+        for runner in runners:
+            runner.cleanup_subprocesses()
+
+
+def parse_provider_limits(limits: Optional[List[str]]) -> Dict[str, int]:
+    """Parse `PROVIDER=N` command line values, e.g. ["openai=8", "anthropic=2"]."""
+    provider_limits = {}
+    for limit in limits or []:
+        provider, _, value = limit.partition("=")
+        if not value.isdigit() or int(value) < 1:
+            raise ValueError(f"Invalid provider limit {limit!r}; expected PROVIDER=N.")
+        provider_limits[provider] = int(value)
+    return provider_limits
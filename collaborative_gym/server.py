@@ -8,9 +8,11 @@ import atexit
 import json
 import os
 import signal
+import socket
 import sys
 import time
 import uuid
+from collections import defaultdict
 from threading import Thread
 from typing import List
 
@@ -34,10 +36,27 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 
 from collaborative_gym.core import TeamMemberConfig, SendTeammateMessage
-from collaborative_gym.nodes.base_node import LAST_ACTIVE_TIME_KEY
+from collaborative_gym.distributed_runner import DistributedRunner
+from collaborative_gym.env_host import EnvHostPool
+from collaborative_gym.node_pool import DEFAULT_PRELOAD_MODULES, NodeWorkerPool
 from collaborative_gym.nodes.commons import JsonObj
 from collaborative_gym.nodes.gui_user import GUIUserListenNode
+from collaborative_gym.nodes.heartbeat import (
+    SESSION_HEARTBEATS_KEY,
+    heartbeat_field,
+    is_local_process,
+    mark_process_shared,
+    read_heartbeat_records,
+)
+from collaborative_gym.nodes.tracing import make_trace_context
+from collaborative_gym.nodes.transports import (
+    PubSubTransport,
+    SharedPubSub,
+    get_transport_name,
+    make_transport,
+)
 from collaborative_gym.runner import Runner
+from collaborative_gym.utils.event_log import EVENT_LOG_FILE_NAME, load_event_log
 from collaborative_gym.utils.utils import load_api_key
 
 app = FastAPI()
@@ -55,11 +74,23 @@ app.add_middleware(
 load_api_key("secrets.toml")
 DISABLE_AGENT = os.getenv("DISABLE_AGENT", "false").lower() == "true"
 
-REDIS_URL = "redis://localhost:6379/0"
+# Workers of a distributed deployment on other hosts need a Redis URL they can reach.
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Upper bound on the connections the server opens to Redis, however many sessions are live.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
 REDIS_CLIENT = redis.Redis.from_url(REDIS_URL)
 REDIS_CLIENT.ping()
-REDIS_ASYNC_CLIENT = redis.asyncio.from_url(REDIS_URL)
-REDIS_ASYNC_CLIENT.ping()
+REDIS_ASYNC_CLIENT = redis.asyncio.Redis(
+    connection_pool=redis.asyncio.BlockingConnectionPool.from_url(
+        REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS
+    )
+)
+# Publishing only, so no consumer group is needed
+TRANSPORT = make_transport(get_transport_name(), REDIS_ASYNC_CLIENT)
+# Websocket nodes subscribe through one shared pub/sub connection (pub/sub transport only).
+SHARED_PUBSUB = (
+    SharedPubSub(REDIS_ASYNC_CLIENT) if TRANSPORT.name == PubSubTransport.name else None
+)
 
 # Local storage
 SERVER_LOCAL_STORAGE_DIR = os.path.join(os.getcwd(), "workdir/server_local_storage")
@@ -70,8 +101,56 @@ if not os.path.exists(DOCKER_STORAGE_DIR):
     os.makedirs(DOCKER_STORAGE_DIR)
 
 AGENT_NAME = "agent"  # Only one agent for now
-
-runner = Runner(result_dir=SERVER_LOCAL_STORAGE_DIR, redis_url=REDIS_URL)
+AGENT_MODULE = "demo_agent.collaborative_agent_with_situational_planning.agent"
+
+# With DISTRIBUTED_RUNNER, sessions are started by `python -m collaborative_gym.distributed_runner
+# worker` daemons, possibly on other hosts, which share SERVER_LOCAL_STORAGE_DIR and Redis.
+DISTRIBUTED_RUNNER = os.getenv("DISTRIBUTED_RUNNER", "false").lower() == "true"
+
+# Pre-warmed workers start the nodes of new sessions; 0 starts every node as a new process.
+NODE_POOL_SIZE = int(os.getenv("NODE_POOL_SIZE", "0"))
+node_pool = None
+if NODE_POOL_SIZE > 0 and not DISTRIBUTED_RUNNER:
+    node_pool = NodeWorkerPool(
+        size=NODE_POOL_SIZE,
+        redis_url=REDIS_URL,
+        preload_modules=[*DEFAULT_PRELOAD_MODULES, AGENT_MODULE],
+    )
+    node_pool.start()
+
+# With ENV_HOST_COUNT > 0, environment nodes of all sessions run in that many host processes,
+# each running at most MAX_SESSIONS_PER_ENV_HOST sessions at a time; 0 (the default) starts an
+# environment process per session, so that a crashing environment only ends its own session.
+# Each host keeps JUPYTER_POOL_SIZE Jupyter containers ready for tabular analysis sessions,
+# with JUPYTER_DATASET_DIR (if set) mounted read-only. Uploaded files are private to their
+# session, so pooled containers cannot mount them and they are staged in the session volume.
+ENV_HOST_COUNT = int(os.getenv("ENV_HOST_COUNT", "0"))
+MAX_SESSIONS_PER_ENV_HOST = int(os.getenv("MAX_SESSIONS_PER_ENV_HOST", "16"))
+JUPYTER_POOL_SIZE = int(os.getenv("JUPYTER_POOL_SIZE", "0"))
+JUPYTER_DATASET_DIR = os.getenv("JUPYTER_DATASET_DIR")
+env_host_pool = None
+if ENV_HOST_COUNT > 0 and not DISTRIBUTED_RUNNER:
+    env_host_pool = EnvHostPool(
+        size=ENV_HOST_COUNT,
+        redis_url=REDIS_URL,
+        max_sessions_per_host=MAX_SESSIONS_PER_ENV_HOST,
+        jupyter_pool_size=JUPYTER_POOL_SIZE,
+        # Next to the session volumes, so that leased volumes are moved by renaming them
+        jupyter_pool_dir=os.path.join(DOCKER_STORAGE_DIR, "jupyter_pool"),
+        jupyter_dataset_dir=JUPYTER_DATASET_DIR,
+    )
+    env_host_pool.start()
+
+if DISTRIBUTED_RUNNER:
+    runner = DistributedRunner(result_dir=SERVER_LOCAL_STORAGE_DIR, redis_url=REDIS_URL)
+else:
+    runner = Runner(
+        result_dir=SERVER_LOCAL_STORAGE_DIR,
+        redis_url=REDIS_URL,
+        node_pool=node_pool,
+        env_host_pool=env_host_pool,
+    )
+mark_process_shared()  # The GUI nodes of all sessions run in the server process
 
 
 @app.websocket("/ws/{session_id}/{user_id}")
@@ -87,10 +166,17 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, user_id: str
         team_members=[AGENT_NAME],
         websocket=websocket,
         redis_url=REDIS_URL,
+        shared_pubsub=SHARED_PUBSUB,
     ) as user_listen_node:
         await user_listen_node.event_loop()
 
 
+@app.on_event("shutdown")
+async def close_shared_pubsub():
+    if SHARED_PUBSUB is not None:
+        await SHARED_PUBSUB.close()
+
+
 @app.post("/api/init_env")
 async def init_environment(
     user_id: str = Form(...),
@@ -148,8 +234,7 @@ async def init_environment(
                         TeamMemberConfig(
                             name=AGENT_NAME,
                             type="agent",
-                            start_node_base_command="python -m "
-                            "demo_agent.collaborative_agent_with_situational_planning.agent "
+                            start_node_base_command=f"python -m {AGENT_MODULE} "
                             "--model-name gpt-4o --wait-time 1 --enhance-user-control",
                         ),
                     ],
@@ -207,9 +292,11 @@ async def post_user_action(request: Request, session_id: str, user_id: str):
             "action": action_str,
             "role": user_id,
         }
-        await REDIS_ASYNC_CLIENT.publish(
+        await TRANSPORT.publish(
             f"env_{session_id}/step",
-            Message[JsonObj](data=JsonObj(object=payload)).model_dump_json(),
+            Message[JsonObj](
+                data=JsonObj(object=payload, trace=make_trace_context("server"))
+            ).model_dump_json(),
         )  # publish must be async
         return {"status": "success", "message": f"Received action: {action_str}"}
     except Exception as e:
@@ -287,14 +374,11 @@ async def get_result(session_id: str):
         session_id (str): Session ID.
     """
     try:
-        event_log = []
-        with open(
+        event_log = load_event_log(
             os.path.join(
-                SERVER_LOCAL_STORAGE_DIR, f"env_{session_id}", "event_log.jsonl"
+                SERVER_LOCAL_STORAGE_DIR, f"env_{session_id}", EVENT_LOG_FILE_NAME
             )
-        ) as f:
-            for line in f:
-                event_log.append(json.loads(line))
+        )
 
         chat_history = []  # {"role, "message", "timestamp"}
         outcome_versions = []  # {"role", "chat_turn_id", "outcome"}
@@ -335,73 +419,83 @@ async def get_result(session_id: str):
 
 
 def kill_stale_model_processes(timeout_seconds=3600):
-    """Kills stale model processes and marks the corresponding conversations as completed.
+    """Stops stale sessions and deletes their heartbeat records.
+
+    A session is stale when none of its nodes has been active for `timeout_seconds`. Sessions
+    started by the runner are stopped through their process handles, so hosted sessions are
+    stopped by their env host and pooled nodes are terminated in their own process group.
+    Processes of other sessions (e.g., left over from a previous server) are only killed if
+    they run on this host and do not serve other sessions; records of nodes without a
+    session are treated as a session of their own.
 
     Args:
-        timeout_seconds (int): The number of seconds after which a process is considered stale.
+        timeout_seconds (int): The number of seconds after which a session is considered stale.
     """
     print("Checking for stale processes...")
 
-    def delete_process_record_in_session(pid):
-        """Deletes the process record for a node from Redis.
-
-        Args:
-            pid (int): The process ID.
-        """
-        REDIS_CLIENT.hdel(LAST_ACTIVE_TIME_KEY, str(pid))
-
-    if not REDIS_CLIENT.exists(LAST_ACTIVE_TIME_KEY):
-        return
-
-    for pid in REDIS_CLIENT.hkeys(LAST_ACTIVE_TIME_KEY):
-        pid = pid.decode("utf-8")
-        last_active_time = float(REDIS_CLIENT.hget(LAST_ACTIVE_TIME_KEY, pid))
-
-        if time.time() - last_active_time > timeout_seconds:
-            pid = int(pid)
-            if pid == os.getpid():
-                continue  # Skip the current process
-            try:
-                os.kill(
-                    pid, signal.SIGTERM
-                )  # Send SIGTERM instead of forcefully terminating
-            except ProcessLookupError:
-                # Process already terminated
-                delete_process_record_in_session(pid)
-                continue
-
-            # Wait for the process to terminate gracefully
-            time.sleep(5)
-            try:
-                corresponding_process = psutil.Process(pid)
-                if corresponding_process.is_running():
-                    corresponding_process.kill()  # Force kill if still running
-            except psutil.NoSuchProcess:
-                pass  # Process has already terminated
-
-            delete_process_record_in_session(pid)
-            print(f"Killed stale process for {pid}")
+    session_records = defaultdict(list)
+    for record in read_heartbeat_records(REDIS_CLIENT):
+        session = record.session or f"{record.hostname}:{record.pid}"
+        session_records[session].append(record)
+
+    for session, records in session_records.items():
+        if time.time() - max(r.last_active_time for r in records) <= timeout_seconds:
+            continue
+        session_uuid = session.removeprefix("env_")
+        if runner.check_session_exists(session_uuid):
+            runner.stop_session(session_uuid)
+            print(f"Stopped stale session {session_uuid}")
+        else:
+            for record in records:
+                if record.shared or not is_local_process(record):
+                    continue
+                try:
+                    os.kill(
+                        record.pid, signal.SIGTERM
+                    )  # Send SIGTERM instead of forcefully terminating
+                except ProcessLookupError:
+                    continue  # Process already terminated
+
+                # Wait for the process to terminate gracefully
+                time.sleep(5)
+                try:
+                    corresponding_process = psutil.Process(record.pid)
+                    if corresponding_process.is_running():
+                        corresponding_process.kill()  # Force kill if still running
+                except psutil.NoSuchProcess:
+                    pass  # Process has already terminated
+                print(f"Killed stale process for {record.pid} (session {session})")
+        REDIS_CLIENT.hdel(
+            SESSION_HEARTBEATS_KEY,
+            *[heartbeat_field(r.hostname, r.pid, r.session) for r in records],
+        )
     print("Done checking for stale processes")
 
 
 def handle_exit_signal(signum, frame):
     runner.cleanup_subprocesses()
-    for pid in REDIS_CLIENT.hkeys(LAST_ACTIVE_TIME_KEY):
-        pid = pid.decode("utf-8")
-        REDIS_CLIENT.hdel(LAST_ACTIVE_TIME_KEY, pid)
+    hostname = socket.gethostname()
+    for field in REDIS_CLIENT.hkeys(SESSION_HEARTBEATS_KEY):
+        if field.decode("utf-8").startswith(f"{hostname}:"):
+            REDIS_CLIENT.hdel(SESSION_HEARTBEATS_KEY, field)
     sys.exit(0)
 
 
 # schedule a job to kill stale model processes
 scheduler = BackgroundScheduler()
-scheduler.add_job(
-    func=kill_stale_model_processes,
-    trigger="interval",
-    minutes=10,
-)
+if not DISTRIBUTED_RUNNER:  # The recorded pids belong to the hosts of the workers
+    scheduler.add_job(
+        func=kill_stale_model_processes,
+        trigger="interval",
+        minutes=10,
+    )
 scheduler.start()
 
 signal.signal(signal.SIGINT, handle_exit_signal)
 signal.signal(signal.SIGTERM, handle_exit_signal)
 atexit.register(runner.cleanup_subprocesses)
 atexit.register(scheduler.shutdown)
+if node_pool is not None:
+    atexit.register(node_pool.shutdown)
+if env_host_pool is not None:
+    atexit.register(env_host_pool.shutdown)
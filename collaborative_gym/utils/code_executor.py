@@ -5,11 +5,22 @@ import logging
 import os.path
 import re
 import secrets
+import time
 import uuid
 from collections import deque
 from pathlib import Path
 from types import TracebackType
-from typing import Optional, Dict, Union, List, Deque, Self, Type
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Optional,
+    Dict,
+    Union,
+    List,
+    Deque,
+    Self,
+    Type,
+)
 
 import docker
 from autogen.coding import MarkdownCodeExtractor
@@ -29,6 +40,18 @@ from autogen.coding.utils import silence_pip
 from tenacity import stop_after_attempt, retry, wait_exponential
 
 from collaborative_gym.utils.jupyter_client import JupyterClient
+from collaborative_gym.utils.jupyter_history import (
+    Cell,
+    JupyterCell,
+    cells_after,
+    execution_history_to_str,
+)
+
+if TYPE_CHECKING:
+    from collaborative_gym.utils.jupyter_pool import JupyterContainerPool
+
+# Directory of the container where the dataset directory is mounted read-only.
+DATASET_CONTAINER_DIR = "/home/jovyan/datasets"
 
 
 class CustomDockerJupyterServer(DockerJupyterServer):
@@ -47,6 +70,7 @@ class CustomDockerJupyterServer(DockerJupyterServer):
         ] = DockerJupyterServer.GenerateToken(),
         local_directory: Optional[str] = None,
         container_directory: Optional[str] = None,
+        dataset_directory: Optional[str] = None,
         device_requests: Optional[List] = None,
     ):
         """Most part of the code is borrowed from the parent class DockerJupyterServer.
@@ -70,6 +94,8 @@ class CustomDockerJupyterServer(DockerJupyterServer):
                 will be unauthenticated.
             local_directory (Optional[str], optional): Local directory to mount to the container.
             container_directory (Optional[str], optional): Directory in the container to mount.
+            dataset_directory (Optional[str], optional): Local directory of datasets to mount
+                read-only at DATASET_CONTAINER_DIR, so that they are read in place.
             device_requests (Optional[List], optional): Expose host resources such as GPUs to the container,
                 as a list of :py:class:`docker.types.DeviceRequest` instances.
         """
@@ -105,7 +131,11 @@ class CustomDockerJupyterServer(DockerJupyterServer):
                 container_directory or "/home/jovyan/work"
             )  # Default directory.
             volumes[local_directory] = {"bind": container_directory, "mode": "rw"}
+        if dataset_directory:
+            dataset_directory = os.path.abspath(dataset_directory)
+            volumes[dataset_directory] = {"bind": DATASET_CONTAINER_DIR, "mode": "ro"}
         self.volumes = volumes
+        self.dataset_directory = dataset_directory
         # New code to mount a local directory to the container ends here
         container = client.containers.run(
             image_name,
@@ -138,8 +168,68 @@ class CustomDockerJupyterServer(DockerJupyterServer):
         self._stop_container = stop_container
 
 
+# Checkpoints are written in the container, outside of the volume shared with the session.
+KERNEL_CHECKPOINT_DIR = "/tmp/co_gym_kernel_checkpoints"
+# IPython output caches (_, __, _i, _i3, _3, ...) and the helper below are not checkpointed.
+# Serialization stops as soon as the checkpoint exceeds max_bytes, which bounds its cost; the
+# size of the checkpoint is printed.
+_KERNEL_CHECKPOINT_CODE = """
+def _co_gym_checkpoint():
+    import os, re, dill
+
+    max_bytes = {max_bytes!r}
+
+    class LimitedFile:
+        def __init__(self, f):
+            self.f, self.size = f, 0
+
+        def write(self, data):
+            self.size += len(data)
+            if max_bytes is not None and self.size > max_bytes:
+                raise OverflowError(f"The namespace takes more than {{max_bytes}} bytes")
+            return self.f.write(data)
+
+    ip = get_ipython()
+    state = {{
+        k: v
+        for k, v in ip.user_ns.items()
+        if k not in ip.user_ns_hidden and not re.match(r"^(_+|_i+|_i?\\d+|_co_gym_.*)$", k)
+    }}
+    os.makedirs({dir!r}, exist_ok=True)
+    try:
+        with open({path!r} + ".tmp", "wb") as f:
+            dill.dump(state, LimitedFile(f), recurse=True)
+        os.replace({path!r} + ".tmp", {path!r})
+    finally:
+        if os.path.exists({path!r} + ".tmp"):
+            os.remove({path!r} + ".tmp")
+    print(os.path.getsize({path!r}))
+try:
+    _co_gym_checkpoint()
+finally:
+    del _co_gym_checkpoint
+"""
+_KERNEL_RESTORE_CODE = """
+import dill as _co_gym_dill
+with open({path!r}, "rb") as _co_gym_f:
+    get_ipython().user_ns.update(_co_gym_dill.load(_co_gym_f))
+del _co_gym_dill, _co_gym_f
+"""
+
+
 class CustomJupyterCodeExecutor(CodeExecutor):
-    """Adapted from https://github.com/timrbula/autogen/blob/main/autogen/coding/jupyter/jupyter_code_executor.py"""
+    """Adapted from https://github.com/timrbula/autogen/blob/main/autogen/coding/jupyter/jupyter_code_executor.py
+
+    To recover from a lost kernel connection without re-executing every previous cell,
+    the kernel namespace is serialized with dill (in the container) once cells took
+    `checkpoint_after_seconds` to run since the last checkpoint. Checkpoints are bounded:
+    one is abandoned once it exceeds `checkpoint_max_bytes`, and the next one is delayed
+    so that checkpointing takes at most `checkpoint_overhead_ratio` of the execution time
+    of the cells. After a kernel restart,
+    the latest checkpoint is loaded and only the cells executed after it are rerun; the
+    whole history is rerun only if no checkpoint could be written (e.g. an object in the
+    namespace cannot be serialized) or loaded.
+    """
 
     def __init__(
         self,
@@ -149,6 +239,9 @@ class CustomJupyterCodeExecutor(CodeExecutor):
         output_dir: Union[Path, str] = Path("."),
         max_retries: int = 2,
         max_history: int = 100,  # Maximum number of cells to keep in history
+        checkpoint_after_seconds: Optional[float] = 30,  # None to always rerun all cells
+        checkpoint_max_bytes: Optional[int] = 256 * 1024 * 1024,
+        checkpoint_overhead_ratio: float = 0.1,
     ):
         if timeout < 1:
             raise ValueError("Timeout must be greater than or equal to 1.")
@@ -185,6 +278,18 @@ class CustomJupyterCodeExecutor(CodeExecutor):
         self._execution_history: Deque[CodeBlock] = deque(maxlen=max_history)
         self._skip_history = False  # Flag to prevent infinite recursion
 
+        self.checkpoint_after_seconds = checkpoint_after_seconds
+        self._checkpoint_path = os.path.join(
+            KERNEL_CHECKPOINT_DIR, f"{self._kernel_id}.pkl"
+        )
+        self._has_checkpoint = False
+        self._history_since_checkpoint: Deque[CodeBlock] = deque(maxlen=max_history)
+        self._seconds_since_checkpoint = 0.0
+        self.checkpoint_max_bytes = checkpoint_max_bytes
+        self.checkpoint_overhead_ratio = checkpoint_overhead_ratio
+        # Seconds of execution between two checkpoints, raised after costly checkpoints
+        self._checkpoint_interval = checkpoint_after_seconds
+
     @property
     def code_extractor(self) -> CodeExtractor:
         """Copied from https://github.com/timrbula/autogen/blob/main/autogen/coding/jupyter/jupyter_code_executor.py
@@ -225,12 +330,76 @@ class CustomJupyterCodeExecutor(CodeExecutor):
         JupyterCodeExecutor"""
         self.stop()
 
-    def _add_to_history(self, code_block: CodeBlock):
-        """Add executed code block to history."""
+    def _add_to_history(self, code_block: CodeBlock, seconds: float = 0):
+        """Add executed code block to history, checkpointing the kernel when it is due."""
         self._execution_history.append(code_block)
+        self._history_since_checkpoint.append(code_block)
+        self._seconds_since_checkpoint += seconds
+        if (
+            self._checkpoint_interval is not None
+            and self._seconds_since_checkpoint >= self._checkpoint_interval
+        ):
+            self._checkpoint()
+
+    def _checkpoint(self) -> bool:
+        """Serialize the kernel namespace; the previous checkpoint is kept on failure."""
+        self._seconds_since_checkpoint = 0.0  # Do not retry a failed checkpoint right away
+        start_time = time.perf_counter()
+        try:
+            result = self._jupyter_kernel_client.execute(
+                _KERNEL_CHECKPOINT_CODE.format(
+                    dir=KERNEL_CHECKPOINT_DIR,
+                    path=self._checkpoint_path,
+                    max_bytes=self.checkpoint_max_bytes,
+                ),
+                timeout_seconds=self._timeout,
+            )
+        except Exception as e:
+            result = None
+            logging.warning(f"Failed to checkpoint the kernel: {str(e)}")
+        seconds = time.perf_counter() - start_time
+        self._checkpoint_interval = max(
+            self.checkpoint_after_seconds, seconds / self.checkpoint_overhead_ratio
+        )
+        if result is None:
+            return False
+        if not result.is_ok:
+            logging.warning(
+                f"Failed to checkpoint the kernel in {seconds:.2f} seconds; the cells since "
+                f"the last checkpoint will be rerun after a restart: {result.output}"
+            )
+            return False
+        self._has_checkpoint = True
+        self._history_since_checkpoint.clear()
+        size = result.output.strip().splitlines()[-1] if result.output.strip() else "?"
+        logging.info(
+            f"Checkpointed the kernel ({size} bytes) in {seconds:.2f} seconds; next "
+            f"checkpoint after {self._checkpoint_interval:.0f} seconds of execution."
+        )
+        return True
+
+    def _restore_checkpoint(self) -> bool:
+        """Load the latest checkpoint into the (restarted) kernel."""
+        if not self._has_checkpoint:
+            return False
+        try:
+            result = self._jupyter_kernel_client.execute(
+                _KERNEL_RESTORE_CODE.format(path=self._checkpoint_path),
+                timeout_seconds=self._timeout,
+            )
+        except Exception as e:
+            logging.warning(f"Failed to restore the kernel checkpoint: {str(e)}")
+            return False
+        if not result.is_ok:
+            logging.warning(f"Failed to restore the kernel checkpoint: {result.output}")
+            return False
+        return True
 
     def _rerun_history(self) -> bool:
-        """Rerun all previous cells after restart.
+        """Restore the kernel state after restart.
+
+        The latest checkpoint is loaded and the cells executed after it are rerun; without
+        a usable checkpoint, all previous cells are rerun.
 
         Returns:
             bool: True if history rerun was successful, False otherwise
@@ -240,10 +409,18 @@ class CustomJupyterCodeExecutor(CodeExecutor):
 
         try:
             self._skip_history = True  # Prevent recursive history replay
-            logging.info("Rerunning previous cells after kernel restart...")
+            if self._restore_checkpoint():
+                history = list(self._history_since_checkpoint)
+                logging.info(
+                    f"Restored the kernel checkpoint; rerunning the {len(history)} cells "
+                    f"executed after it..."
+                )
+            else:
+                history = list(self._execution_history)
+                logging.info("Rerunning previous cells after kernel restart...")
 
-            for i, code_block in enumerate(self._execution_history):
-                logging.info(f"Rerunning cell {i + 1}/{len(self._execution_history)}")
+            for i, code_block in enumerate(history):
+                logging.info(f"Rerunning cell {i + 1}/{len(history)}")
                 result = self._jupyter_kernel_client.execute(
                     silence_pip(code_block.code, code_block.language),
                     timeout_seconds=self._timeout,
@@ -293,12 +470,14 @@ class CustomJupyterCodeExecutor(CodeExecutor):
     @retry(
         stop=stop_after_attempt(2), wait=wait_exponential(multiplier=1, min=4, max=10)
     )
-    def _execute_with_retry(self, code: str) -> IPythonCodeResult:
+    def _execute_with_retry(
+        self, code: str, on_output: Optional[Callable[[str], None]] = None
+    ) -> IPythonCodeResult:
         """Execute code with retry logic."""
         try:
             self._ensure_kernel_connection()
             result = self._jupyter_kernel_client.execute(
-                code, timeout_seconds=self._timeout
+                code, timeout_seconds=self._timeout, on_output=on_output
             )
             return result
         except Exception as e:
@@ -306,7 +485,9 @@ class CustomJupyterCodeExecutor(CodeExecutor):
             if "Connection to remote host was lost" in str(e):
                 # Force a kernel restart on connection loss
                 self.restart()
-                # Rerun history will be handled by _ensure_kernel_connection on next retry
+                # The new kernel accepts connections, so _ensure_kernel_connection would
+                # not restore the previous state on the next retry.
+                self._rerun_history()
                 raise  # Let retry logic handle it
             raise
 
@@ -372,8 +553,16 @@ class CustomJupyterCodeExecutor(CodeExecutor):
         # return os.path.abspath(path)
         return filename
 
-    def execute_code_blocks(self, code_blocks: List[CodeBlock]) -> IPythonCodeResult:
-        """Execute code blocks with enhanced error handling and history tracking."""
+    def execute_code_blocks(
+        self,
+        code_blocks: List[CodeBlock],
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> IPythonCodeResult:
+        """Execute code blocks with enhanced error handling and history tracking.
+
+        `on_output` is called with the stdout/stderr and text outputs of the cells while
+        they run (see `JupyterKernelClient.execute`).
+        """
         outputs = []
         output_files = []
 
@@ -381,12 +570,15 @@ class CustomJupyterCodeExecutor(CodeExecutor):
             code_block.code = self.clean_code(code_block.code)
             code = silence_pip(code_block.code, code_block.language)
             try:
-                result = self._execute_with_retry(code)
+                start_time = time.perf_counter()
+                result = self._execute_with_retry(code, on_output)
 
                 if result.is_ok:
                     # Only add to history if execution was successful and we're not replaying history
                     if not self._skip_history:
-                        self._add_to_history(code_block)
+                        self._add_to_history(
+                            code_block, seconds=time.perf_counter() - start_time
+                        )
 
                     outputs.append(self.filter_cell_output(result.output))
                     for data in result.data_items:
@@ -424,8 +616,11 @@ class CustomJupyterCodeExecutor(CodeExecutor):
         )
 
     def clear_history(self):
-        """Clear the execution history."""
+        """Clear the execution history (and forget the kernel checkpoint)."""
         self._execution_history.clear()
+        self._history_since_checkpoint.clear()
+        self._has_checkpoint = False
+        self._seconds_since_checkpoint = 0.0
 
     def get_history_size(self) -> int:
         """Get the number of cells in the execution history."""
@@ -433,67 +628,102 @@ class CustomJupyterCodeExecutor(CodeExecutor):
 
 
 class JupyterManager:
+    """
+    Jupyter sandbox of a session: a container running a kernel gateway and a kernel in it.
+
+    With a `jupyter_pool`, the container is leased from the pool (whose containers use the
+    pool's image and dataset directory) instead of being started, and is stopped on `close`.
+    """
+
     def __init__(
         self,
         *,
         custom_image_name: Optional[str] = None,
         container_name: Optional[str] = None,
         docker_volume_local_dir: Optional[str] = None,
+        dataset_local_dir: Optional[str] = None,
         device_requests: Optional[List] = None,
         timeout: int = 60,
+        jupyter_pool: Optional["JupyterContainerPool"] = None,
     ):
         self.docker_volume_local_dir = docker_volume_local_dir
-        self.docker_server = CustomDockerJupyterServer(
-            custom_image_name=custom_image_name,
-            container_name=container_name,
-            local_directory=docker_volume_local_dir,
-            device_requests=device_requests,
-        )
+        self.jupyter_pool = jupyter_pool
+        if jupyter_pool is not None:
+            self.docker_server = jupyter_pool.lease(docker_volume_local_dir)
+        else:
+            self.docker_server = CustomDockerJupyterServer(
+                custom_image_name=custom_image_name,
+                container_name=container_name,
+                local_directory=docker_volume_local_dir,
+                dataset_directory=dataset_local_dir,
+                device_requests=device_requests,
+            )
         self.jupyter_executor = CustomJupyterCodeExecutor(
             self.docker_server, output_dir=docker_volume_local_dir, timeout=timeout
         )
 
-        self.code_blocks = []
-        self.code_results = []
+        self.cells: List[Cell] = []
+        self._next_cell_id = 0
+
+    @property
+    def docker_volume_container_dir(self) -> str:
+        """Directory of the container where docker_volume_local_dir is mounted."""
+        return next(iter(self.docker_server.volumes.values()))["bind"]
+
+    def dataset_container_path(self, local_path: str) -> Optional[str]:
+        """Path in the container of a local file under the mounted dataset directory, or
+        None if the file is not under it."""
+        dataset_directory = self.docker_server.dataset_directory
+        if dataset_directory is None:
+            return None
+        relative_path = os.path.relpath(
+            os.path.realpath(local_path), os.path.realpath(dataset_directory)
+        )
+        if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+            return None
+        return os.path.join(DATASET_CONTAINER_DIR, relative_path)
 
     def close(self):
         self.jupyter_executor.stop()
+        if self.jupyter_pool is not None:
+            self.jupyter_pool.release(self.docker_server, self.docker_volume_local_dir)
 
     def reset(self):
         self.jupyter_executor.restart()
-        self.code_blocks = []
-        self.code_results = []
+        self.jupyter_executor.clear_history()
+        # Cell ids are not reused, so ids seen before the reset stay unambiguous.
+        self.cells = []
+
+    @property
+    def next_cell_id(self) -> int:
+        """Id of the cell the next `execute_python_code` call will add."""
+        return self._next_cell_id
 
-    def execute_python_code(self, code: str) -> IPythonCodeResult:
+    def execute_python_code(
+        self, code: str, on_output: Optional[Callable[[str], None]] = None
+    ) -> IPythonCodeResult:
         code_block = CodeBlock(language="python", code=code)
-        code_result = self.jupyter_executor.execute_code_blocks([code_block])
-        self.code_blocks.append(code_block)
-        self.code_results.append(code_result)
+        start_time = time.perf_counter()
+        code_result = self.jupyter_executor.execute_code_blocks(
+            [code_block], on_output=on_output
+        )
+        self.cells.append(
+            JupyterCell(
+                id=self._next_cell_id,
+                code=code_block.code,
+                output=code_result.output,
+                exit_code=code_result.exit_code,
+                output_files=code_result.output_files,
+                execution_seconds=time.perf_counter() - start_time,
+            ).model_dump()
+        )
+        self._next_cell_id += 1
 
         return code_result
 
-    def execution_history_to_str(self):
-        history = ""
-        for code_block, code_result in zip(self.code_blocks, self.code_results):
-            code_result_str = code_result.output.strip()
-            if "\n['" in code_result_str:
-                code_result_str = code_result_str.split("\n['")[0]
-            history += f"Code block:\n{code_block.code.strip()}\n"
-            history += f"Output:\n{code_result_str}\n\n"
-
-        return history.strip()
+    def get_cells(self, after_id: Optional[int] = None) -> List[Cell]:
+        """Executed cells, or only the cells executed after the cell `after_id`."""
+        return cells_after(self.cells, after_id)
 
-    @staticmethod
-    def str_to_execution_history(history: str):
-        code_blocks = []
-        code_results = []
-        for block in history.split("Code block:")[1:]:
-            code_block, code_result = block.split("Output:")
-            code_blocks.append(code_block.strip())
-            code_results.append(code_result.strip())
-
-        execution_history = []
-        for code_block, code_result in zip(code_blocks, code_results):
-            execution_history.append({"code": code_block, "result": code_result})
-
-        return execution_history
+    def execution_history_to_str(self):
+        return execution_history_to_str(self.cells)
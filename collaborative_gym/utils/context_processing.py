@@ -1,7 +1,10 @@
 import json
 from typing import Dict, List, Optional
 
-from collaborative_gym.utils.code_executor import JupyterManager
+from collaborative_gym.utils.jupyter_history import (
+    execution_history_to_str,
+    load_execution_history,
+)
 
 
 class ContextProcessor:
@@ -11,26 +14,16 @@ class ContextProcessor:
         trimmed_obs = {}
         for k in obs:
             if "jupyter" in k:
-                exe_history = JupyterManager.str_to_execution_history(obs[k])
+                exe_history = load_execution_history(obs[k])
                 if len(exe_history) == 0:
                     trimmed_obs[k] = "No code execution history"
                 elif len(exe_history) > 5:  # Only show the last 5 entries
-                    history = f"...{len(exe_history) - 5} more code execution history entries not shown...\n"
-                    for cell in exe_history[-5:]:
-                        code_block = cell["code"]
-                        code_result = cell["result"]
-                        try:
-                            code_result_str = code_result.output.strip()
-                            if "\n['" in code_result_str:
-                                code_result_str = code_result_str.split("\n['")[0]
-                            history += f"Code block:\n{code_block.code.strip()}\n"
-                            history += f"Output:\n{code_result_str}\n\n"
-                        except Exception as e:
-                            history += f"Code block:\n{code_block}\n"
-                            history += f"Output:\n{code_result}\n\n"
-                    trimmed_obs[k] = history.strip()
+                    trimmed_obs[k] = (
+                        f"...{len(exe_history) - 5} more code execution history entries not shown...\n"
+                        + execution_history_to_str(exe_history[-5:])
+                    )
                 else:
-                    trimmed_obs[k] = obs[k]
+                    trimmed_obs[k] = execution_history_to_str(exe_history)
             else:
                 trimmed_obs[k] = obs[k]
         return json.dumps(trimmed_obs, indent=4)
@@ -0,0 +1,355 @@
+"""Delta-encoded event log for collaboration sessions.
+
+Each line of ``event_log.jsonl`` carries the event metadata (role, timestamp, action,
+action_status, action_type). Instead of snapshotting the full chat history and
+observation on every line, records only carry the chat turns appended since the
+previous record and a patch of the observation fields that changed. A keyframe with
+the full state is written every ``keyframe_interval`` records so that the state at
+any event index can be rebuilt by replaying at most ``keyframe_interval`` patches.
+Lines are written by `EventLogWriter` off the event loop.
+
+Logs written before delta encoding (full ``current_chat_history`` and
+``current_observation`` on every line) are read as if every line was a keyframe.
+"""
+
+import asyncio
+import copy
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+EVENT_LOG_FILE_NAME = "event_log.jsonl"
+
+EVENT_META_KEYS = ("role", "timestamp", "action", "action_status", "action_type")
+
+
+def diff_dict(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute a patch that turns `old` into `new`.
+
+    The patch is a dictionary with optional keys:
+        set: Mapping of keys to their new values (for added or changed non-dict values)
+        unset: List of keys removed from `old`
+        nested: Mapping of keys to sub-patches when both values are dictionaries
+        append: Mapping of keys to the items appended when the new value is a list
+            extending the old one (e.g. the cells of an append-only Jupyter history)
+
+    An empty dictionary means there is no change.
+    """
+    patch = {}
+    set_values = {}
+    nested = {}
+    append = {}
+    for k, v in new.items():
+        if k not in old:
+            set_values[k] = v
+        elif old[k] is v:
+            continue  # Shared snapshot, e.g. an unchanged observation version
+        elif isinstance(v, dict) and isinstance(old[k], dict):
+            sub_patch = diff_dict(old[k], v)
+            if sub_patch:
+                nested[k] = sub_patch
+        elif (
+            isinstance(v, list)
+            and isinstance(old[k], list)
+            and len(v) > len(old[k])
+            and v[: len(old[k])] == old[k]
+        ):
+            append[k] = v[len(old[k]) :]
+        elif old[k] != v:
+            set_values[k] = v
+    unset = [k for k in old if k not in new]
+    if set_values:
+        patch["set"] = set_values
+    if unset:
+        patch["unset"] = unset
+    if nested:
+        patch["nested"] = nested
+    if append:
+        patch["append"] = append
+    return patch
+
+
+def apply_patch(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a patch produced by `diff_dict` to `base` in place and return it."""
+    for k in patch.get("unset", []):
+        base.pop(k, None)
+    for k, v in patch.get("set", {}).items():
+        base[k] = copy.deepcopy(v)
+    for k, sub_patch in patch.get("nested", {}).items():
+        if not isinstance(base.get(k), dict):
+            base[k] = {}
+        apply_patch(base[k], sub_patch)
+    for k, items in patch.get("append", {}).items():
+        base[k] = base[k] + copy.deepcopy(items)
+    return base
+
+
+def patched(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of `base` with a `diff_dict` patch applied, leaving `base` untouched.
+
+    Unchanged sub-dictionaries are shared with `base` instead of being copied.
+    """
+    result = dict(base)
+    for k in patch.get("unset", []):
+        result.pop(k, None)
+    for k, v in patch.get("set", {}).items():
+        result[k] = v
+    for k, sub_patch in patch.get("nested", {}).items():
+        result[k] = patched(
+            result[k] if isinstance(result.get(k), dict) else {}, sub_patch
+        )
+    for k, items in patch.get("append", {}).items():
+        result[k] = result[k] + items
+    return result
+
+
+class EventLogEncoder:
+    """
+    Stateful encoder turning event records into delta-encoded event log lines.
+
+    The encoder remembers the chat history length and the observation of the last
+    record it encoded. Chat history is treated as append-only; if it shrinks, a
+    keyframe is emitted instead of a delta.
+
+    Attributes:
+        keyframe_interval: Number of records between two keyframes (the first record is always a keyframe)
+        event_cnt: Number of records encoded so far
+    """
+
+    def __init__(self, keyframe_interval: int = 20):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be a positive integer.")
+        self.keyframe_interval = keyframe_interval
+        self.event_cnt = 0
+        self._last_chat_history_len = 0
+        self._last_observation: Optional[Dict[str, Any]] = None
+
+    def encode(
+        self,
+        record: Dict[str, Any],
+        chat_history: List[Dict[str, Any]],
+        observation: Dict[str, Any],
+        copy_observation: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Encode one event record together with the session state at that event.
+
+        Args:
+            record: Event metadata (role, timestamp, action, action_status, action_type)
+            chat_history: Full chat history at this event
+            observation: Full environment observation at this event
+            copy_observation: Whether to deep copy the observation; pass False for
+                snapshots that will never be mutated
+
+        Returns:
+            JSON-serializable dictionary to be written as one event log line
+        """
+        line = {**record, "event_index": self.event_cnt}
+        # Deep copy since environments may mutate the returned observation in place.
+        # The returned line only references the snapshot so that it can be serialized later.
+        snapshot = copy.deepcopy(observation) if copy_observation else observation
+        is_keyframe = (
+            self._last_observation is None
+            or self.event_cnt % self.keyframe_interval == 0
+            or len(chat_history) < self._last_chat_history_len
+        )
+        if is_keyframe:
+            line["keyframe"] = True
+            line["current_chat_history"] = list(chat_history)
+            line["current_observation"] = snapshot
+        else:
+            line["keyframe"] = False
+            line["chat_history_delta"] = chat_history[self._last_chat_history_len :]
+            line["observation_delta"] = diff_dict(self._last_observation, snapshot)
+        self._last_chat_history_len = len(chat_history)
+        self._last_observation = snapshot
+        self.event_cnt += 1
+        return line
+
+
+class EventLogWriter:
+    """
+    Buffered asynchronous writer owning one open event log file handle per session.
+
+    `write` only appends the line to an in-memory buffer, so it never blocks the event
+    loop. A background task serializes and writes buffered lines in a worker thread
+    every `flush_interval` seconds, or earlier once `max_batch_size` lines are buffered.
+
+    Attributes:
+        event_log_path: Path to the event log file (truncated on construction)
+        flush_interval: Maximum time in seconds a line stays in the buffer once the writer is started
+        max_batch_size: Number of buffered lines that triggers an early flush
+        fsync_policy: When to fsync the file:
+            "never" - leave it to the OS,
+            "batch" - after every written batch,
+            "close" - once when the writer is closed
+    """
+
+    FSYNC_POLICIES = ("never", "batch", "close")
+
+    def __init__(
+        self,
+        event_log_path: str,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 64,
+        fsync_policy: str = "never",
+    ):
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(
+                f"Unknown fsync_policy {fsync_policy!r}. Choose from {self.FSYNC_POLICIES}."
+            )
+        self.event_log_path = event_log_path
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.fsync_policy = fsync_policy
+        self._f = open(event_log_path, "w")
+        self._buffer: List[Dict[str, Any]] = []
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self):
+        """Start the background flush task. Must be called from a running event loop."""
+        if self._flush_task is None and not self._closed:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    def write(self, line: Dict[str, Any]):
+        """Buffer one event log line without blocking."""
+        if self._closed:
+            raise ValueError(f"Event log writer for {self.event_log_path} is closed.")
+        self._buffer.append(line)
+        if len(self._buffer) >= self.max_batch_size:
+            self._batch_ready.set()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        self._f.write("".join(json.dumps(line) + "\n" for line in batch))
+        self._f.flush()
+        if self.fsync_policy == "batch":
+            os.fsync(self._f.fileno())
+
+    def _close_file(self):
+        self._f.flush()
+        if self.fsync_policy != "never":
+            os.fsync(self._f.fileno())
+        self._f.close()
+
+    async def flush(self):
+        """Write all buffered lines to the file."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            await asyncio.to_thread(self._write_batch, batch)
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._batch_ready.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+            if self._closed:
+                break
+
+    async def close(self):
+        """Flush remaining lines, stop the background task and close the file. Idempotent."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._flush_task is not None:
+            self._batch_ready.set()
+            await self._flush_task
+        await self.flush()
+        await asyncio.to_thread(self._close_file)
+
+
+def is_keyframe(event: Dict[str, Any]) -> bool:
+    """Whether an event log line carries the full state (including legacy lines)."""
+    return event.get("keyframe", "current_observation" in event)
+
+
+def get_event_meta(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip the state fields from an event log line."""
+    return {k: event[k] for k in EVENT_META_KEYS if k in event}
+
+
+def read_event_log_lines(event_log_path: str) -> List[Dict[str, Any]]:
+    """Read the raw (possibly delta-encoded) lines of an event log."""
+    events = []
+    with open(event_log_path) as f:
+        for line in f:
+            if line.strip():
+                events.append(json.loads(line))
+    return events
+
+
+def rebuild_state(
+    events: List[Dict[str, Any]], index: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Rebuild the full chat history and observation at a given event index.
+
+    Args:
+        events: Raw event log lines as returned by `read_event_log_lines`
+        index: Event index to rebuild the state for (negative indices are supported)
+
+    Returns:
+        Tuple of (chat_history, observation) at that event
+    """
+    if index < 0:
+        index += len(events)
+    if index < 0 or index >= len(events):
+        raise IndexError(f"Event index {index} out of range.")
+    start = index
+    while start > 0 and not is_keyframe(events[start]):
+        start -= 1
+    if not is_keyframe(events[start]):
+        raise ValueError("Event log does not start with a keyframe.")
+    chat_history = copy.deepcopy(events[start]["current_chat_history"])
+    observation = copy.deepcopy(events[start]["current_observation"])
+    for event in events[start + 1 : index + 1]:
+        chat_history.extend(copy.deepcopy(event["chat_history_delta"]))
+        apply_patch(observation, event["observation_delta"])
+    return chat_history, observation
+
+
+def load_event_log(event_log_path: str, with_state: bool = False) -> List[Dict]:
+    """
+    Load an event log written by TaskEnvNode.
+
+    Args:
+        event_log_path: Path to `event_log.jsonl`
+        with_state: If True, every returned event carries the full `current_chat_history`
+            and `current_observation` rebuilt from keyframes and deltas. Otherwise only
+            the event metadata is returned, which is what most analyses need.
+
+    Returns:
+        List of event dictionaries in the order they were logged
+    """
+    events = read_event_log_lines(event_log_path)
+    if not with_state:
+        return [get_event_meta(event) for event in events]
+
+    results = []
+    chat_history, observation = [], {}
+    for event in events:
+        if is_keyframe(event):
+            chat_history = copy.deepcopy(event["current_chat_history"])
+            observation = copy.deepcopy(event["current_observation"])
+        else:
+            chat_history = chat_history + copy.deepcopy(event["chat_history_delta"])
+            observation = apply_patch(
+                copy.deepcopy(observation), event["observation_delta"]
+            )
+        results.append(
+            {
+                **get_event_meta(event),
+                "current_chat_history": chat_history,
+                "current_observation": observation,
+            }
+        )
+    return results
@@ -1,7 +1,10 @@
+import fcntl
 import json
 import os
 import shutil
 
+FICLONE = 0x40049409  # Linux ioctl sharing the data blocks of a file (reflink)
+
 
 def clear_directory(dir_path):
     for item in os.listdir(dir_path):
@@ -12,6 +15,30 @@ def clear_directory(dir_path):
             os.remove(item_path)
 
 
+def stage_file(src_path, dst_path):
+    """Make a copy of a file available at dst_path, without copying its data when possible.
+
+    The file is cloned by reflink (a copy-on-write clone) on filesystems that support it
+    (btrfs, XFS, ...), and copied otherwise. It is never hard linked: dst_path is usually in
+    the volume of a sandbox, where writing through a link would change the original.
+
+    Returns:
+        str: "reflink" or "copy"
+    """
+    if os.path.lexists(dst_path):
+        os.remove(dst_path)
+    try:
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copymode(src_path, dst_path)
+        return "reflink"
+    except OSError:
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+    shutil.copy(src_path, dst_path)
+    return "copy"
+
+
 def load_json(file_name, encoding="utf-8"):
     with open(file_name, "r", encoding=encoding) as f:
         content = json.load(f)
@@ -5,7 +5,7 @@ from __future__ import annotations
 import sys
 from dataclasses import dataclass
 from types import TracebackType
-from typing import Any, Dict, List, Type, cast
+from typing import Any, Callable, Dict, List, Type, cast
 
 from autogen.coding.jupyter import JupyterConnectionInfo
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -276,8 +276,19 @@ class JupyterKernelClient:
                 return True
 
     def execute(
-        self, code: str, timeout_seconds: Optional[float] = None
+        self,
+        code: str,
+        timeout_seconds: Optional[float] = None,
+        on_output: Optional[Callable[[str], None]] = None,
     ) -> ExecutionResult:
+        """Execute code and wait for the kernel to be idle.
+
+        Args:
+            code: Code to execute
+            timeout_seconds: Maximum time to wait for each message of the kernel
+            on_output: Called with each stdout/stderr chunk and text output as the kernel
+                sends them, before the execution finishes
+        """
         message_id = self._send_message(
             content={
                 "code": code,
@@ -312,6 +323,8 @@ class JupyterKernelClient:
                 for data_type, data in content["data"].items():
                     if data_type == "text/plain":
                         text_output.append(data)
+                        if on_output is not None:
+                            on_output(f"{data}\n")
                     elif data_type.startswith("image/") or data_type == "text/html":
                         data_output.append(
                             self.ExecutionResult.DataItem(
@@ -322,6 +335,8 @@ class JupyterKernelClient:
                         text_output.append(json.dumps(data))
             elif msg_type == "stream":
                 text_output.append(content["text"])
+                if on_output is not None:
+                    on_output(content["text"])
             elif msg_type == "error":
                 # Output is an error.
                 return JupyterKernelClient.ExecutionResult(
@@ -0,0 +1,86 @@
+"""
+Structured execution history of a Jupyter sandbox.
+
+The history of a session is an append-only list of cells ordered by id. Each cell is the
+JSON dictionary of a `JupyterCell`, created once when the cell is executed and never
+modified afterwards, so observation snapshots share the cells and observation deltas only
+carry the cells appended since the previous observation (see the ``append`` operation of
+`collaborative_gym.utils.event_log.diff_dict`). Cell ids keep increasing when the history
+is cleared, so a consumer holding the id of the last cell it has seen can fetch only the
+newer cells with `cells_after`.
+
+This module does not import docker or autogen, so observation consumers (agents, the GUI
+user node) can use it without the dependencies of the Jupyter sandbox.
+"""
+
+import bisect
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+Cell = Dict[str, Any]
+
+
+class JupyterCell(BaseModel):
+    """
+    A code cell executed in the Jupyter sandbox.
+
+    Attributes:
+        id: Id of the cell, increasing in execution order
+        code: Code of the cell
+        output: Output of the cell (or the error message if it failed)
+        exit_code: 0 if the cell ran successfully
+        output_files: Files written for image and HTML outputs, relative to the volume
+            directory of the session
+        execution_seconds: Time taken to execute the cell
+    """
+
+    id: int
+    code: str
+    output: str
+    exit_code: int = 0
+    output_files: List[str] = Field(default_factory=list)
+    execution_seconds: float = 0
+
+
+def cells_after(cells: List[Cell], after_id: Optional[int] = None) -> List[Cell]:
+    """Cells of a history with an id greater than `after_id` (all cells if None)."""
+    if after_id is None:
+        return list(cells)
+    return cells[bisect.bisect_right(cells, after_id, key=lambda cell: cell["id"]) :]
+
+
+def cell_output_to_str(cell: Cell) -> str:
+    """Output of a cell without the list of saved output files printed after it."""
+    output = cell["output"].strip()
+    if "\n['" in output:
+        output = output.split("\n['")[0]
+    return output
+
+
+def execution_history_to_str(cells: List[Cell]) -> str:
+    """Render cells in the "Code block:/Output:" format used in agent prompts."""
+    history = ""
+    for cell in cells:
+        history += f"Code block:\n{cell['code'].strip()}\n"
+        history += f"Output:\n{cell_output_to_str(cell)}\n\n"
+    return history.strip()
+
+
+def load_execution_history(history: Union[List[Cell], str]) -> List[Cell]:
+    """
+    Cells of a ``jupyter_history`` observation.
+
+    Observations recorded before the history was structured hold the history rendered by
+    `execution_history_to_str`; it is split back into cells numbered from 0. Code or output
+    containing the "Code block:" or "Output:" markers cannot be split back correctly.
+    """
+    if not isinstance(history, str):
+        return history
+    cells = []
+    for i, block in enumerate(history.split("Code block:")[1:]):
+        code, _, output = block.partition("Output:")
+        cells.append(
+            JupyterCell(id=i, code=code.strip(), output=output.strip()).model_dump()
+        )
+    return cells
@@ -0,0 +1,229 @@
+"""
+Pool of pre-started Jupyter sandbox containers.
+
+Starting the `CustomDockerJupyterServer` of a CoAnalysisEnv session means booting a
+container and waiting for its kernel gateway, which delays the first observation of every
+session. A `JupyterContainerPool` keeps `size` idle, token-authenticated containers ready
+and starts replacements in a background thread as sessions lease them.
+
+Every pooled container mounts its own empty directory under `pool_dir`, which should be on
+the filesystem of the volume directories of the sessions (and of their datasets) so that
+files are moved by renaming them. A session leasing a container gets its volume directory
+linked to that directory, and starts its own kernel in the container. The `dataset_dir` of
+the pool, if any, is mounted read-only in every pooled container (see
+`CustomDockerJupyterServer`), so that sessions read the datasets under it in place instead of
+staging them in their volume.
+On release, the container is stopped (and removed) rather than returned to the pool, since
+code run in a session can install packages or write outside the volume; the files of the
+session are moved to its volume directory, where they stay available once the session
+ends.
+
+The pool is per process, so it is only started where one process creates the environments
+of many sessions: an env host started with `--jupyter-pool-size` (see
+`collaborative_gym.env_host`) calls `start_jupyter_pool`, and CoAnalysisEnv leases from the
+pool returned by `get_jupyter_pool` if there is one.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    from collaborative_gym.utils.code_executor import CustomDockerJupyterServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JUPYTER_IMAGE_NAME = "cogym-jupyter-cpu-image"
+# Default `docker_local_root_dir` of CoAnalysisEnv
+DEFAULT_POOL_ROOT_DIR = os.path.join(os.getcwd(), "tmp")
+
+_pools: Dict[str, "JupyterContainerPool"] = {}
+_pools_lock = threading.Lock()
+
+
+def get_volume_local_dir(server: "CustomDockerJupyterServer") -> str:
+    """Local directory mounted in the container of a Jupyter server."""
+    return next(iter(server.volumes))
+
+
+class JupyterContainerPool:
+    """
+    Keeps idle Jupyter containers of one image ready to be leased.
+
+    Attributes:
+        size: Number of idle containers to keep
+        custom_image_name: Docker image of the containers
+        pool_dir: Directory holding the volume directory of each pooled container (by
+            default a new directory under DEFAULT_POOL_ROOT_DIR, next to the default volume
+            directories of CoAnalysisEnv)
+        refill_retry_interval: Seconds to wait before starting a container again after a
+            failure
+        dataset_dir: Directory of datasets mounted read-only in every container, if any
+    """
+
+    def __init__(
+        self,
+        size: int,
+        custom_image_name: str = DEFAULT_JUPYTER_IMAGE_NAME,
+        pool_dir: Optional[str] = None,
+        refill_retry_interval: float = 30,
+        dataset_dir: Optional[str] = None,
+    ):
+        self.size = size
+        self.custom_image_name = custom_image_name
+        if pool_dir is None:
+            os.makedirs(DEFAULT_POOL_ROOT_DIR, exist_ok=True)
+            pool_dir = tempfile.mkdtemp(prefix="jupyter-pool-", dir=DEFAULT_POOL_ROOT_DIR)
+        os.makedirs(pool_dir, exist_ok=True)
+        self.pool_dir = pool_dir
+        self.refill_retry_interval = refill_retry_interval
+        if dataset_dir is not None and not os.path.isdir(dataset_dir):
+            logger.warning(f"Dataset directory {dataset_dir} does not exist; not mounting it.")
+            dataset_dir = None
+        self.dataset_dir = dataset_dir
+        self._idle: "queue.Queue[CustomDockerJupyterServer]" = queue.Queue()
+        self._refill_needed = threading.Event()
+        self._stopped = threading.Event()
+        self._refiller: Optional[threading.Thread] = None
+
+    def start_container(self) -> "CustomDockerJupyterServer":
+        from collaborative_gym.utils.code_executor import CustomDockerJupyterServer
+
+        return CustomDockerJupyterServer(
+            custom_image_name=self.custom_image_name,
+            local_directory=os.path.join(self.pool_dir, uuid.uuid4().hex),
+            dataset_directory=self.dataset_dir,
+        )
+
+    @staticmethod
+    def is_running(server: "CustomDockerJupyterServer") -> bool:
+        import docker
+
+        try:
+            container = docker.from_env().containers.get(server._container_id)
+        except docker.errors.NotFound:
+            return False
+        return container.status == "running"
+
+    def start(self):
+        self._refiller = threading.Thread(target=self._refill, daemon=True)
+        self._refiller.start()
+
+    def _refill(self):
+        while not self._stopped.is_set():
+            while self._idle.qsize() < self.size and not self._stopped.is_set():
+                try:
+                    server = self.start_container()
+                except Exception as e:
+                    logger.error(f"Failed to start a pooled Jupyter container: {e!r}")
+                    self._stopped.wait(self.refill_retry_interval)
+                    continue
+                if self._stopped.is_set():
+                    self.discard(server)
+                    return
+                self._idle.put(server)
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+
+    def discard(self, server: "CustomDockerJupyterServer"):
+        try:
+            server.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop Jupyter container {server._container_id}: {e!r}")
+        shutil.rmtree(get_volume_local_dir(server), ignore_errors=True)
+
+    def lease(self, volume_local_dir: str) -> "CustomDockerJupyterServer":
+        """
+        Take a container for a session, or start one if none is idle.
+
+        Args:
+            volume_local_dir: Volume directory of the session; it becomes a link to the
+                directory mounted in the container (files already in it are moved there)
+
+        Returns:
+            The Jupyter server of the container
+        """
+        server = None
+        while server is None:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not self.is_running(server):
+                self.discard(server)
+                server = None
+        self._refill_needed.set()
+        if server is None:
+            logger.warning("No idle Jupyter container in the pool; starting one.")
+            server = self.start_container()
+
+        container_local_dir = get_volume_local_dir(server)
+        if os.path.islink(volume_local_dir):
+            os.unlink(volume_local_dir)
+        elif os.path.isdir(volume_local_dir):
+            for item in os.listdir(volume_local_dir):
+                shutil.move(os.path.join(volume_local_dir, item), container_local_dir)
+            os.rmdir(volume_local_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(volume_local_dir)), exist_ok=True)
+        os.symlink(container_local_dir, volume_local_dir)
+        return server
+
+    def release(self, server: "CustomDockerJupyterServer", volume_local_dir: str):
+        """Stop a leased container and move the session files to its volume directory."""
+        container_local_dir = get_volume_local_dir(server)
+        try:
+            server.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop Jupyter container {server._container_id}: {e!r}")
+        if os.path.islink(volume_local_dir):
+            os.unlink(volume_local_dir)
+            shutil.move(container_local_dir, volume_local_dir)
+        else:
+            shutil.rmtree(container_local_dir, ignore_errors=True)
+
+    def shutdown(self):
+        """Stop the idle containers."""
+        self._stopped.set()
+        self._refill_needed.set()
+        if self._refiller is not None:
+            self._refiller.join()
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+def start_jupyter_pool(
+    size: int,
+    custom_image_name: str = DEFAULT_JUPYTER_IMAGE_NAME,
+    pool_dir: Optional[str] = None,
+    dataset_dir: Optional[str] = None,
+) -> JupyterContainerPool:
+    """Start the pool of the process for an image; it is shut down at exit."""
+    with _pools_lock:
+        if custom_image_name not in _pools:
+            pool = JupyterContainerPool(
+                size=size,
+                custom_image_name=custom_image_name,
+                pool_dir=pool_dir,
+                dataset_dir=dataset_dir,
+            )
+            pool.start()
+            atexit.register(pool.shutdown)
+            _pools[custom_image_name] = pool
+        return _pools[custom_image_name]
+
+
+def get_jupyter_pool(
+    custom_image_name: str = DEFAULT_JUPYTER_IMAGE_NAME,
+) -> Optional[JupyterContainerPool]:
+    """Pool of the process for an image, or None if none was started."""
+    with _pools_lock:
+        return _pools.get(custom_image_name)
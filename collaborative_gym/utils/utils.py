@@ -19,6 +19,23 @@ def load_api_key(toml_file_path):
         os.environ[key] = str(value)
 
 
+def get_lm_provider(model_name):
+    """Name of the API provider serving a model, following the API key used by prepare_lm_kwargs."""
+    if "azure" in model_name:
+        return "azure"
+    elif "gpt" in model_name:
+        return "openai"
+    elif "claude" in model_name:
+        return "anthropic"
+    elif "together_ai" in model_name:
+        return "together_ai"
+    elif "deepseek" in model_name:
+        return "deepseek"
+    elif "gemini" in model_name:
+        return "gemini"
+    return "other"
+
+
 def prepare_lm_kwargs(model_name):
     """Prepare kwargs for initializing a language model using knowledge_storm.lm.LitellmModel."""
     if "azure" in model_name:
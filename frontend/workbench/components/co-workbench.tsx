@@ -125,8 +125,8 @@ export function CoWorkBench({ envId: envId, className, session, task }: CoWorkBe
     const jupyterObservation = observationSpace.find((obs: Observation) => (obs.type as string) === 'JupyterEditor') as JupyterObservation | undefined
     if (jupyterObservation) {
       // Map JupyterObservation content to JupyterCellPair, setting isNew to false as these pairs have been excuted
-      const cells: JupyterCellPair[] = jupyterObservation.content.map((item: JupyterCodeResultTuple, index: number) => ({
-        id: index.toString(),
+      const cells: JupyterCellPair[] = jupyterObservation.content.map((item: JupyterCodeResultTuple) => ({
+        id: item.id.toString(),
         code: item.code,
         result: item.result,
         isNew: false
@@ -142,8 +142,9 @@ export default function JupyterEditor({ jupyterCells }: JupyterEditorProps): JSX
   }, [jupyterCells]);
 
   const handleAddCell = (): void => {
+    // Cell ids are not reused, so the new cell takes the id its execution will get.
     const newCell: JupyterCellPair = {
-      id: (cells.length + 1).toString(),
+      id: (cells.reduce((maxId, cell) => Math.max(maxId, Number(cell.id)), -1) + 1).toString(),
       code: '',
       result: null,
       isNew: true,
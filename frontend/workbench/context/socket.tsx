@@ -34,6 +34,19 @@ interface ObservationMessage extends BaseMessage {
   agent_asleep: boolean;
 }
 
+interface PartialObservationUpdate {
+  name: string;
+  id?: number;
+  code?: string;
+  output?: string;
+}
+
+// Output of a running action (e.g. a Jupyter cell), replaced by the next observation
+interface PartialObservationMessage extends BaseMessage {
+  type: 'partial_observation';
+  updates: PartialObservationUpdate[];
+}
+
 interface StartMessage extends BaseMessage {
   type: 'start';
   team_member_state: Record<string, TeamMemberState>;
@@ -61,6 +74,7 @@ interface TeamMemberFinishedMessage extends BaseMessage {
 type WebSocketMessage =
   | RequestStateMessage
   | ObservationMessage
+  | PartialObservationMessage
   | StartMessage
   | AnswerStateMessage
   | UpdateTeamMemberStateMessage
@@ -100,6 +114,30 @@ interface WebSocketContextType {
   error: Error | null;
 }
 
+function applyPartialObservation(
+  observationSpace: any,
+  updates: PartialObservationUpdate[]
+): any {
+  if (observationSpace === null) return observationSpace;
+  return observationSpace.map((obs: any) => {
+    const obsUpdates = updates.filter((update) => update.name === obs.name);
+    if (obsUpdates.length === 0 || obs.type !== 'JupyterEditor') return obs;
+    const content = [...obs.content];
+    for (const update of obsUpdates) {
+      const index = content.findIndex((cell: any) => cell.id === update.id);
+      if (index === -1) {
+        content.push({ id: update.id, code: update.code ?? '', result: update.output ?? '' });
+      } else {
+        content[index] = {
+          ...content[index],
+          result: (content[index].result ?? '') + (update.output ?? ''),
+        };
+      }
+    }
+    return { ...obs, content };
+  });
+}
+
 const WebSocketContext = React.createContext<WebSocketContextType | undefined>(
   undefined
 );
@@ -137,6 +175,12 @@ export function WebSocketProvider({ children }: WebSocketProviderProps) {
               agentAsleep: data.agent_asleep,
             }));
             break;
+          case 'partial_observation':
+            setState((prev) => ({
+              ...prev,
+              observationSpace: applyPartialObservation(prev.observationSpace, data.updates),
+            }));
+            break;
           case 'start':
             setState((prev) => ({
               ...prev,
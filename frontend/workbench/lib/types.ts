@@ -6,6 +6,7 @@ import { TravelSearchResultCardProps } from '@/components/tools/travel-search/tr
 export type TaskType = 'lit_survey' | 'tabular_analysis' | 'travel_planning';
 
 export type JupyterCodeResultTuple = {
+  id: number;
   code: string;
   result: string;
 };
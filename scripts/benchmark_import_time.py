@@ -0,0 +1,90 @@
+"""
+Benchmark the time to import `collaborative_gym.command` and other entry points.
+
+Every node process imports its entry module before doing anything else, so this cost is
+paid for each team member and environment of every session. Each module is imported in
+a fresh interpreter with `-X importtime`; the slowest top-level dependencies are listed
+to show where the time goes. Environment modules are registered lazily in `EnvFactory`,
+so they only show up here if something imports them eagerly again.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the import time of collaborative_gym entry points."
+    )
+    parser.add_argument("--modules", type=str, nargs="+",
+                        default=["collaborative_gym.command", "collaborative_gym.envs"],
+                        help="Modules to import.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of fresh interpreters per module.")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Number of slowest third-party imports of collaborative_gym to list.")
+    return parser.parse_args()
+
+
+def import_once(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        The total import time in seconds and, for every third-party module imported
+        directly by collaborative_gym code, its cumulative import time in seconds
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # -X importtime prints a module after its own imports, indented by nesting level.
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # Header line
+        level = (len(name) - len(name.lstrip())) // 2
+        entries.append((level, name.strip(), int(cumulative_us) / 1e6))
+
+    total = float(result.stdout.strip().splitlines()[-1])
+    dependencies = {}
+    for i, (level, name, seconds) in enumerate(entries):
+        if name.startswith("collaborative_gym"):
+            continue
+        # The importer is the next entry with a lower nesting level.
+        importer = next((n for lv, n, _ in entries[i + 1:] if lv < level), None)
+        if importer is not None and importer.startswith("collaborative_gym"):
+            dependencies[name] = dependencies.get(name, 0) + seconds
+    return total, dependencies
+
+
+def main():
+    args = parse_arguments()
+    for module in args.modules:
+        runs = [import_once(module) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        print(
+            f"{module}: median {statistics.median(totals):.2f}s "
+            f"(min {min(totals):.2f}s, max {max(totals):.2f}s over {args.repeat} runs)"
+        )
+        dependencies = runs[-1][1]
+        for name, seconds in sorted(dependencies.items(), key=lambda x: -x[1])[: args.top]:
+            print(f"    {name:<40} {seconds:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark per-step observation serialization cost against team size.
+
+Compares encoding one `Message[JsonObj]` per team member through pydantic (the previous
+behavior of TaskEnvNode) with `encode_json_obj_messages`, which serializes the public
+part of the observation once and splices it into every member's message.
+"""
+
+import argparse
+import time
+
+from aact import Message
+
+from collaborative_gym.nodes.commons import JsonObj, encode_json_obj_messages
+from collaborative_gym.utils.jupyter_history import JupyterCell
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark observation serialization cost against team size."
+    )
+    parser.add_argument("--max-team-size", type=int, default=8,
+                        help="Largest team size to benchmark.")
+    parser.add_argument("--public-size-kb", type=int, default=512,
+                        help="Approximate size of the public observation in KB.")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="Number of simulated steps per measurement.")
+    return parser.parse_args()
+
+
+def make_observation(team_members, public_size_kb):
+    jupyter_history = [
+        JupyterCell(
+            id=i,
+            code="import pandas as pd\ndf = pd.read_csv('data.csv')",
+            output="x" * 1000,
+        ).model_dump()
+        for i in range(max(1, public_size_kb // 2))
+    ]
+    related_works_editor = "Related work paragraph. " * (public_size_kb * 1024 // 2 // 24)
+    return {
+        "public": {
+            "jupyter_history": jupyter_history,
+            "related_works_editor": related_works_editor,
+        },
+        "private": {member: {"private_note": f"note for {member}"} for member in team_members},
+    }
+
+
+def make_payloads(team_members, obs):
+    chat_history = [{"role": "agent", "timestamp": "", "message": "Hello!"}] * 20
+    return {
+        member: {
+            "observation": {**obs["public"], **obs["private"][member]},
+            "reward": 0,
+            "info": {},
+            "chat_history": chat_history,
+            "pending_confirmations": {},
+            "agent_asleep": False,
+        }
+        for member in team_members
+    }
+
+
+def bench_pydantic(team_members, obs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in make_payloads(team_members, obs).values():
+            Message[JsonObj](data=JsonObj(object=payload)).model_dump_json()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_fanout(team_members, obs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode_json_obj_messages(make_payloads(team_members, obs))
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    args = parse_arguments()
+    print(f"{'team size':>10} {'pydantic (ms/step)':>20} {'fan-out (ms/step)':>20} {'speedup':>8}")
+    for team_size in range(1, args.max_team_size + 1):
+        team_members = ["agent"] + [f"user_{i}" for i in range(team_size - 1)]
+        obs = make_observation(team_members, args.public_size_kb)
+        pydantic_time = bench_pydantic(team_members, obs, args.repeat)
+        fanout_time = bench_fanout(team_members, obs, args.repeat)
+        print(
+            f"{team_size:>10} {pydantic_time * 1000:>20.2f} {fanout_time * 1000:>20.2f} "
+            f"{pydantic_time / fanout_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark the wire codecs of BaseNode on observation payloads.
+
+Observations are taken from the event log of a finished session (`--event-log`),
+e.g. workdir/results/<env_uuid>/event_log.jsonl. Without an event log, an observation
+resembling a literature survey session is built from datasets/RelatedWorkWriting.
+"""
+
+import argparse
+import json
+import time
+
+from aact import Message
+
+from collaborative_gym.nodes.codecs import CODECS, get_codec
+from collaborative_gym.nodes.commons import JsonObj
+from collaborative_gym.utils.event_log import load_event_log
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark wire codecs on observation payloads."
+    )
+    parser.add_argument("--event-log", type=str, default=None,
+                        help="Path to an event_log.jsonl to take the observations from.")
+    parser.add_argument("--dataset", type=str,
+                        default="datasets/RelatedWorkWriting/test.json",
+                        help="Dataset used to build an observation without an event log.")
+    parser.add_argument("--num-observations", type=int, default=10,
+                        help="Number of (latest) observations taken from the event log.")
+    parser.add_argument("--repeat", type=int, default=50,
+                        help="Number of encode/decode round trips per observation.")
+    return parser.parse_args()
+
+
+def load_observations_from_event_log(event_log_path, num_observations):
+    events = load_event_log(event_log_path, with_state=True)
+    observations = []
+    for event in events[-num_observations:]:
+        obs = event["current_observation"]
+        # Observation of the first team member, as sent by TaskEnvNode
+        private = next(iter(obs.get("private", {}).values()), {})
+        observations.append(
+            {
+                "observation": {**obs.get("public", {}), **private},
+                "reward": 0,
+                "info": {},
+                "chat_history": event["current_chat_history"],
+                "pending_confirmations": {},
+                "agent_asleep": False,
+            }
+        )
+    return observations
+
+
+def make_observation_from_dataset(dataset_path):
+    with open(dataset_path) as f:
+        papers = json.load(f)
+    library = [
+        {
+            "title": paper["title"],
+            "authors": ["Author A", "Author B"],
+            "year": 2024,
+            "venue": paper["conference"],
+            "url": paper["paper_link"],
+            "abstract": " ".join(str(r[1]) for r in paper["hidden_requirements"]) * 5,
+        }
+        for paper in papers
+    ]
+    related_works_editor = "\n\n".join(
+        f"{paper['topic']} has been studied in {paper['title']} [{i}]."
+        for i, paper in enumerate(papers)
+    )
+    chat_history = [
+        {"role": "agent" if i % 2 else "user_0", "timestamp": "", "message": paper["topic"]}
+        for i, paper in enumerate(papers[:30])
+    ]
+    return {
+        "observation": {
+            "library": library,
+            "related_works_editor": related_works_editor,
+            "search_window": {"query": papers[0]["topic"], "results": library[:10]},
+        },
+        "reward": 0,
+        "info": {},
+        "chat_history": chat_history,
+        "pending_confirmations": {},
+        "agent_asleep": False,
+    }
+
+
+def bench_codec(codec, messages, repeat):
+    encode_time = decode_time = 0.0
+    frame_size = 0
+    for message in messages:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            frame = codec.encode(message)
+        encode_time += time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(repeat):
+            decoded = codec.decode(frame, Message[JsonObj])
+        decode_time += time.perf_counter() - start
+        assert decoded.data.object == message.data.object
+        frame_size += len(frame)
+    n = len(messages) * repeat
+    return encode_time / n, decode_time / n, frame_size / len(messages)
+
+
+def main():
+    args = parse_arguments()
+    if args.event_log:
+        payloads = load_observations_from_event_log(args.event_log, args.num_observations)
+    else:
+        payloads = [make_observation_from_dataset(args.dataset)]
+    messages = [Message[JsonObj](data=JsonObj(object=payload)) for payload in payloads]
+
+    print(f"{'codec':>14} {'encode (ms)':>12} {'decode (ms)':>12} {'frame (KB)':>11}")
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError as e:
+            print(f"{name:>14} skipped: {e}")
+            continue
+        encode_time, decode_time, frame_size = bench_codec(codec, messages, args.repeat)
+        print(
+            f"{name:>14} {encode_time * 1000:>12.3f} {decode_time * 1000:>12.3f} "
+            f"{frame_size / 1024:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
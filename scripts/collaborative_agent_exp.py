@@ -11,7 +11,11 @@ import time
 import toml
 
 from collaborative_gym.core import TeamMemberConfig
+from collaborative_gym.env_host import EnvHostPool
+from collaborative_gym.in_process_runner import InProcessRunner
+from collaborative_gym.node_pool import NodeWorkerPool
 from collaborative_gym.runner import Runner
+from collaborative_gym.scheduler import ExperimentScheduler, SessionSpec, parse_provider_limits
 from collaborative_gym.utils.string import make_string_green
 
 TABULAR_ANALYSIS_CONFIG_TEMPLATE = """env_class = "tabular_analysis"
@@ -43,6 +47,24 @@ def parse_arguments():
     parser.add_argument("--result-dir-tag", type=str, required=True)
     parser.add_argument("--secret-path", type=str, default="secrets.toml")
     parser.add_argument("--redis-url", type=str, default="redis://localhost:6379/0")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run all nodes of a session in this process, without Redis.")
+    parser.add_argument("--node-pool-size", type=int, default=0,
+                        help="Start nodes from this many pre-warmed worker processes (0 disables the pool).")
+    parser.add_argument("--env-host-count", type=int, default=0,
+                        help="Run the environment nodes of all sessions in this many host processes "
+                             "(0 starts an environment process per session).")
+    parser.add_argument("--max-concurrent-sessions", type=int, default=1,
+                        help="Number of sessions running at the same time.")
+    parser.add_argument("--provider-limit", type=str, action="append", default=[],
+                        help="Maximum number of concurrent sessions calling an LM provider, "
+                             "as PROVIDER=N (e.g. openai=8). Can be repeated.")
+    parser.add_argument("--max-retries", type=int, default=0,
+                        help="Number of times a failed session is started again.")
+    parser.add_argument("--retry-backoff", type=float, default=30,
+                        help="Seconds before the first retry of a session, doubled for each further retry.")
+    parser.add_argument("--session-timeout-minutes", type=float, default=0,
+                        help="Stop a session and count it as failed after this time (0 for no limit).")
     return parser.parse_args()
 
 
@@ -72,48 +94,80 @@ def select_config_template(task):
         raise ValueError(f"Unsupported task: {task}")
 
 
-def register_exit_signals(runner):
+def register_exit_signals(scheduler):
     def handle_exit_signal(signum, frame):
-        runner.cleanup_subprocesses()
+        scheduler.shutdown()
         sys.exit(0)
-    atexit.register(runner.cleanup_subprocesses)
+    atexit.register(scheduler.shutdown)
     signal.signal(signal.SIGINT, handle_exit_signal)
     signal.signal(signal.SIGTERM, handle_exit_signal)
 
 
+def make_runner_factory(args, result_dir):
+    if args.in_process:
+        return lambda: InProcessRunner(result_dir=result_dir)
+    node_pool = None
+    if args.node_pool_size > 0:
+        node_pool = NodeWorkerPool(size=args.node_pool_size, redis_url=args.redis_url)
+        node_pool.start()
+        atexit.register(node_pool.shutdown)
+    env_host_pool = None
+    if args.env_host_count > 0:
+        env_host_pool = EnvHostPool(
+            size=args.env_host_count,
+            redis_url=args.redis_url,
+            max_sessions_per_host=-(-args.max_concurrent_sessions // args.env_host_count),
+        )
+        env_host_pool.start()
+        atexit.register(env_host_pool.shutdown)
+    return lambda: Runner(result_dir=result_dir, redis_url=args.redis_url, node_pool=node_pool,
+                          env_host_pool=env_host_pool)
+
+
 def run_experiments(args, env_config_tmp_dir, config_template):
-    runner = Runner(
-        result_dir=os.path.join(args.work_dir, f"{args.task}/{args.result_dir_tag}/results")
+    result_dir = os.path.join(args.work_dir, f"{args.task}/{args.result_dir_tag}/results")
+    scheduler = ExperimentScheduler(
+        result_dir=result_dir,
+        runner_factory=make_runner_factory(args, result_dir),
+        max_concurrent_sessions=args.max_concurrent_sessions,
+        provider_limits=parse_provider_limits(args.provider_limit),
+        max_retries=args.max_retries,
+        retry_backoff=args.retry_backoff,
+        session_timeout=args.session_timeout_minutes * 60 if args.session_timeout_minutes > 0 else None,
     )
-    register_exit_signals(runner)
+    register_exit_signals(scheduler)
 
     team_member_config = toml.load(args.team_member_config_path)
 
+    specs = []
     for idx in range(args.start_idx, args.end_idx):
-        runner.reset()
-        start_time = time.time()
-        print(make_string_green(f"Starting experiment for {args.task} with index {idx}"))
         config_path = os.path.join(env_config_tmp_dir, f"{args.task}_{idx}.toml")
         with open(config_path, "w") as f:
             f.write(config_template.format(idx=idx))
-
-        runner.start_session(
+        specs.append(SessionSpec(
             session_uuid=f"{args.task}_{idx}",
             env_config_path=config_path,
             members=[TeamMemberConfig(**member) for member in team_member_config["team_member"]],
             max_steps=30,
             disable_collaboration=False,
             add_tick=True,
-        )
-
-        for node_process in runner.subprocesses:
-            node_process.wait()
-
-        time_spent = (time.time() - start_time) / 60
-        print(make_string_green(
-            f"Experiment for {args.task} with index {idx} completed in {time_spent:.2f} minutes."
         ))
 
+    start_time = time.time()
+    print(make_string_green(
+        f"Starting {len(specs)} experiments for {args.task}, "
+        f"{args.max_concurrent_sessions} at a time"
+    ))
+    outcomes = scheduler.run(specs)
+    failed = [o.session_uuid for o in outcomes if o.status == "failed"]
+    print(make_string_green(
+        f"{sum(o.status == 'completed' for o in outcomes)} sessions completed, "
+        f"{sum(o.status == 'skipped' for o in outcomes)} skipped (already completed), "
+        f"{len(failed)} failed in {(time.time() - start_time) / 60:.2f} minutes."
+    ))
+    if failed:
+        print(f"Failed sessions: {failed}")
+
 
 def main():
     args = parse_arguments()
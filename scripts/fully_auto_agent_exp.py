@@ -11,7 +11,11 @@ import time
 import toml
 
 from collaborative_gym.core import TeamMemberConfig
+from collaborative_gym.env_host import EnvHostPool
+from collaborative_gym.in_process_runner import InProcessRunner
+from collaborative_gym.node_pool import NodeWorkerPool
 from collaborative_gym.runner import Runner
+from collaborative_gym.scheduler import ExperimentScheduler, SessionSpec, parse_provider_limits
 from collaborative_gym.utils.string import make_string_green
 
 
@@ -56,6 +60,24 @@ def parse_arguments():
                         help="Path to the secrets file.")
     parser.add_argument("--redis-url", type=str, default="redis://localhost:6379/0",
                         help="Redis URL for backend services.")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run all nodes of a session in this process, without Redis.")
+    parser.add_argument("--node-pool-size", type=int, default=0,
+                        help="Start nodes from this many pre-warmed worker processes (0 disables the pool).")
+    parser.add_argument("--env-host-count", type=int, default=0,
+                        help="Run the environment nodes of all sessions in this many host processes "
+                             "(0 starts an environment process per session).")
+    parser.add_argument("--max-concurrent-sessions", type=int, default=1,
+                        help="Number of sessions running at the same time.")
+    parser.add_argument("--provider-limit", type=str, action="append", default=[],
+                        help="Maximum number of concurrent sessions calling an LM provider, "
+                             "as PROVIDER=N (e.g. openai=8). Can be repeated.")
+    parser.add_argument("--max-retries", type=int, default=0,
+                        help="Number of times a failed session is started again.")
+    parser.add_argument("--retry-backoff", type=float, default=30,
+                        help="Seconds before the first retry of a session, doubled for each further retry.")
+    parser.add_argument("--session-timeout-minutes", type=float, default=0,
+                        help="Stop a session and count it as failed after this time (0 for no limit).")
     return parser.parse_args()
 
 
@@ -82,48 +104,71 @@ def select_config_template(task):
         raise ValueError(f"Unsupported task: {task}")
 
 
-def init_runner(work_dir, task, result_dir_tag):
+def init_runner_factory(work_dir, task, result_dir_tag, in_process=False, node_pool_size=0,
+                        redis_url="redis://localhost:6379/0", env_host_count=0,
+                        max_concurrent_sessions=1):
     results_path = os.path.join(work_dir, f"{task}/{result_dir_tag}/results")
-    return Runner(result_dir=results_path)
+    if in_process:
+        return lambda: InProcessRunner(result_dir=results_path)
+    node_pool = None
+    if node_pool_size > 0:
+        node_pool = NodeWorkerPool(size=node_pool_size, redis_url=redis_url)
+        node_pool.start()
+        atexit.register(node_pool.shutdown)
+    env_host_pool = None
+    if env_host_count > 0:
+        env_host_pool = EnvHostPool(
+            size=env_host_count,
+            redis_url=redis_url,
+            max_sessions_per_host=-(-max_concurrent_sessions // env_host_count),
+        )
+        env_host_pool.start()
+        atexit.register(env_host_pool.shutdown)
+    return lambda: Runner(result_dir=results_path, redis_url=redis_url, node_pool=node_pool,
+                          env_host_pool=env_host_pool)
 
 
-def register_exit_signals(runner):
+def register_exit_signals(scheduler):
     def handle_exit_signal(signum, frame):
-        runner.cleanup_subprocesses()
+        scheduler.shutdown()
         sys.exit(0)
 
-    atexit.register(runner.cleanup_subprocesses)
+    atexit.register(scheduler.shutdown)
     signal.signal(signal.SIGINT, handle_exit_signal)
     signal.signal(signal.SIGTERM, handle_exit_signal)
 
 
-def run_experiments(args, env_config_dir, config_template, runner, team_member_config):
+def run_experiments(args, env_config_dir, config_template, scheduler, team_member_config):
+    specs = []
     for idx in range(args.start_idx, args.end_idx):
-        runner.reset()
-        start_time = time.time()
-        print(make_string_green(f"Starting experiment for {args.task} with index {idx}"))
-        
         config_path = os.path.join(env_config_dir, f"{args.task}_{idx}.toml")
         with open(config_path, "w") as f:
             f.write(config_template.format(idx=idx))
-        
-        runner.start_session(
+
+        specs.append(SessionSpec(
             session_uuid=f"{args.task}_{idx}",
             env_config_path=config_path,
             members=[TeamMemberConfig(**member) for member in team_member_config["team_member"]],
             max_steps=30,
             disable_collaboration=True,
             add_tick=False,
-        )
-        
-        for node_process in runner.subprocesses:
-            node_process.wait()
-        
-        time_spent = (time.time() - start_time) / 60
-        print(make_string_green(
-            f"Experiment for {args.task} with index {idx} completed in {time_spent:.2f} minutes."
         ))
 
+    start_time = time.time()
+    print(make_string_green(
+        f"Starting {len(specs)} experiments for {args.task}, "
+        f"{args.max_concurrent_sessions} at a time"
+    ))
+    outcomes = scheduler.run(specs)
+    failed = [o.session_uuid for o in outcomes if o.status == "failed"]
+    print(make_string_green(
+        f"{sum(o.status == 'completed' for o in outcomes)} sessions completed, "
+        f"{sum(o.status == 'skipped' for o in outcomes)} skipped (already completed), "
+        f"{len(failed)} failed in {(time.time() - start_time) / 60:.2f} minutes."
+    ))
+    if failed:
+        print(f"Failed sessions: {failed}")
+
 
 def main():
     args = parse_arguments()
@@ -131,11 +176,21 @@ def main():
     
     env_config_dir = create_env_config_dir(args.work_dir, args.task, args.result_dir_tag)
     config_template = select_config_template(args.task)
-    runner = init_runner(args.work_dir, args.task, args.result_dir_tag)
-    register_exit_signals(runner)
+    scheduler = ExperimentScheduler(
+        result_dir=os.path.join(args.work_dir, f"{args.task}/{args.result_dir_tag}/results"),
+        runner_factory=init_runner_factory(args.work_dir, args.task, args.result_dir_tag,
+                                           args.in_process, args.node_pool_size, args.redis_url,
+                                           args.env_host_count, args.max_concurrent_sessions),
+        max_concurrent_sessions=args.max_concurrent_sessions,
+        provider_limits=parse_provider_limits(args.provider_limit),
+        max_retries=args.max_retries,
+        retry_backoff=args.retry_backoff,
+        session_timeout=args.session_timeout_minutes * 60 if args.session_timeout_minutes > 0 else None,
+    )
+    register_exit_signals(scheduler)
     
     team_member_config = toml.load(args.team_member_config_path)
-    run_experiments(args, env_config_dir, config_template, runner, team_member_config)
+    run_experiments(args, env_config_dir, config_template, scheduler, team_member_config)
 
 
 if __name__ == "__main__":
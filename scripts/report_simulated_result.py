@@ -2,6 +2,8 @@ import argparse
 import json
 import os
 
+from collaborative_gym.utils.event_log import load_event_log
+
 
 def parse_arguments():
     parser = argparse.ArgumentParser(
@@ -32,11 +34,7 @@ def update_task_performance_if_needed(session_dir, task_performance):
 
 def process_event_log(session_dir):
     event_log_path = os.path.join(session_dir, "event_log.jsonl")
-    events = []
-    with open(event_log_path) as f:
-        for line in f:
-            events.append(json.loads(line))
-    return events
+    return load_event_log(event_log_path)
 
 
 def process_session(result_dir, session_name):